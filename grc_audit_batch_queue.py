@@ -0,0 +1,478 @@
+"""
+GRC AUDIT SYSTEM - DEFERRED BATCH QUEUE
+======================================================================
+Durable local queue for cost-sensitive audit tasks (quarterly scans,
+overnight log reviews). Jobs carry deadlines and are grouped by provider
+and system-prompt prefix into batch submissions for provider batch APIs
+or off-peak windows; results are tracked per job and partial failures
+retried. FileBatchProvider stands in for a batch API offline.
+"""
+
+from typing import Callable, Dict, List, Optional, Tuple
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+
+from grc_audit_orchestration_context import LLMProvider, LLMRouter, TokenCounter, UserRole, content_hash
+
+
+JOB_PENDING = "pending"
+JOB_SUBMITTING = "submitting"              # Claimed for a batch whose provider submit() has not been confirmed
+JOB_SUBMITTED = "submitted"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS prompts (
+    prompt_hash TEXT PRIMARY KEY,
+    text TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    provider TEXT NOT NULL,
+    prompt_hash TEXT NOT NULL REFERENCES prompts(prompt_hash),
+    user_message TEXT NOT NULL,
+    max_output_tokens INTEGER NOT NULL,
+    task_type TEXT NOT NULL,
+    user_role TEXT NOT NULL,
+    deadline REAL NOT NULL,
+    created_at REAL NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    batch_id TEXT,
+    result TEXT,
+    error TEXT,
+    input_tokens INTEGER,
+    output_tokens INTEGER
+);
+CREATE INDEX IF NOT EXISTS jobs_pending ON jobs(status, provider, prompt_hash, deadline);
+CREATE TABLE IF NOT EXISTS batches (
+    batch_id TEXT PRIMARY KEY,
+    provider TEXT NOT NULL,
+    prompt_hash TEXT NOT NULL,
+    submitted_at REAL NOT NULL,
+    status TEXT NOT NULL
+);
+"""
+
+
+@dataclass
+class BatchJob:
+    """One queued task"""
+    job_id: str
+    provider: LLMProvider
+    prompt_hash: str                       # Shared system prompt (stored once per content hash)
+    user_message: str
+    max_output_tokens: int
+    task_type: str
+    user_role: UserRole
+    deadline: float                        # Epoch seconds by which a result is needed
+    status: str
+    attempts: int
+    batch_id: Optional[str] = None
+    result: Optional[str] = None
+    error: Optional[str] = None
+
+
+@dataclass
+class BatchItemResult:
+    """Outcome of one job inside a completed batch"""
+    job_id: str
+    text: Optional[str] = None
+    error: Optional[str] = None
+    input_tokens: int = 0
+    output_tokens: int = 0
+
+
+# ============================================================================
+# QUEUE
+# ============================================================================
+
+class BatchQueue:
+    """SQLite-backed job store; survives process restarts"""
+
+    def __init__(self, path: str, clock: Callable[[], float] = time.time):
+        self.path = path
+        self._clock = clock
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self):
+        self._db.close()
+
+    def _row_to_job(self, row: Tuple) -> BatchJob:
+        (job_id, provider, prompt_hash, user_message, max_output_tokens, task_type, user_role,
+         deadline, status, attempts, batch_id, result, error) = row
+        return BatchJob(job_id, LLMProvider(provider), prompt_hash, user_message, max_output_tokens,
+                        task_type, UserRole(user_role), deadline, status, attempts, batch_id, result, error)
+
+    _JOB_COLUMNS = ("job_id, provider, prompt_hash, user_message, max_output_tokens, task_type, user_role, "
+                    "deadline, status, attempts, batch_id, result, error")
+
+    def enqueue(self,
+                provider: LLMProvider,
+                system_prompt: str,
+                user_message: str,
+                deadline: float,
+                max_output_tokens: int = 4000,
+                task_type: str = "batch",
+                user_role: UserRole = UserRole.DEFAULT) -> str:
+        """Queue one task; returns its job ID"""
+        job_id = uuid.uuid4().hex
+        prompt_hash = content_hash(system_prompt)
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.execute("INSERT OR IGNORE INTO prompts VALUES (?, ?)", (prompt_hash, system_prompt))
+                self._db.execute(
+                    "INSERT INTO jobs (job_id, provider, prompt_hash, user_message, max_output_tokens, task_type, "
+                    "user_role, deadline, created_at, status) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (job_id, provider.value, prompt_hash, user_message, max_output_tokens, task_type,
+                     user_role.value, deadline, self._clock(), JOB_PENDING),
+                )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return job_id
+
+    def _read(self, sql: str, params: Tuple = ()) -> List[Tuple]:
+        """Run a query on the shared connection under the queue lock"""
+        with self._lock:
+            return self._db.execute(sql, params).fetchall()
+
+    def job(self, job_id: str) -> Optional[BatchJob]:
+        rows = self._read(f"SELECT {self._JOB_COLUMNS} FROM jobs WHERE job_id = ?", (job_id,))
+        return self._row_to_job(rows[0]) if rows else None
+
+    def prompt(self, prompt_hash: str) -> str:
+        return self._read("SELECT text FROM prompts WHERE prompt_hash = ?", (prompt_hash,))[0][0]
+
+    def pending_groups(self) -> Dict[Tuple[LLMProvider, str], List[BatchJob]]:
+        """Pending jobs grouped by (provider, prompt prefix), earliest deadline first"""
+        groups: Dict[Tuple[LLMProvider, str], List[BatchJob]] = {}
+        rows = self._read(f"SELECT {self._JOB_COLUMNS} FROM jobs WHERE status = ? ORDER BY deadline", (JOB_PENDING,))
+        for row in rows:
+            job = self._row_to_job(row)
+            groups.setdefault((job.provider, job.prompt_hash), []).append(job)
+        return groups
+
+    def mark_submitting(self, batch_id: str, provider: LLMProvider, prompt_hash: str, job_ids: List[str]) -> List[str]:
+        """
+        Record a batch before it is sent to the provider: still-pending jobs
+        among job_ids move to "submitting" under batch_id. Returns the IDs
+        claimed (jobs claimed by another scheduler are skipped).
+        """
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                claimed = []
+                for job_id in job_ids:
+                    cursor = self._db.execute(
+                        "UPDATE jobs SET status = ?, batch_id = ?, attempts = attempts + 1 WHERE job_id = ? AND status = ?",
+                        (JOB_SUBMITTING, batch_id, job_id, JOB_PENDING),
+                    )
+                    if cursor.rowcount:
+                        claimed.append(job_id)
+                if claimed:
+                    self._db.execute("INSERT INTO batches VALUES (?, ?, ?, ?, ?)",
+                                     (batch_id, provider.value, prompt_hash, self._clock(), JOB_SUBMITTING))
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return claimed
+
+    def mark_submitted(self, batch_id: str):
+        """The provider has accepted a batch recorded by mark_submitting()"""
+        self._set_batch_status(batch_id, JOB_SUBMITTED, "status = ?")
+
+    def release_submitting(self, batch_id: str):
+        """The provider never received the batch: its jobs go back to pending (the attempt is not counted)"""
+        self._set_batch_status(batch_id, JOB_PENDING, "status = ?, batch_id = NULL, attempts = attempts - 1")
+
+    def _set_batch_status(self, batch_id: str, status: str, job_update: str):
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.execute(f"UPDATE jobs SET {job_update} WHERE batch_id = ? AND status = ?",
+                                 (status, batch_id, JOB_SUBMITTING))
+                if status == JOB_PENDING:
+                    self._db.execute("DELETE FROM batches WHERE batch_id = ? AND status = ?", (batch_id, JOB_SUBMITTING))
+                else:
+                    self._db.execute("UPDATE batches SET status = ? WHERE batch_id = ? AND status = ?",
+                                     (status, batch_id, JOB_SUBMITTING))
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def submitted_batches(self) -> List[Tuple[str, LLMProvider]]:
+        return self._batches(JOB_SUBMITTED)
+
+    def submitting_batches(self) -> List[Tuple[str, LLMProvider]]:
+        """Batches recorded but not confirmed as submitted (e.g. the process died during submit())"""
+        return self._batches(JOB_SUBMITTING)
+
+    def _batches(self, status: str) -> List[Tuple[str, LLMProvider]]:
+        rows = self._read("SELECT batch_id, provider FROM batches WHERE status = ?", (status,))
+        return [(batch_id, LLMProvider(provider)) for batch_id, provider in rows]
+
+    def record_results(self, batch_id: str, results: List[BatchItemResult], max_attempts: int) -> List[str]:
+        """
+        Store a completed batch. Failed items go back to pending until
+        max_attempts, then fail permanently; items missing from the results
+        are treated as failed. Returns IDs of jobs re-queued for retry.
+        """
+        by_id = {result.job_id: result for result in results}
+        retried: List[str] = []
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._db.execute("SELECT job_id, attempts FROM jobs WHERE batch_id = ? AND status = ?",
+                                        (batch_id, JOB_SUBMITTED)).fetchall()
+                for job_id, attempts in rows:
+                    result = by_id.get(job_id, BatchItemResult(job_id, error="missing from batch output"))
+                    if result.error is None:
+                        self._db.execute(
+                            "UPDATE jobs SET status = ?, result = ?, error = NULL, input_tokens = ?, output_tokens = ? "
+                            "WHERE job_id = ?",
+                            (JOB_DONE, result.text, result.input_tokens, result.output_tokens, job_id),
+                        )
+                    elif attempts < max_attempts:
+                        self._db.execute("UPDATE jobs SET status = ?, batch_id = NULL, error = ? WHERE job_id = ?",
+                                         (JOB_PENDING, result.error, job_id))
+                        retried.append(job_id)
+                    else:
+                        self._db.execute("UPDATE jobs SET status = ?, error = ? WHERE job_id = ?",
+                                         (JOB_FAILED, result.error, job_id))
+                self._db.execute("UPDATE batches SET status = ? WHERE batch_id = ?", (JOB_DONE, batch_id))
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return retried
+
+    def counts(self) -> Dict[str, int]:
+        """Jobs per status"""
+        return dict(self._read("SELECT status, COUNT(*) FROM jobs GROUP BY status"))
+
+    def overdue(self) -> List[BatchJob]:
+        """Unfinished jobs past their deadline"""
+        rows = self._read(
+            f"SELECT {self._JOB_COLUMNS} FROM jobs WHERE status IN (?, ?, ?) AND deadline < ? ORDER BY deadline",
+            (JOB_PENDING, JOB_SUBMITTING, JOB_SUBMITTED, self._clock()),
+        )
+        return [self._row_to_job(row) for row in rows]
+
+
+# ============================================================================
+# BATCH PROVIDERS
+# ============================================================================
+
+class BatchProvider(ABC):
+    """Adapter for a provider batch API"""
+
+    @abstractmethod
+    def submit(self, batch_id: str, system_prompt: str, jobs: List[BatchJob]):
+        """Send jobs as one batch under batch_id"""
+
+    @abstractmethod
+    def is_submitted(self, batch_id: str) -> bool:
+        """Whether the provider holds batch_id (looked up by the ID passed to submit())"""
+
+    @abstractmethod
+    def poll(self, batch_id: str) -> Optional[List[BatchItemResult]]:
+        """Results once the batch has completed, None while it is still running"""
+
+
+class FileBatchProvider(BatchProvider):
+    """
+    Offline stand-in for a batch API: submit() writes <batch_id>.input.jsonl,
+    process() plays the provider and writes <batch_id>.output.jsonl (with an
+    optional per-item failure rate), poll() reads the output file.
+    """
+
+    def __init__(self, directory: str, failure_rate: float = 0.0, seed: Optional[int] = None,
+                 token_counter: Optional[TokenCounter] = None):
+        self.directory = directory
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+        self.token_counter = token_counter if token_counter is not None else TokenCounter(approximate=True)
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, batch_id: str, kind: str) -> str:
+        return os.path.join(self.directory, f"{batch_id}.{kind}.jsonl")
+
+    def submit(self, batch_id: str, system_prompt: str, jobs: List[BatchJob]):
+        path = self._path(batch_id, "input")
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            f.write(json.dumps({"system_prompt": system_prompt}) + "\n")
+            for job in jobs:
+                f.write(json.dumps({"job_id": job.job_id, "user_message": job.user_message,
+                                    "max_output_tokens": job.max_output_tokens}) + "\n")
+        os.replace(f"{path}.tmp", path)
+
+    def is_submitted(self, batch_id: str) -> bool:
+        return os.path.exists(self._path(batch_id, "input"))
+
+    def process(self):
+        """Complete every submitted batch that has no output yet"""
+        for name in sorted(os.listdir(self.directory)):
+            if not name.endswith(".input.jsonl"):
+                continue
+            batch_id = name[:-len(".input.jsonl")]
+            output_path = self._path(batch_id, "output")
+            if os.path.exists(output_path):
+                continue
+            with open(os.path.join(self.directory, name), encoding="utf-8") as f:
+                header, *items = [json.loads(line) for line in f]
+            prompt_tokens = self.token_counter.count(header["system_prompt"])
+            with open(f"{output_path}.tmp", "w", encoding="utf-8") as f:
+                for item in items:
+                    if self._random.random() < self.failure_rate:
+                        record = {"job_id": item["job_id"], "error": "simulated item failure"}
+                    else:
+                        record = {
+                            "job_id": item["job_id"],
+                            "text": f"[batch {batch_id}] {item['user_message'][:60]}",
+                            "input_tokens": prompt_tokens + self.token_counter.count(item["user_message"]),
+                            "output_tokens": min(item["max_output_tokens"], 256),
+                        }
+                    f.write(json.dumps(record) + "\n")
+            os.replace(f"{output_path}.tmp", output_path)
+
+    def poll(self, batch_id: str) -> Optional[List[BatchItemResult]]:
+        path = self._path(batch_id, "output")
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as f:
+            return [BatchItemResult(**json.loads(line)) for line in f]
+
+
+# ============================================================================
+# SCHEDULER
+# ============================================================================
+
+class BatchScheduler:
+    """
+    Decides when pending groups are submitted and collects results.
+    A (provider, prefix) group is submitted when:
+    - it has reached max_batch_size jobs, or
+    - its earliest deadline is within deadline_margin_s (batch turnaround), or
+    - the current local hour is inside the off-peak window.
+    Completed jobs are reported to router.track_usage at batch_discount × list price.
+    A batch is recorded as "submitting" before submit() is called, so a crash
+    in between cannot send its jobs twice: call recover() at startup.
+    """
+
+    def __init__(self,
+                 queue: BatchQueue,
+                 providers: Dict[LLMProvider, BatchProvider],
+                 router: Optional[LLMRouter] = None,
+                 max_batch_size: int = 100,
+                 deadline_margin_s: float = 6 * 3600,
+                 off_peak_hours: Optional[Tuple[int, int]] = (22, 6),
+                 max_attempts: int = 3,
+                 batch_discount: float = 0.5,
+                 token_counter: Optional[TokenCounter] = None,
+                 clock: Callable[[], float] = time.time):
+        self.queue = queue
+        self.providers = providers
+        self.router = router if router is not None else LLMRouter()
+        self.max_batch_size = max_batch_size
+        self.deadline_margin_s = deadline_margin_s
+        self.off_peak_hours = off_peak_hours
+        self.max_attempts = max_attempts
+        self.batch_discount = batch_discount
+        self.token_counter = token_counter if token_counter is not None else TokenCounter(approximate=True)
+        self._clock = clock
+
+    def enqueue(self,
+                system_prompt: str,
+                user_message: str,
+                deadline: float,
+                task_type: str = "batch",
+                user_role: UserRole = UserRole.DEFAULT,
+                max_output_tokens: int = 4000,
+                provider: Optional[LLMProvider] = None) -> str:
+        """Queue a task, routed with priority="cost" unless provider is given"""
+        if provider is None:
+            context_tokens = self.token_counter.count(system_prompt) + self.token_counter.count(user_message)
+            provider = self.router.select_llm(task_type, user_role, context_tokens, priority="cost")
+        return self.queue.enqueue(provider, system_prompt, user_message, deadline,
+                                  max_output_tokens, task_type, user_role)
+
+    def _off_peak(self, now: float) -> bool:
+        if self.off_peak_hours is None:
+            return False
+        start, end = self.off_peak_hours
+        hour = datetime.fromtimestamp(now).hour
+        return start <= hour < end if start <= end else hour >= start or hour < end
+
+    def submit_due(self) -> List[str]:
+        """Submit every group that is due; returns new batch IDs"""
+        now = self._clock()
+        off_peak = self._off_peak(now)
+        batch_ids = []
+        for (provider, prompt_hash), jobs in self.queue.pending_groups().items():
+            if provider not in self.providers:
+                continue
+            urgent = jobs[0].deadline - now <= self.deadline_margin_s
+            if not (off_peak or urgent or len(jobs) >= self.max_batch_size):
+                continue
+            system_prompt = self.queue.prompt(prompt_hash)
+            for start in range(0, len(jobs), self.max_batch_size):
+                chunk = jobs[start:start + self.max_batch_size]
+                batch_id = f"{provider.value}-{uuid.uuid4().hex[:12]}"
+                claimed = set(self.queue.mark_submitting(batch_id, provider, prompt_hash, [job.job_id for job in chunk]))
+                if not claimed:
+                    continue
+                try:
+                    self.providers[provider].submit(batch_id, system_prompt, [job for job in chunk if job.job_id in claimed])
+                except Exception:
+                    self._reconcile(batch_id, provider)  # The provider may have accepted it before failing
+                    raise
+                self.queue.mark_submitted(batch_id)
+                batch_ids.append(batch_id)
+        return batch_ids
+
+    def recover(self) -> Dict[str, str]:
+        """
+        Reconcile batches left "submitting" by a crash: confirmed with the
+        provider as submitted, or returned to pending. Run before submit_due()
+        when no other scheduler is submitting. Returns {batch_id: new status}.
+        """
+        return {batch_id: self._reconcile(batch_id, provider)
+                for batch_id, provider in self.queue.submitting_batches() if provider in self.providers}
+
+    def _reconcile(self, batch_id: str, provider: LLMProvider) -> str:
+        if self.providers[provider].is_submitted(batch_id):
+            self.queue.mark_submitted(batch_id)
+            return JOB_SUBMITTED
+        self.queue.release_submitting(batch_id)
+        return JOB_PENDING
+
+    def collect(self) -> Dict[str, List[str]]:
+        """Poll submitted batches; returns {batch_id: job IDs re-queued for retry} for completed batches"""
+        completed: Dict[str, List[str]] = {}
+        for batch_id, provider in self.queue.submitted_batches():
+            results = self.providers[provider].poll(batch_id) if provider in self.providers else None
+            if results is None:
+                continue
+            completed[batch_id] = self.queue.record_results(batch_id, results, self.max_attempts)
+            for result in results:
+                if result.error is None:
+                    cost = self.router.estimate_cost(provider, result.input_tokens, result.output_tokens)
+                    # Batch turnaround is not call latency; record cost only
+                    self.router.track_usage(provider, cost * self.batch_discount, None, "batch")
+        return completed
@@ -0,0 +1,222 @@
+"""
+GRC AUDIT SYSTEM - PROMPT PATH BENCHMARKS
+======================================================================
+Reproducible latency / memory / token benchmarks for prompt assembly,
+token estimation, full system prompt generation and module loading
+
+Usage:
+    python grc_audit_benchmarks.py --output bench.json
+    python grc_audit_benchmarks.py --output bench.json --baseline previous.json --tolerance 0.25
+"""
+
+from typing import Callable, Dict, List, Optional, Tuple
+from dataclasses import dataclass, asdict
+from datetime import datetime, timezone
+from itertools import combinations
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+from grc_audit_orchestration_context import (
+    FRAMEWORK_REGISTRY, FrameworkRegistry, PromptAssembler, PromptCache, UserRole
+)
+from grc_audit_output_templates_security import PromptEngine
+from grc_audit_latency_metrics import percentile
+
+
+BENCHMARK_SCHEMA_VERSION = 1
+
+
+@dataclass
+class BenchmarkResult:
+    """One operation measured for one (frameworks, role) combination"""
+    operation: str
+    frameworks: List[str]
+    user_role: str
+    runs: int
+    wall_ms_median: float
+    wall_ms_p95: float
+    peak_alloc_kb: float           # tracemalloc peak for a single run
+    output_chars: int
+    output_tokens: int
+
+    @property
+    def key(self) -> Tuple[str, Tuple[str, ...], str]:
+        return (self.operation, tuple(self.frameworks), self.user_role)
+
+
+def _measure(fn: Callable[[], object], runs: int) -> Tuple[List[float], float, object]:
+    """Time fn over runs (no tracing), then one traced run for peak allocation"""
+    timings = []
+    result = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = fn()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return timings, peak / 1024, result
+
+
+def framework_sets(available: List[str], max_set_size: Optional[int] = None) -> List[List[str]]:
+    """Every subset of the available frameworks (empty set = core only), smallest first"""
+    limit = len(available) if max_set_size is None else min(max_set_size, len(available))
+    sets: List[List[str]] = []
+    for size in range(0, limit + 1):
+        sets.extend(list(combo) for combo in combinations(available, size))
+    return sets
+
+
+def run_benchmarks(frameworks_to_test: Optional[List[List[str]]] = None,
+                   roles: Optional[List[UserRole]] = None,
+                   runs: int = 20,
+                   max_set_size: Optional[int] = None) -> List[BenchmarkResult]:
+    """
+    Benchmark the prompt path across role × framework-set combinations.
+    Operations:
+      load_module                   fresh registry, cold import of one framework's provider module
+      assemble_prompt_cold          PromptAssembler.assemble_prompt with an empty cache
+      assemble_prompt_cached        same call served from the prompt cache
+      estimate_tokens               PromptAssembler.estimate_tokens
+      full_system_prompt_cold       generate_full_system_prompt path with an empty cache
+      full_system_prompt_cached     same call served from the prompt cache
+    """
+    roles = roles if roles is not None else list(UserRole)
+    results: List[BenchmarkResult] = []
+
+    # Module loading (per framework, fresh registry each run; the provider module
+    # is evicted from sys.modules first so every run re-executes its import)
+    for source in FRAMEWORK_REGISTRY.sources():
+        def load(source=source):
+            for module_path in source.module_paths:
+                sys.modules.pop(module_path, None)
+            return FrameworkRegistry([source]).get(source.name)
+        timings, peak, content = _measure(load, runs)
+        if content is None:
+            continue  # Provider module not shipped
+        results.append(BenchmarkResult(
+            "load_module", [source.name], "-", runs,
+            statistics.median(timings), percentile(timings, 0.95), peak, len(content), 0,
+        ))
+
+    assembler = PromptAssembler(prompt_cache=PromptCache())
+    assembler.load_framework_modules()
+    engine = PromptEngine(prompt_cache=PromptCache())
+    engine.warm_up()
+    available = list(assembler.framework_modules)
+    if frameworks_to_test is None:
+        frameworks_to_test = framework_sets(available, max_set_size)
+
+    for frameworks in frameworks_to_test:
+        for role in roles:
+            def assemble_cold():
+                assembler.prompt_cache.clear()
+                return assembler.assemble_prompt(frameworks, role)
+
+            def full_cold():
+                engine.prompt_cache.clear()
+                return engine.full_system_prompt(frameworks, role)
+
+            operations: Dict[str, Callable[[], object]] = {
+                "assemble_prompt_cold": assemble_cold,
+                "assemble_prompt_cached": lambda: assembler.assemble_prompt(frameworks, role),
+                "estimate_tokens": lambda: assembler.estimate_tokens(frameworks, role),
+                "full_system_prompt_cold": full_cold,
+                "full_system_prompt_cached": lambda: engine.full_system_prompt(frameworks, role),
+            }
+            prompt = assembler.assemble_prompt(frameworks, role)
+            full_prompt = engine.full_system_prompt(frameworks, role)
+            prompt_tokens = assembler.estimate_tokens(frameworks, role)
+            full_tokens = assembler.token_counter.count(full_prompt)
+
+            for operation, fn in operations.items():
+                timings, peak, _ = _measure(fn, runs)
+                output = full_prompt if operation.startswith("full_system") else prompt
+                tokens = full_tokens if operation.startswith("full_system") else prompt_tokens
+                results.append(BenchmarkResult(
+                    operation, list(frameworks), role.value, runs,
+                    statistics.median(timings), percentile(timings, 0.95), peak,
+                    0 if operation == "estimate_tokens" else len(output), tokens,
+                ))
+
+    return results
+
+
+def write_results(results: List[BenchmarkResult], path: str):
+    """Write machine-readable results (JSON) with environment metadata"""
+    document = {
+        "schema_version": BENCHMARK_SCHEMA_VERSION,
+        "created": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "results": [asdict(result) for result in results],
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2)
+
+
+def load_results(path: str) -> List[BenchmarkResult]:
+    """Read results written by write_results"""
+    with open(path, encoding="utf-8") as f:
+        document = json.load(f)
+    return [BenchmarkResult(**record) for record in document["results"]]
+
+
+def compare_results(current: List[BenchmarkResult],
+                    baseline: List[BenchmarkResult],
+                    tolerance: float = 0.25,
+                    min_delta_ms: float = 0.25) -> List[str]:
+    """
+    Regressions versus a baseline run: median wall time or peak allocation
+    more than `tolerance` above baseline, or any change in token count.
+    Time deltas below min_delta_ms are treated as noise.
+    """
+    previous = {result.key: result for result in baseline}
+    regressions = []
+    for result in current:
+        before = previous.get(result.key)
+        if before is None:
+            continue
+        label = f"{result.operation} [{','.join(result.frameworks) or 'core'}] {result.user_role}"
+        if (result.wall_ms_median > before.wall_ms_median * (1 + tolerance)
+                and result.wall_ms_median - before.wall_ms_median > min_delta_ms):
+            regressions.append(f"{label}: median {before.wall_ms_median:.3f}ms → {result.wall_ms_median:.3f}ms")
+        if result.peak_alloc_kb > before.peak_alloc_kb * (1 + tolerance) and result.peak_alloc_kb - before.peak_alloc_kb > 1:
+            regressions.append(f"{label}: peak alloc {before.peak_alloc_kb:.1f}KB → {result.peak_alloc_kb:.1f}KB")
+        if result.output_tokens != before.output_tokens:
+            regressions.append(f"{label}: tokens {before.output_tokens} → {result.output_tokens}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the GRC audit prompt path")
+    parser.add_argument("--output", default="bench_results.json", help="Path for JSON results")
+    parser.add_argument("--runs", type=int, default=20, help="Timed runs per operation")
+    parser.add_argument("--max-set-size", type=int, default=None, help="Largest framework set to benchmark")
+    parser.add_argument("--baseline", default=None, help="Previous results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown vs baseline")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(runs=args.runs, max_set_size=args.max_set_size)
+    write_results(results, args.output)
+    print(f"{len(results)} benchmark results written to {args.output}")
+
+    if args.baseline:
+        regressions = compare_results(results, load_results(args.baseline), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION: {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,267 @@
+"""
+GRC AUDIT SYSTEM - COST GOVERNOR
+======================================================================
+Budget enforcement in front of LLMRouter: pre-call cost estimates are
+reserved against per-session, per-tenant and monthly limits; non-critical
+calls are downgraded to cheaper providers as limits approach, and calls
+that cannot fit any budget are refused
+"""
+
+from typing import Callable, Dict, List, Optional, Tuple
+from dataclasses import dataclass
+from datetime import datetime, timezone
+import itertools
+import threading
+
+from grc_audit_orchestration_context import ROLE_PINNED_PROVIDERS, LLMProvider, LLMRouter, UserRole
+
+
+Scope = Tuple[str, str]            # ("session", id) | ("tenant", id) | ("month", "YYYY-MM")
+
+
+class BudgetError(Exception):
+    """Base for cost governor errors (distinct from routing ValueErrors)"""
+
+
+class BudgetExceededError(BudgetError):
+    """No provider can serve the call within every applicable budget"""
+
+
+@dataclass
+class ScopeUsage:
+    """Spend against one budget scope"""
+    limit_usd: Optional[float]
+    spent_usd: float = 0.0
+    reserved_usd: float = 0.0      # Estimates of calls in flight
+
+    @property
+    def committed_usd(self) -> float:
+        return self.spent_usd + self.reserved_usd
+
+    @property
+    def utilization(self) -> float:
+        return self.committed_usd / self.limit_usd if self.limit_usd else 0.0
+
+
+@dataclass
+class Reservation:
+    """Budget held for one approved call; settle with commit() or release()"""
+    reservation_id: int
+    provider: LLMProvider
+    estimated_cost_usd: float
+    scopes: List[Scope]
+    requested_provider: LLMProvider            # Router choice before any downgrade
+    input_tokens: int
+    output_tokens: int
+    settled: bool = False
+
+    @property
+    def downgraded(self) -> bool:
+        return self.provider != self.requested_provider
+
+
+@dataclass
+class BudgetAlert:
+    """Raised via on_alert when a scope crosses alert_threshold or a single call exceeds single_call_alert_usd"""
+    scope: Scope
+    message: str
+    utilization: float = 0.0
+    cost_usd: float = 0.0
+
+
+class CostGovernor:
+    """
+    Thread-safe budget ledger for LLM calls routed by LLMRouter.
+
+    authorize() picks the router's provider, estimates cost with
+    LLMRouter.estimate_cost and reserves it in every applicable scope:
+    - utilization ≥ downgrade_threshold in any scope → non-critical calls move
+      one tier down, to the next cheaper compatible provider
+    - estimate does not fit a limit → cheaper providers are tried, next tier
+      first; if none fit, BudgetExceededError
+    Roles pinned by routing (ROLE_PINNED_PROVIDERS: board, auditor) are never
+    downgraded. commit() replaces the reservation with the actual cost and
+    reports it to router.track_usage; release() drops it (failed or
+    cancelled call).
+    """
+
+    def __init__(self,
+                 router: Optional[LLMRouter] = None,
+                 session_limit_usd: Optional[float] = None,
+                 tenant_limits_usd: Optional[Dict[str, float]] = None,
+                 default_tenant_limit_usd: Optional[float] = None,
+                 monthly_limit_usd: Optional[float] = None,
+                 downgrade_threshold: float = 0.8,
+                 alert_threshold: float = 0.9,
+                 single_call_alert_usd: Optional[float] = None,
+                 on_alert: Optional[Callable[[BudgetAlert], None]] = None,
+                 clock: Callable[[], datetime] = lambda: datetime.now(timezone.utc)):
+        self.router = router if router is not None else LLMRouter()
+        self.session_limit_usd = session_limit_usd
+        self.tenant_limits_usd = dict(tenant_limits_usd or {})
+        self.default_tenant_limit_usd = default_tenant_limit_usd
+        self.monthly_limit_usd = monthly_limit_usd
+        self.downgrade_threshold = downgrade_threshold
+        self.alert_threshold = alert_threshold
+        self.single_call_alert_usd = single_call_alert_usd
+        self.on_alert = on_alert
+        self._clock = clock
+        self._usage: Dict[Scope, ScopeUsage] = {}
+        self._alerted: set = set()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Scopes
+    # ------------------------------------------------------------------
+
+    def _scopes(self, session_id: Optional[str], tenant_id: Optional[str]) -> List[Scope]:
+        scopes: List[Scope] = [("month", self._clock().strftime("%Y-%m"))]
+        if tenant_id is not None:
+            scopes.append(("tenant", tenant_id))
+        if session_id is not None:
+            scopes.append(("session", session_id))
+        return scopes
+
+    def _limit(self, scope: Scope) -> Optional[float]:
+        kind, key = scope
+        if kind == "month":
+            return self.monthly_limit_usd
+        if kind == "tenant":
+            return self.tenant_limits_usd.get(key, self.default_tenant_limit_usd)
+        return self.session_limit_usd
+
+    def _scope_usage(self, scope: Scope) -> ScopeUsage:
+        usage = self._usage.get(scope)
+        if usage is None:
+            usage = self._usage[scope] = ScopeUsage(self._limit(scope))
+        return usage
+
+    def usage(self, scope: Scope) -> ScopeUsage:
+        """Current spend for a scope, e.g. ("tenant", "acme") or ("month", "2026-10")"""
+        with self._lock:
+            usage = self._scope_usage(scope)
+            return ScopeUsage(usage.limit_usd, usage.spent_usd, usage.reserved_usd)
+
+    def set_tenant_limit(self, tenant_id: str, limit_usd: Optional[float]):
+        with self._lock:
+            self.tenant_limits_usd[tenant_id] = limit_usd
+            if ("tenant", tenant_id) in self._usage:
+                self._usage[("tenant", tenant_id)].limit_usd = limit_usd
+
+    # ------------------------------------------------------------------
+    # Authorization
+    # ------------------------------------------------------------------
+
+    def _fits(self, scopes: List[Scope], cost: float) -> bool:
+        for scope in scopes:
+            usage = self._scope_usage(scope)
+            if usage.limit_usd is not None and usage.committed_usd + cost > usage.limit_usd:
+                return False
+        return True
+
+    def _cheaper_providers(self, input_tokens: int, output_tokens: int, cost: float) -> List[Tuple[float, LLMProvider]]:
+        """
+        Providers cheaper than cost whose context window fits and whose
+        circuit admits calls, next tier (most expensive) first
+        """
+        candidates = (
+            (self.router.estimate_cost(provider, input_tokens, output_tokens), provider)
+            for provider, cap in self.router.llm_capabilities.items()
+            if cap.context_window >= input_tokens and self.router.circuit_breakers[provider].is_available()
+        )
+        return sorted((c for c in candidates if c[0] < cost), key=lambda candidate: candidate[0], reverse=True)
+
+    def authorize(self,
+                  task_type: str,
+                  user_role: UserRole,
+                  input_tokens: int,
+                  output_tokens: int,
+                  session_id: Optional[str] = None,
+                  tenant_id: Optional[str] = None,
+                  priority: str = "balanced",
+                  critical: bool = False,
+                  provider: Optional[LLMProvider] = None) -> Reservation:
+        """
+        Choose a provider within budget and reserve its estimated cost.
+        critical=True (regulatory submissions, board reports) skips the soft
+        downgrade but is still refused when no provider fits a hard limit.
+        provider pins the call (ensemble member, continuation page): its cost
+        is reserved without routing or downgrade, or BudgetExceededError;
+        so are calls from roles in ROLE_PINNED_PROVIDERS.
+        """
+        pinned = provider is not None or user_role in ROLE_PINNED_PROVIDERS
+        requested = provider if provider is not None else self.router.select_llm(task_type, user_role, input_tokens, priority)
+        alerts: List[BudgetAlert] = []
+
+        with self._lock:
+            scopes = self._scopes(session_id, tenant_id)
+            provider = requested
+            cost = self.router.estimate_cost(provider, input_tokens, output_tokens)
+
+            near_limit = any(self._scope_usage(s).utilization >= self.downgrade_threshold for s in scopes)
+            if not pinned and ((near_limit and not critical) or not self._fits(scopes, cost)):
+                for candidate_cost, candidate in self._cheaper_providers(input_tokens, output_tokens, cost):
+                    if self._fits(scopes, candidate_cost):
+                        provider, cost = candidate, candidate_cost
+                        break
+
+            if not self._fits(scopes, cost):
+                exhausted = [s for s in scopes if not self._fits([s], cost)]
+                raise BudgetExceededError(
+                    f"Estimated ${cost:.4f} for '{task_type}' exceeds remaining budget in {exhausted}"
+                )
+
+            for scope in scopes:
+                usage = self._scope_usage(scope)
+                usage.reserved_usd += cost
+                if usage.limit_usd and usage.utilization >= self.alert_threshold and scope not in self._alerted:
+                    self._alerted.add(scope)
+                    alerts.append(BudgetAlert(scope, f"{scope[0]} budget {usage.utilization:.0%} committed", usage.utilization))
+
+            reservation = Reservation(
+                next(self._ids), provider, cost, scopes, requested, input_tokens, output_tokens
+            )
+
+        if self.single_call_alert_usd is not None and cost > self.single_call_alert_usd:
+            alerts.append(BudgetAlert(scopes[-1], f"Single call estimated at ${cost:.4f}", cost_usd=cost))
+        if self.on_alert is not None:
+            for alert in alerts:
+                self.on_alert(alert)
+        return reservation
+
+    def commit(self,
+               reservation: Reservation,
+               actual_cost_usd: Optional[float] = None,
+               provider: Optional[LLMProvider] = None):
+        """
+        Convert a reservation into spend (actual cost when known, else the
+        estimate) and add it to router.cost_tracker under provider (the one
+        that served the call after any failover; default reservation.provider)
+        """
+        cost = reservation.estimated_cost_usd if actual_cost_usd is None else actual_cost_usd
+        with self._lock:
+            if reservation.settled:
+                return
+            reservation.settled = True
+            for scope in reservation.scopes:
+                usage = self._scope_usage(scope)
+                usage.reserved_usd -= reservation.estimated_cost_usd
+                usage.spent_usd += cost
+        self.router.track_usage(provider if provider is not None else reservation.provider, cost, None)
+
+    def release(self, reservation: Reservation):
+        """Drop a reservation without spending it (call failed or was cancelled)"""
+        with self._lock:
+            if reservation.settled:
+                return
+            reservation.settled = True
+            for scope in reservation.scopes:
+                self._scope_usage(scope).reserved_usd -= reservation.estimated_cost_usd
+
+    def end_session(self, session_id: str) -> Optional[ScopeUsage]:
+        """Forget a finished session's ledger and alert state; returns its final usage"""
+        scope = ("session", session_id)
+        with self._lock:
+            self._alerted.discard(scope)
+            return self._usage.pop(scope, None)
@@ -0,0 +1,314 @@
+"""
+GRC AUDIT SYSTEM - CONCURRENT ENSEMBLE MODE
+======================================================================
+High-stakes outputs (board reports, regulatory submissions) generated
+independently by two or more LLMs at the same time, then compared on
+findings, ratings and citations. Disagreements are flagged for human
+review; wall time is one round trip instead of generate-then-validate
+"""
+
+from typing import Dict, List, Optional, Sequence, Set
+from dataclasses import dataclass, field
+from itertools import combinations
+import asyncio
+import json
+import re
+
+from grc_audit_orchestration_context import LLMProvider
+from grc_audit_llm_dispatch import LLMDispatcher, LLMRequest, LLMResponse
+
+
+# ENSEMBLE MODE pair from MULTI_LLM_ORCHESTRATION_MODULE
+DEFAULT_ENSEMBLE = (LLMProvider.CHATGPT_5, LLMProvider.CLAUDE_4_5)
+
+
+# ============================================================================
+# STRUCTURED OUTPUT
+# ============================================================================
+
+@dataclass
+class FindingRecord:
+    """One control assessment extracted from a model output"""
+    control_id: str
+    score: Optional[int] = None            # 0-3 control score
+    rating: Optional[str] = None           # "critical" | "high" | "medium" | "low"
+
+
+@dataclass
+class StructuredAuditOutput:
+    """Comparable view of one model output"""
+    findings: Dict[str, FindingRecord] = field(default_factory=dict)
+    citations: Set[str] = field(default_factory=set)
+
+
+_RATING_LEVELS = {"critical": 3, "c": 3, "high": 2, "h": 2, "medium": 1, "m": 1, "moderate": 1, "low": 0, "l": 0}
+_RATING_NAMES = {3: "critical", 2: "high", 1: "medium", 0: "low"}
+
+_CITATION_PATTERNS = [
+    re.compile(r"RBI/\d{4}-\d{2}/\d+"),
+    re.compile(r"ISO(?:/IEC)? \d{5}(?::\d{4})?(?: (?:Clause|Annex) [A-Z]?\d+(?:\.\d+)*)?"),
+    re.compile(r"§\s?\d+\.\d+(?:\([A-Za-z0-9]+\))*"),
+    re.compile(r"(?:PCI DSS (?:v4\.0 )?)?Requirement \d+(?:\.\d+)+"),
+    re.compile(r"SEBI CSCRF [A-Z]{1,2}\d+"),
+    re.compile(r"(?:DPDP Act|GDPR|Section|Article) \d+[A-Za-z]?(?:\(\d+\))*"),
+]
+_TABLE_ROW = re.compile(r"^\s*\|(.+)\|\s*$")
+
+
+def _normalize_rating(value: object) -> Optional[str]:
+    level = _RATING_LEVELS.get(str(value).strip().lower()) if value is not None else None
+    return _RATING_NAMES[level] if level is not None else None
+
+
+def _normalize_score(value: object) -> Optional[int]:
+    match = re.fullmatch(r"\s*([0-3])(?:\s*/\s*3)?\s*", str(value)) if value is not None else None
+    return int(match.group(1)) if match else None
+
+
+def extract_citations(text: str) -> Set[str]:
+    """Regulatory citations in text, whitespace-normalized"""
+    citations = set()
+    for pattern in _CITATION_PATTERNS:
+        citations.update(" ".join(match.split()) for match in pattern.findall(text))
+    return citations
+
+
+def _string_list(value: object) -> List[str]:
+    """value when it is a list of strings, else [] (model JSON is untrusted)"""
+    if isinstance(value, list) and all(isinstance(item, str) for item in value):
+        return value
+    return []
+
+
+def _parse_json(text: str) -> Optional[StructuredAuditOutput]:
+    """
+    Structured-output mode: {"findings": [{"control_id", "score", "risk_rating", "citations"}], "citations": [...]}
+    None when the JSON is missing or has another shape (no dict findings)
+    """
+    start, end = text.find("{"), text.rfind("}")
+    if start < 0 or end <= start:
+        return None
+    try:
+        document = json.loads(text[start:end + 1])
+    except ValueError:
+        return None
+    if not isinstance(document, dict) or not isinstance(document.get("findings"), list):
+        return None
+    items = [item for item in document["findings"] if isinstance(item, dict)]
+    if document["findings"] and not items:
+        return None
+
+    output = StructuredAuditOutput(citations=set(_string_list(document.get("citations"))))
+    for item in items:
+        control_id = str(item.get("control_id", "")).strip().upper()
+        if not control_id:
+            continue
+        output.findings[control_id] = FindingRecord(
+            control_id,
+            _normalize_score(item.get("score")),
+            _normalize_rating(item.get("risk_rating", item.get("rating", item.get("severity")))),
+        )
+        output.citations.update(_string_list(item.get("citations")))
+    return output
+
+
+def _parse_tables(text: str) -> StructuredAuditOutput:
+    """Markdown assessment tables as in REPORT_TEMPLATES_MODULE (Control ID / Finding # + Score / Risk Rating / Severity)"""
+    output = StructuredAuditOutput(citations=extract_citations(text))
+    columns: Optional[Dict[str, int]] = None
+    for line in text.splitlines():
+        match = _TABLE_ROW.match(line)
+        if not match:
+            columns = None
+            continue
+        cells = [cell.strip() for cell in match.group(1).split("|")]
+        if all(set(cell) <= set("-: ") for cell in cells):
+            continue  # Separator row
+        lowered = [cell.lower() for cell in cells]
+        if any(name in ("control id", "finding #", "control") for name in lowered):
+            columns = {}
+            for index, name in enumerate(lowered):
+                if name in ("control id", "finding #", "control"):
+                    columns["id"] = index
+                elif name.startswith("score"):
+                    columns["score"] = index
+                elif name in ("risk rating", "severity", "rating"):
+                    columns["rating"] = index
+            continue
+        if columns is None or "id" not in columns or columns["id"] >= len(cells):
+            continue
+        control_id = cells[columns["id"]].upper()
+        if not control_id or control_id == "...":
+            continue
+        output.findings[control_id] = FindingRecord(
+            control_id,
+            _normalize_score(cells[columns["score"]]) if "score" in columns and columns["score"] < len(cells) else None,
+            _normalize_rating(cells[columns["rating"]]) if "rating" in columns and columns["rating"] < len(cells) else None,
+        )
+    return output
+
+
+def parse_audit_output(text: str) -> StructuredAuditOutput:
+    """
+    JSON structured output when present and well-shaped, else markdown
+    assessment tables. Never raises on model output:
+
+    >>> parse_audit_output('{"findings": ["A1"]}').findings
+    {}
+    >>> sorted(parse_audit_output('{"findings": [{"control_id": "ac-1", "score": 2}], "citations": null}').findings)
+    ['AC-1']
+    >>> parse_audit_output('{"findings": [{"control_id": "AC-1", "citations": [{"id": "x"}]}], "citations": "GDPR"}').citations
+    set()
+    >>> parse_audit_output('{"findings": [], "citations": ["GDPR Article 32"]}').citations
+    {'GDPR Article 32'}
+    >>> parse_audit_output('{"findings": [1]}\\n| Control ID | Score |\\n|---|---|\\n| AC-2 | 1 |').findings["AC-2"].score
+    1
+    """
+    return _parse_json(text) or _parse_tables(text)
+
+
+# ============================================================================
+# AGREEMENT SCORING
+# ============================================================================
+
+@dataclass
+class Disagreement:
+    """One point on which ensemble members differ"""
+    kind: str                              # "finding" | "score" | "rating" | "citation" | "provider_failed"
+    subject: str                           # Control ID or citation
+    values: Dict[str, object]              # Provider value -> what it said (None = absent)
+    severe: bool = False                   # Rating/score two or more levels apart, or critical vs not
+
+
+@dataclass
+class AgreementReport:
+    """Agreement between ensemble outputs (1.0 = identical)"""
+    finding_agreement: float               # Jaccard over assessed control IDs
+    rating_agreement: float                # Share of common controls with matching score and rating
+    citation_agreement: float              # Jaccard over citations
+    disagreements: List[Disagreement]
+    needs_human_review: bool
+
+    @property
+    def overall(self) -> float:
+        return (self.finding_agreement + self.rating_agreement + self.citation_agreement) / 3
+
+
+def _jaccard(a: Set[str], b: Set[str]) -> float:
+    return len(a & b) / len(a | b) if a | b else 1.0
+
+
+def score_agreement(outputs: Dict[LLMProvider, StructuredAuditOutput],
+                    review_threshold: float = 0.8) -> AgreementReport:
+    """
+    Pairwise agreement averaged over ensemble members. Human review is
+    required when overall agreement < review_threshold or any severe
+    rating disagreement exists.
+    """
+    findings_scores, rating_scores, citation_scores = [], [], []
+    for a, b in combinations(outputs, 2):
+        fa, fb = outputs[a].findings, outputs[b].findings
+        findings_scores.append(_jaccard(set(fa), set(fb)))
+        common = set(fa) & set(fb)
+        if common:
+            matching = sum(1 for cid in common if fa[cid].score == fb[cid].score and fa[cid].rating == fb[cid].rating)
+            rating_scores.append(matching / len(common))
+        citation_scores.append(_jaccard(outputs[a].citations, outputs[b].citations))
+
+    disagreements: List[Disagreement] = []
+    all_controls = sorted(set().union(*(o.findings for o in outputs.values()))) if outputs else []
+    for control_id in all_controls:
+        records = {p.value: outputs[p].findings.get(control_id) for p in outputs}
+        if any(record is None for record in records.values()):
+            disagreements.append(Disagreement("finding", control_id, {p: r is not None for p, r in records.items()}))
+            continue
+        scores = {p: r.score for p, r in records.items()}
+        if len(set(scores.values())) > 1:
+            known = [s for s in scores.values() if s is not None]
+            disagreements.append(Disagreement(
+                "score", control_id, scores, severe=len(known) > 1 and max(known) - min(known) >= 2,
+            ))
+        ratings = {p: r.rating for p, r in records.items()}
+        if len(set(ratings.values())) > 1:
+            levels = [_RATING_LEVELS[r] for r in ratings.values() if r is not None]
+            severe = len(levels) > 1 and (max(levels) - min(levels) >= 2 or 3 in levels)
+            disagreements.append(Disagreement("rating", control_id, ratings, severe=severe))
+    all_citations = sorted(set().union(*(o.citations for o in outputs.values()))) if outputs else []
+    for citation in all_citations:
+        cited = {p.value: citation in outputs[p].citations for p in outputs}
+        if not all(cited.values()):
+            disagreements.append(Disagreement("citation", citation, cited))
+
+    mean = lambda values: sum(values) / len(values) if values else 1.0
+    report = AgreementReport(
+        finding_agreement=mean(findings_scores),
+        rating_agreement=mean(rating_scores),
+        citation_agreement=mean(citation_scores),
+        disagreements=disagreements,
+        needs_human_review=False,
+    )
+    report.needs_human_review = report.overall < review_threshold or any(d.severe for d in disagreements)
+    return report
+
+
+# ============================================================================
+# EXECUTOR
+# ============================================================================
+
+@dataclass
+class EnsembleResult:
+    """Outputs of every ensemble member plus their agreement"""
+    responses: Dict[LLMProvider, LLMResponse]
+    outputs: Dict[LLMProvider, StructuredAuditOutput]
+    agreement: AgreementReport
+    failures: Dict[LLMProvider, BaseException]
+
+    @property
+    def primary(self) -> Optional[LLMResponse]:
+        """First successful member in ensemble order (the draft to present)"""
+        return next(iter(self.responses.values()), None)
+
+
+class EnsembleExecutor:
+    """
+    Runs the same request on every ensemble provider concurrently through
+    LLMDispatcher (each provider pinned with failover disabled, so limits
+    and usage tracking apply and no member is answered by another model)
+    and scores agreement of the structured outputs.
+    A failed member counts as a severe disagreement: the result always goes
+    to human review rather than being presented as validated.
+    """
+
+    def __init__(self,
+                 dispatcher: LLMDispatcher,
+                 providers: Sequence[LLMProvider] = DEFAULT_ENSEMBLE,
+                 review_threshold: float = 0.8):
+        if len(providers) < 2:
+            raise ValueError("Ensemble needs at least two providers")
+        self.dispatcher = dispatcher
+        self.providers = list(providers)
+        self.review_threshold = review_threshold
+
+    async def run(self, request: LLMRequest, timeout_s: Optional[float] = None) -> EnsembleResult:
+        """Dispatch to every provider at once and compare the outputs"""
+        calls = [self.dispatcher.dispatch(request, provider=provider, failover=False) for provider in self.providers]
+        gathered = asyncio.gather(*calls, return_exceptions=True)
+        results = await (asyncio.wait_for(gathered, timeout_s) if timeout_s is not None else gathered)
+
+        responses: Dict[LLMProvider, LLMResponse] = {}
+        failures: Dict[LLMProvider, BaseException] = {}
+        for provider, result in zip(self.providers, results):
+            if isinstance(result, BaseException):
+                failures[provider] = result
+            else:
+                responses[provider] = result
+
+        outputs = {provider: parse_audit_output(response.text) for provider, response in responses.items()}
+        agreement = score_agreement(outputs, self.review_threshold)
+        for provider, error in failures.items():
+            agreement.disagreements.append(Disagreement(
+                "provider_failed", provider.value, {provider.value: str(error)}, severe=True,
+            ))
+        if failures or len(outputs) < 2:
+            agreement.needs_human_review = True
+        return EnsembleResult(responses, outputs, agreement, failures)
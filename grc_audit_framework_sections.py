@@ -0,0 +1,260 @@
+"""
+GRC AUDIT SYSTEM - SECTION-ADDRESSABLE FRAMEWORK MODULES
+======================================================================
+Parses framework module text into Domain → Control → Evidence trees,
+indexed by control ID, for control-level (Level 3) prompt assembly
+"""
+
+from typing import Dict, List, Optional, Tuple
+from dataclasses import dataclass, field
+import re
+
+
+# ============================================================================
+# SECTION TREE
+# ============================================================================
+
+@dataclass
+class ControlSection:
+    """A single auditable control (e.g. SEBI W1, PCI 8.4.2, HIPAA AS-9)"""
+    control_id: str
+    title: str
+    text: str                      # Control text as it appears in the module
+    evidence: List[str] = field(default_factory=list)
+    inline: bool = False           # One-line bullet control; evidence lives on the domain
+
+
+@dataclass
+class DomainSection:
+    """A domain / requirement / safeguard heading and the controls under it"""
+    title: str
+    text: str
+    controls: List[ControlSection] = field(default_factory=list)
+    evidence: List[str] = field(default_factory=list)
+
+
+@dataclass
+class FrameworkSections:
+    """Addressable tree for one framework module"""
+    framework: str
+    title: str                     # "[MODULE B1 — SEBI CSCRF AUDIT ENGINE]"
+    preamble: str                  # Text before the first domain heading
+    domains: List[DomainSection] = field(default_factory=list)
+    control_index: Dict[str, Tuple[int, int]] = field(default_factory=dict)  # ID -> (domain, control)
+
+    def control(self, control_id: str) -> Optional[ControlSection]:
+        """Look up a control by ID ("W1", "SEBI W1", "Requirement 8.4.2", "AS-9")"""
+        position = self.control_index.get(normalize_control_id(control_id))
+        if position is None:
+            return None
+        return self.domains[position[0]].controls[position[1]]
+
+    def domain_of(self, control_id: str) -> Optional[DomainSection]:
+        """Domain containing a control"""
+        position = self.control_index.get(normalize_control_id(control_id))
+        return self.domains[position[0]] if position is not None else None
+
+    def control_ids(self) -> List[str]:
+        """All indexed control IDs in module order"""
+        return list(self.control_index)
+
+    def control_evidence(self, control_id: str) -> List[str]:
+        """
+        Evidence items to append after a control's text: its own items that the
+        text does not already quote, or, for one-line controls, the items of the
+        domain-level list that name that control.
+        """
+        control = self.control(control_id)
+        if control is None:
+            raise ValueError(f"Unknown control '{control_id}' for framework '{self.framework}'")
+        if control.inline and not control.evidence:
+            domain = self.domain_of(control_id)
+            titles = [other.title for other in domain.controls if other.inline]
+            evidence = _matching_evidence(control.title, titles, domain.evidence)
+        else:
+            evidence = control.evidence
+        return [item for item in evidence if f"- {item}" not in control.text]
+
+    def control_context(self, control_id: str) -> str:
+        """
+        Minimal framework text needed to audit one control:
+        module title, domain heading, control text and its evidence list.
+        """
+        evidence = self.control_evidence(control_id)
+        control = self.control(control_id)
+        lines = [self.title, "", self.domain_of(control_id).title, control.text]
+        if evidence:
+            lines += ["", "Evidence Required:"] + [f"- {item}" for item in evidence]
+        return "\n".join(lines)
+
+
+# ============================================================================
+# PARSER
+# ============================================================================
+
+# "- A1: ...", "AC-1: ...", "8.4.2: ...", "8.6.1-8.6.3: ...", "§164.308(a)(1)(ii)(A): ..."
+_CONTROL_PATTERN = re.compile(
+    r"^(?P<bullet>-\s+)?(?P<id>§[\d.]+(?:\([A-Za-z0-9]+\))*|[A-Z]{1,3}-?\d+(?:\.\d+)*|\d+\.\d+(?:\.\d+)*(?:-\d+\.\d+(?:\.\d+)*)?)\s*:\s*(?P<title>.+)$"
+)
+# "DOMAIN 2: WITHSTAND", "REQUIREMENT 8: ..."
+_KEYWORD_DOMAIN_PATTERN = re.compile(r"^(?:DOMAIN|REQUIREMENT) \d+:.*$")
+# "1. ACCESS TO PROGRAMS AND DATA", "4. SYSTEM SOFTWARE (Infrastructure Controls)"
+_NUMBERED_DOMAIN_PATTERN = re.compile(r"^\d+\.\s+[A-Z][A-Z0-9 &/'\-]+(?:\s*\(.*\))?$")
+# Column-0 all-caps headings: "ADMINISTRATIVE SAFEGUARDS (§164.308)", "APPLICABILITY:"
+_CAPS_HEADING_PATTERN = re.compile(r"^[A-Z][A-Z0-9 &/'\-.,]*[A-Z)](?:\s*\(.*\))?:?$")
+# Column-0 callouts inside a control, not section headings
+_CALLOUT_HEADINGS = {"RED FLAG", "CRITICAL", "NOTE", "WARNING", "IMPORTANT", "EXAMPLE"}
+_EVIDENCE_PATTERN = re.compile(r"^(?:Evidence Required|Audit Evidence)\b[^:]*:$")
+_MODULE_TITLE_PATTERN = re.compile(r"^\[MODULE .+\]$")
+
+_ID_PREFIXES = re.compile(r"^(?:REQUIREMENT|REQ\.?|CONTROL)\s+")
+
+
+def normalize_control_id(control_id: str) -> str:
+    """Canonical control ID: upper case, keyword and framework prefixes dropped"""
+    cid = _ID_PREFIXES.sub("", control_id.strip().upper())
+    return cid.split()[-1] if cid else cid
+
+
+_WORD_PATTERN = re.compile(r"[A-Za-z]+")
+_CAPITALIZED_RUN_PATTERN = re.compile(r"(?:[A-Z][a-z]+\s+)+[A-Z][a-z]+")
+# Words too generic to tie an evidence item to a control ("logs (last 90 days)")
+_STOP_WORDS = {"and", "for", "all", "the", "with", "per", "over", "within", "last", "from",
+               "day", "month", "rule", "log", "report", "document", "test"}
+
+
+def _keywords(text: str) -> set:
+    """Lower-case word stems plus initialisms of capitalized runs ("Incident Response" -> "ir")"""
+    words = set()
+    for word in _WORD_PATTERN.findall(text):
+        if len(word) < 3 and not word.isupper():
+            continue
+        word = word.lower()
+        for suffix in ("ing", "ed", "s"):
+            if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+                word = word[:-len(suffix)]
+                break
+        if word not in _STOP_WORDS:
+            words.add(word[:6])
+    for run in _CAPITALIZED_RUN_PATTERN.findall(text):
+        initials = "".join(word[0] for word in run.split()).lower()
+        words.update(initials[:length] for length in range(2, len(initials) + 1))
+    return words
+
+
+def _matching_evidence(title: str, titles: List[str], evidence: List[str]) -> List[str]:
+    """
+    Items of a domain-level evidence list that best match one control title
+    (e.g. SEBI W3 "Endpoint Security (EDR ...)" -> "EDR console screenshot ..."),
+    skipping items that match another control of the domain (titles) better
+    """
+    def score(control_title: str, item: str) -> int:
+        return len(_keywords(control_title) & _keywords(item))
+
+    scores = [score(title, item) for item in evidence]
+    best = max(scores, default=0)
+    return [
+        item for item, item_score in zip(evidence, scores)
+        if best and item_score == best and all(score(other, item) <= item_score for other in titles)
+    ]
+
+
+def _control_level(control_id: str) -> int:
+    """§ citations nest under the AS-/PS-/TS- control that precedes them"""
+    return 2 if control_id.startswith("§") else 1
+
+
+def _is_domain_heading(line: str) -> bool:
+    indent = len(line) - len(line.lstrip(" "))
+    stripped = line.strip()
+    if indent > 3 or not stripped:
+        return False
+    if _KEYWORD_DOMAIN_PATTERN.match(stripped) or _NUMBERED_DOMAIN_PATTERN.match(stripped):
+        return True
+    if stripped.rstrip(":") in _CALLOUT_HEADINGS:
+        return False
+    return indent == 0 and len(stripped) >= 4 and bool(_CAPS_HEADING_PATTERN.match(stripped))
+
+
+def parse_framework_sections(framework: str, text: str) -> FrameworkSections:
+    """Parse a get_*_module() string into an addressable section tree"""
+    lines = text.strip("\n").splitlines()
+
+    title = ""
+    if lines and _MODULE_TITLE_PATTERN.match(lines[0].strip()):
+        title = lines[0].strip()
+        lines = lines[1:]
+
+    # Pass 1: classify heading lines
+    domain_starts: List[int] = []
+    controls: List[Tuple[int, re.Match]] = []  # (line number, match)
+    for number, line in enumerate(lines):
+        match = _CONTROL_PATTERN.match(line.strip())
+        if match:
+            controls.append((number, match))
+        elif _is_domain_heading(line):
+            domain_starts.append(number)
+
+    sections = FrameworkSections(
+        framework=framework,
+        title=title,
+        preamble="\n".join(lines[:domain_starts[0]] if domain_starts else lines).strip("\n"),
+    )
+    if not domain_starts:
+        return sections
+
+    domain_bounds = list(zip(domain_starts, domain_starts[1:] + [len(lines)]))
+    for domain_start, domain_end in domain_bounds:
+        domain = DomainSection(
+            title=lines[domain_start].strip(),
+            text="\n".join(lines[domain_start:domain_end]).strip("\n"),
+        )
+        domain_controls = [(n, m) for n, m in controls if domain_start < n < domain_end]
+
+        # Pass 2: control spans (block controls run until the next control at the same or higher level)
+        for position, (number, match) in enumerate(domain_controls):
+            control_id = match.group("id")
+            inline = bool(match.group("bullet"))
+            end = number + 1
+            if not inline:
+                level = _control_level(control_id)
+                end = domain_end
+                for next_number, next_match in domain_controls[position + 1:]:
+                    if _control_level(next_match.group("id")) <= level or next_match.group("bullet"):
+                        end = next_number
+                        break
+            domain.controls.append(ControlSection(
+                control_id=control_id,
+                title=match.group("title").strip(),
+                text="\n".join(lines[number:end]).rstrip(),
+                inline=inline,
+            ))
+
+        # Pass 3: evidence lists belong to the innermost enclosing block control, else the domain
+        number = domain_start + 1
+        while number < domain_end:
+            if _EVIDENCE_PATTERN.match(lines[number].strip()):
+                items = []
+                item_line = number + 1
+                while item_line < domain_end and lines[item_line].strip().startswith("- "):
+                    items.append(lines[item_line].strip()[2:])
+                    item_line += 1
+                owner = None
+                for control_number, control in zip((n for n, _ in domain_controls), domain.controls):
+                    if control_number < number and not control.inline:
+                        owner = control
+                if owner is not None:
+                    owner.evidence.extend(items)
+                else:
+                    domain.evidence.extend(items)
+                number = item_line
+            else:
+                number += 1
+
+        domain_index = len(sections.domains)
+        sections.domains.append(domain)
+        for control_index, control in enumerate(domain.controls):
+            # First occurrence wins (e.g. summary tables that repeat an ID later)
+            sections.control_index.setdefault(normalize_control_id(control.control_id), (domain_index, control_index))
+
+    return sections
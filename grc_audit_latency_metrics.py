@@ -0,0 +1,204 @@
+"""
+GRC AUDIT SYSTEM - LATENCY HISTOGRAMS
+======================================================================
+Fixed-memory, log-bucketed latency histograms for LLM calls, keyed by
+provider, task type and user role. O(1) record, mergeable snapshots
+that can be exported from worker processes and combined centrally
+"""
+
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+import math
+import threading
+
+
+HISTOGRAM_SNAPSHOT_VERSION = 1
+DEFAULT_PERCENTILES = (0.50, 0.90, 0.99)
+
+
+def percentile(values: Sequence[float], fraction: float) -> float:
+    """Exact nearest-rank quantile of a small sample (use LatencyHistogram for streams)"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+class LatencyHistogram:
+    """
+    Log-bucketed histogram with bounded relative error.
+    Bucket i covers (min_ms·γ^(i-1), min_ms·γ^i] with γ = (1+e)/(1-e), so
+    any reported percentile is within relative_error of a recorded value.
+    Values outside [min_ms, max_ms] are clamped to the first / last bucket
+    (exact min and max are kept separately).
+    """
+
+    def __init__(self,
+                 relative_error: float = 0.01,
+                 min_ms: float = 1.0,
+                 max_ms: float = 3_600_000.0):
+        if not 0 < relative_error < 1:
+            raise ValueError("relative_error must be in (0, 1)")
+        if not 0 < min_ms < max_ms:
+            raise ValueError("Require 0 < min_ms < max_ms")
+        self.relative_error = relative_error
+        self.min_ms = min_ms
+        self.max_ms = max_ms
+        self._gamma = (1 + relative_error) / (1 - relative_error)
+        self._log_gamma = math.log(self._gamma)
+        self.counts = [0] * (self._index(max_ms) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.min_seen = math.inf
+        self.max_seen = 0.0
+
+    @property
+    def config(self) -> Tuple[float, float, float]:
+        return (self.relative_error, self.min_ms, self.max_ms)
+
+    def _index(self, value_ms: float) -> int:
+        if value_ms <= self.min_ms:
+            return 0
+        return math.ceil(math.log(value_ms / self.min_ms) / self._log_gamma)
+
+    def _bucket_value(self, index: int) -> float:
+        """Representative value of a bucket (relative error ≤ relative_error)"""
+        if index == 0:
+            return self.min_ms
+        return self.min_ms * self._gamma ** index * 2 / (self._gamma + 1)
+
+    def record(self, value_ms: float, count: int = 1):
+        """Add count observations of value_ms"""
+        index = min(self._index(value_ms), len(self.counts) - 1)
+        self.counts[index] += count
+        self.count += count
+        self.total_ms += value_ms * count
+        self.min_seen = min(self.min_seen, value_ms)
+        self.max_seen = max(self.max_seen, value_ms)
+
+    def percentile(self, fraction: float) -> float:
+        """Value at quantile fraction (0..1); 0.0 when empty"""
+        if not self.count:
+            return 0.0
+        rank = fraction * (self.count - 1)
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen > rank:
+                # Never report outside the observed range
+                return min(max(self._bucket_value(index), self.min_seen), self.max_seen)
+        return self.max_seen
+
+    def percentiles(self, fractions: Iterable[float] = DEFAULT_PERCENTILES) -> Dict[str, float]:
+        """{"p50": ..., "p90": ..., "p99": ...}"""
+        return {f"p{fraction * 100:g}": self.percentile(fraction) for fraction in fractions}
+
+    @property
+    def mean_ms(self) -> float:
+        return self.total_ms / self.count if self.count else 0.0
+
+    def merge(self, other: "LatencyHistogram"):
+        """Add another histogram's observations (bucket configs must match)"""
+        if other.config != self.config:
+            raise ValueError(f"Cannot merge histograms with different configs {other.config} != {self.config}")
+        for index, bucket_count in enumerate(other.counts):
+            if bucket_count:
+                self.counts[index] += bucket_count
+        self.count += other.count
+        self.total_ms += other.total_ms
+        self.min_seen = min(self.min_seen, other.min_seen)
+        self.max_seen = max(self.max_seen, other.max_seen)
+
+    def snapshot(self) -> Dict:
+        """JSON-serializable state (sparse bucket counts)"""
+        return {
+            "relative_error": self.relative_error,
+            "min_ms": self.min_ms,
+            "max_ms": self.max_ms,
+            "count": self.count,
+            "total_ms": self.total_ms,
+            "min_seen": self.min_seen if self.count else None,
+            "max_seen": self.max_seen,
+            "buckets": {str(index): n for index, n in enumerate(self.counts) if n},
+        }
+
+    @classmethod
+    def from_snapshot(cls, snapshot: Dict) -> "LatencyHistogram":
+        histogram = cls(snapshot["relative_error"], snapshot["min_ms"], snapshot["max_ms"])
+        for index, n in snapshot["buckets"].items():
+            histogram.counts[int(index)] = n
+        histogram.count = snapshot["count"]
+        histogram.total_ms = snapshot["total_ms"]
+        histogram.min_seen = snapshot["min_seen"] if snapshot["min_seen"] is not None else math.inf
+        histogram.max_seen = snapshot["max_seen"]
+        return histogram
+
+
+class LatencyRecorder:
+    """
+    One LatencyHistogram per (dimension, key), where dimension is
+    "provider", "task_type" or "role". Memory is bounded by the number of
+    distinct keys, not by the number of calls.
+    """
+
+    DIMENSIONS = ("provider", "task_type", "role")
+
+    def __init__(self, relative_error: float = 0.01, min_ms: float = 1.0, max_ms: float = 3_600_000.0):
+        self._config = (relative_error, min_ms, max_ms)
+        self._histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def _histogram(self, dimension: str, key: str) -> LatencyHistogram:
+        histogram = self._histograms.get((dimension, key))
+        if histogram is None:
+            histogram = self._histograms[(dimension, key)] = LatencyHistogram(*self._config)
+        return histogram
+
+    def record(self,
+               latency_ms: float,
+               provider: Optional[str] = None,
+               task_type: Optional[str] = None,
+               role: Optional[str] = None):
+        """Record one call under each dimension that is given"""
+        with self._lock:
+            for dimension, key in zip(self.DIMENSIONS, (provider, task_type, role)):
+                if key is not None:
+                    self._histogram(dimension, key).record(latency_ms)
+
+    def histogram(self, dimension: str, key: str) -> Optional[LatencyHistogram]:
+        """Histogram for e.g. ("provider", "gemini_3"); None if nothing recorded"""
+        return self._histograms.get((dimension, key))
+
+    def keys(self, dimension: str) -> list:
+        """Recorded keys for a dimension"""
+        return [key for dim, key in self._histograms if dim == dimension]
+
+    def percentiles(self,
+                    dimension: str,
+                    key: str,
+                    fractions: Iterable[float] = DEFAULT_PERCENTILES) -> Dict[str, float]:
+        """Percentiles for one key ({} if nothing recorded)"""
+        with self._lock:
+            histogram = self._histograms.get((dimension, key))
+            return histogram.percentiles(fractions) if histogram is not None else {}
+
+    def snapshot(self) -> Dict:
+        """Exportable state of every histogram (JSON-serializable)"""
+        with self._lock:
+            return {
+                "version": HISTOGRAM_SNAPSHOT_VERSION,
+                "histograms": {
+                    dimension: {key: h.snapshot() for (dim, key), h in self._histograms.items() if dim == dimension}
+                    for dimension in self.DIMENSIONS
+                },
+            }
+
+    def merge_snapshot(self, snapshot: Dict):
+        """Merge a snapshot exported by another recorder (e.g. another worker process)"""
+        if snapshot.get("version") != HISTOGRAM_SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported histogram snapshot version {snapshot.get('version')}")
+        with self._lock:
+            for dimension, histograms in snapshot["histograms"].items():
+                for key, state in histograms.items():
+                    self._histogram(dimension, key).merge(LatencyHistogram.from_snapshot(state))
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
@@ -0,0 +1,738 @@
+"""
+GRC AUDIT SYSTEM - ASYNC LLM DISPATCH
+======================================================================
+Execution path behind LLMRouter: per-provider connection pools,
+concurrency limits, requests-per-minute and tokens-per-minute token
+buckets, cancellable calls, and a local mock provider for offline
+load testing of routing + dispatch
+"""
+
+from typing import Any, AsyncIterator, Dict, Iterable, Optional, Tuple, Union
+from abc import ABC, abstractmethod
+from contextlib import aclosing, asynccontextmanager
+from dataclasses import asdict, dataclass, field, replace
+import asyncio
+import random
+import time
+
+from grc_audit_orchestration_context import (
+    LLMProvider, LLMRouter, TokenCounter, UserRole
+)
+from grc_audit_prompt_rope import PromptRope
+from grc_audit_latency_metrics import LatencyRecorder
+from grc_audit_provider_registry import default_registry
+from grc_audit_response_cache import ResponseCache, response_cache_key
+
+
+# ============================================================================
+# REQUESTS / RESPONSES
+# ============================================================================
+
+@dataclass
+class LLMRequest:
+    """One model call"""
+    prompt: Union[str, PromptRope]          # System prompt (flat or rope)
+    user_message: str = ""
+    max_output_tokens: int = 4000
+    task_type: str = "general"
+    user_role: UserRole = UserRole.DEFAULT
+    priority: str = "balanced"              # See LLMRouter.select_llm
+    hedge: bool = False                     # Fire the failover provider if no first token by primary p95
+    cacheable: bool = True                  # Eligible for the dispatcher's ResponseCache
+    module_hashes: Dict[str, str] = field(default_factory=dict)  # Framework -> module content hash in prompt
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class LLMResponse:
+    """Result of one dispatched call"""
+    provider: LLMProvider
+    text: str
+    input_tokens: int
+    output_tokens: int
+    latency_ms: float
+    cost_usd: float
+    ttft_ms: Optional[float] = None         # Time to first token, when the client reports it
+    failover_from: Optional[LLMProvider] = None  # Primary that failed or lost a hedge race
+    cached: bool = False                    # Served from ResponseCache (no provider call)
+    finish_reason: str = "stop"             # "stop" | "length" (hit max_output_tokens)
+
+    def to_dict(self) -> Dict:
+        record = asdict(self)
+        record["provider"] = self.provider.value
+        record["failover_from"] = self.failover_from.value if self.failover_from is not None else None
+        return record
+
+    @classmethod
+    def from_dict(cls, record: Dict) -> "LLMResponse":
+        record = dict(record)
+        record["provider"] = LLMProvider(record["provider"])
+        if record.get("failover_from") is not None:
+            record["failover_from"] = LLMProvider(record["failover_from"])
+        return cls(**record)
+
+
+@dataclass
+class StreamChunk:
+    """One streamed text delta; the last chunk of a stream carries the LLMResponse"""
+    text: str
+    response: Optional[LLMResponse] = None
+
+
+class ProviderError(RuntimeError):
+    """Provider call failed (rate limit, timeout, 5xx)"""
+
+    def __init__(self, provider: LLMProvider, message: str, retryable: bool = True):
+        super().__init__(f"{provider.value}: {message}")
+        self.provider = provider
+        self.retryable = retryable
+
+
+# ============================================================================
+# PROVIDER CLIENTS
+# ============================================================================
+
+class ProviderClient(ABC):
+    """
+    Adapter for one provider API. connect() opens a connection (HTTP session,
+    socket) that the dispatcher pools; complete() runs one call on it and
+    stream() runs it incrementally.
+    """
+
+    provider: LLMProvider
+    model_version: str = "unversioned"      # Part of the response-cache key
+
+    async def connect(self) -> Any:
+        return None
+
+    async def disconnect(self, connection: Any):
+        pass
+
+    @abstractmethod
+    async def complete(self,
+                       connection: Any,
+                       request: LLMRequest,
+                       input_tokens: int,
+                       first_token: Optional[asyncio.Event] = None) -> LLMResponse:
+        """Run one call; set first_token (if given) when the first output token arrives"""
+
+    async def stream(self,
+                     connection: Any,
+                     request: LLMRequest,
+                     input_tokens: int) -> AsyncIterator[StreamChunk]:
+        """
+        Text deltas as they arrive, then a final StreamChunk whose response
+        holds usage and finish_reason. Default: complete() as one delta.
+        """
+        response = await self.complete(connection, request, input_tokens)
+        if response.text:
+            yield StreamChunk(response.text)
+        yield StreamChunk("", replace(response, text=""))
+
+
+class MockProvider(ProviderClient):
+    """
+    Local stand-in provider: latency drawn from a lognormal around
+    LLMCapabilities.latency_ms, output streamed at tokens_per_second, and
+    an optional failure rate. Deterministic with a seed.
+    """
+
+    model_version = "mock-1"
+
+    def __init__(self,
+                 provider: LLMProvider,
+                 latency_ms: Optional[float] = None,
+                 jitter: float = 0.3,
+                 tokens_per_second: float = 2000.0,
+                 failure_rate: float = 0.0,
+                 time_scale: float = 1.0,
+                 seed: Optional[int] = None,
+                 output_fraction: Tuple[float, float] = (0.2, 0.6)):
+        self.provider = provider
+        self.latency_ms = latency_ms if latency_ms is not None else default_registry().capabilities[provider].latency_ms
+        self.jitter = jitter
+        self.tokens_per_second = tokens_per_second
+        self.failure_rate = failure_rate
+        self.time_scale = time_scale       # < 1 runs load tests faster than real time
+        self.output_fraction = output_fraction  # Of max_output_tokens; >= 1 always ends with "length"
+        self._random = random.Random(seed)
+        self.connections_opened = 0
+
+    async def connect(self) -> Any:
+        self.connections_opened += 1
+        return {"id": self.connections_opened}
+
+    async def complete(self,
+                       connection: Any,
+                       request: LLMRequest,
+                       input_tokens: int,
+                       first_token: Optional[asyncio.Event] = None) -> LLMResponse:
+        start = time.perf_counter()
+        output_tokens = await self._first_token(request)
+        ttft_ms = (time.perf_counter() - start) * 1000
+        if first_token is not None:
+            first_token.set()
+        await asyncio.sleep(output_tokens / self.tokens_per_second * self.time_scale)
+        return self._response(request, input_tokens, output_tokens,
+                              f"[{self.provider.value} mock] {request.task_type}: {output_tokens} tokens",
+                              start, ttft_ms)
+
+    async def stream(self,
+                     connection: Any,
+                     request: LLMRequest,
+                     input_tokens: int) -> AsyncIterator[StreamChunk]:
+        """Numbered lines of 12 one-token words, 48 tokens per delta"""
+        start = time.perf_counter()
+        output_tokens = await self._first_token(request)
+        ttft_ms = (time.perf_counter() - start) * 1000
+        for offset in range(0, output_tokens, 48):
+            count = min(48, output_tokens - offset)
+            words = [f"w{offset + i}" + ("\n" if (offset + i) % 12 == 11 else " ") for i in range(count)]
+            yield StreamChunk("".join(words))
+            await asyncio.sleep(count / self.tokens_per_second * self.time_scale)
+        yield StreamChunk("", self._response(request, input_tokens, output_tokens, "", start, ttft_ms))
+
+    async def _first_token(self, request: LLMRequest) -> int:
+        """Wait out time to first token (or fail); returns the output length to generate"""
+        low, high = self.output_fraction
+        output_tokens = max(1, min(request.max_output_tokens, int(self._random.uniform(low, high) * request.max_output_tokens)))
+        ttft_ms = self.latency_ms * self._random.lognormvariate(0, self.jitter)
+        await asyncio.sleep(ttft_ms / 1000 * self.time_scale)
+        if self._random.random() < self.failure_rate:
+            raise ProviderError(self.provider, "simulated 503")
+        return output_tokens
+
+    def _response(self, request: LLMRequest, input_tokens: int, output_tokens: int, text: str,
+                  start: float, ttft_ms: float) -> LLMResponse:
+        return LLMResponse(
+            provider=self.provider,
+            text=text,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            latency_ms=(time.perf_counter() - start) * 1000,
+            cost_usd=0.0,
+            ttft_ms=ttft_ms,
+            finish_reason="length" if output_tokens >= request.max_output_tokens else "stop",
+        )
+
+
+class SelfHostedCPUProvider(MockProvider):
+    """
+    Stand-in for an open-weight model (e.g. Llama 4) served on CPU:
+    time to first token grows with prompt length (prefill_tps) and output
+    is slow (decode_tps); no per-call API cost.
+    """
+
+    model_version = "self-hosted-cpu-q4"
+
+    def __init__(self,
+                 provider: LLMProvider,
+                 prefill_tps: float = 150.0,
+                 decode_tps: float = 12.0,
+                 **mock_options):
+        mock_options.setdefault("latency_ms", 50.0)
+        mock_options.setdefault("jitter", 0.1)
+        super().__init__(provider, tokens_per_second=decode_tps, **mock_options)
+        self.prefill_tps = prefill_tps
+
+    async def complete(self,
+                       connection: Any,
+                       request: LLMRequest,
+                       input_tokens: int,
+                       first_token: Optional[asyncio.Event] = None) -> LLMResponse:
+        await asyncio.sleep(input_tokens / self.prefill_tps * self.time_scale)  # Prompt prefill
+        return await super().complete(connection, request, input_tokens, first_token)
+
+    async def stream(self,
+                     connection: Any,
+                     request: LLMRequest,
+                     input_tokens: int) -> AsyncIterator[StreamChunk]:
+        await asyncio.sleep(input_tokens / self.prefill_tps * self.time_scale)
+        async for chunk in super().stream(connection, request, input_tokens):
+            yield chunk
+
+
+# ============================================================================
+# LIMITS
+# ============================================================================
+
+@dataclass
+class ProviderLimits:
+    """Per-provider dispatch limits"""
+    max_concurrency: int = 8
+    pool_size: int = 8
+    requests_per_minute: Optional[float] = None
+    tokens_per_minute: Optional[float] = None
+
+
+class TokenBucket:
+    """Async token bucket refilled continuously at rate_per_minute up to capacity"""
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate_per_second = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate_per_second)
+        self._updated = now
+
+    @property
+    def available(self) -> float:
+        self._refill()
+        return self._tokens
+
+    async def acquire(self, amount: float = 1.0):
+        """Wait until amount tokens are available and take them (FIFO via lock)"""
+        amount = min(amount, self.capacity)  # Oversized requests wait for a full bucket
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+                await asyncio.sleep((amount - self._tokens) / self.rate_per_second)
+
+
+_REOPEN = object()  # Pool slot whose connection was discarded
+
+
+class ConnectionPool:
+    """Bounded pool of provider connections, opened lazily"""
+
+    def __init__(self, client: ProviderClient, size: int):
+        self.client = client
+        self.size = size
+        self._idle: asyncio.Queue = asyncio.Queue()
+        self._opened = 0
+
+    async def acquire(self) -> Any:
+        if self._idle.empty() and self._opened < self.size:
+            self._opened += 1
+            connection = _REOPEN
+        else:
+            connection = await self._idle.get()
+        if connection is _REOPEN:
+            try:
+                return await self.client.connect()
+            except BaseException:
+                self._idle.put_nowait(_REOPEN)
+                raise
+        return connection
+
+    def release(self, connection: Any):
+        self._idle.put_nowait(connection)
+
+    async def discard(self, connection: Any):
+        """Drop a broken connection; the next acquirer opens a replacement"""
+        self._idle.put_nowait(_REOPEN)
+        await self.client.disconnect(connection)
+
+    async def close(self):
+        while not self._idle.empty():
+            connection = self._idle.get_nowait()
+            if connection is not _REOPEN:
+                await self.client.disconnect(connection)
+        self._opened = 0
+
+
+class _ProviderLane:
+    """Pool, semaphore and rate buckets for one provider"""
+
+    def __init__(self, client: ProviderClient, limits: ProviderLimits):
+        self.client = client
+        self.limits = limits
+        self.pool = ConnectionPool(client, limits.pool_size)
+        self.semaphore = asyncio.Semaphore(limits.max_concurrency)
+        self.requests = TokenBucket(limits.requests_per_minute) if limits.requests_per_minute else None
+        self.tokens = TokenBucket(limits.tokens_per_minute) if limits.tokens_per_minute else None
+        self.in_flight = 0
+
+
+# ============================================================================
+# DISPATCHER
+# ============================================================================
+
+class LLMDispatcher:
+    """
+    Routes a request with LLMRouter and executes it on the chosen provider
+    within that provider's concurrency and rate limits.
+    Completed calls are reported to router.track_usage, and cost to an
+    optional CostGovernor (reserved before the call, settled after).
+    Cancelling the awaiting task (or the Task from submit()) aborts the call
+    and returns its connection, semaphore slot and budget reservation.
+    
+    Every outcome feeds the router's circuit breakers. A retryable
+    ProviderError is retried once on the next available provider of the
+    failover chain. Hedged requests (request.hedge, or a role in hedge_roles)
+    also start the failover provider when the primary has produced no first
+    token by its p95 time to first token; the first success wins.
+    dispatch_stream() streams one call through the same limits.
+    """
+
+    def __init__(self,
+                 clients: Dict[LLMProvider, ProviderClient],
+                 router: Optional[LLMRouter] = None,
+                 limits: Optional[Dict[LLMProvider, ProviderLimits]] = None,
+                 token_counter: Optional[TokenCounter] = None,
+                 governor=None,
+                 hedge_roles: Iterable[UserRole] = (),
+                 hedge_min_samples: int = 20,
+                 response_cache: Optional[ResponseCache] = None):
+        self.router = router if router is not None else LLMRouter()
+        self.token_counter = token_counter if token_counter is not None else TokenCounter(approximate=True)
+        self.governor = governor  # Optional grc_audit_cost_governor.CostGovernor
+        self.hedge_roles = frozenset(hedge_roles)
+        self.hedge_min_samples = hedge_min_samples
+        self.ttft_tracker = LatencyRecorder()
+        self.response_cache = response_cache
+        limits = limits or {}
+        self._clients = dict(clients)
+        self._limits = {provider: limits.get(provider, ProviderLimits()) for provider in self._clients}
+        self._lanes: Dict[LLMProvider, _ProviderLane] = {}
+
+    def _lane(self, provider: LLMProvider) -> _ProviderLane:
+        # Created on first use so asyncio primitives bind to the running loop
+        lane = self._lanes.get(provider)
+        if lane is None:
+            if provider not in self._clients:
+                raise ProviderError(provider, "no client configured", retryable=False)
+            lane = self._lanes[provider] = _ProviderLane(self._clients[provider], self._limits[provider])
+        return lane
+
+    def count_input_tokens(self, request: LLMRequest) -> int:
+        prompt = request.prompt
+        if isinstance(prompt, PromptRope):
+            prompt_tokens = sum(self.token_counter.count(chunk) for chunk in prompt.iter_chunks())
+        else:
+            prompt_tokens = self.token_counter.count(prompt)
+        return prompt_tokens + self.token_counter.count(request.user_message)
+
+    async def dispatch(self,
+                       request: LLMRequest,
+                       provider: Optional[LLMProvider] = None,
+                       session_id: Optional[str] = None,
+                       tenant_id: Optional[str] = None,
+                       failover: bool = True) -> LLMResponse:
+        """
+        Route (unless provider is given) and execute one call.
+        failover=False runs on exactly that provider (no failover, no hedge)
+        and raises its error instead. With a governor, pinned calls are
+        authorized and committed against the budget too. Response-cache hits
+        are free: they are looked up before the governor is consulted.
+        """
+        input_tokens = self.count_input_tokens(request)
+        cacheable = self.response_cache is not None and request.cacheable
+        routed = provider
+        if routed is None and (cacheable or self.governor is None):
+            routed = self.router.select_llm(request.task_type, request.user_role, input_tokens, request.priority)
+        if cacheable:
+            cached = await self._cached_response(routed, request)
+            if cached is not None:
+                return cached
+
+        reservation = None
+        if self.governor is not None:
+            reservation = self.governor.authorize(
+                request.task_type, request.user_role, input_tokens, request.max_output_tokens,
+                session_id=session_id, tenant_id=tenant_id, priority=request.priority, provider=provider,
+            )
+            provider = reservation.provider
+        else:
+            provider = routed
+
+        try:
+            if not failover:
+                response = await self._call(provider, request, input_tokens)
+            elif request.hedge or request.user_role in self.hedge_roles:
+                response = await self._hedged(provider, request, input_tokens)
+            else:
+                response = await self._with_failover(provider, request, input_tokens)
+        except BaseException:
+            if reservation is not None:
+                self.governor.release(reservation)
+            raise
+
+        response.cost_usd = self.router.estimate_cost(response.provider, response.input_tokens, response.output_tokens)
+        if reservation is not None:
+            self.governor.commit(reservation, response.cost_usd, response.provider)
+        self.router.track_usage(  # With a governor, commit() has already reported the cost
+            response.provider, 0.0 if reservation is not None else response.cost_usd, response.latency_ms,
+            request.task_type, request.user_role,
+        )
+        if cacheable:
+            await asyncio.to_thread(
+                self.response_cache.put,
+                self._cache_key(response.provider, request), response.provider, request.task_type,
+                response.to_dict(), request.module_hashes,
+            )
+        return response
+
+    def _cache_key(self, provider: LLMProvider, request: LLMRequest) -> str:
+        client = self._clients.get(provider)
+        return response_cache_key(
+            provider, client.model_version if client is not None else ProviderClient.model_version, request.prompt,
+            {"user_message": request.user_message, "max_output_tokens": request.max_output_tokens},
+        )
+
+    async def _cached_response(self, provider: LLMProvider, request: LLMRequest) -> Optional[LLMResponse]:
+        """Cache hit for provider, reported to track_usage at zero cost (sqlite read off the event loop)"""
+        if self.response_cache is None or not request.cacheable:
+            return None
+        start = time.perf_counter()
+        record = await asyncio.to_thread(self.response_cache.get, self._cache_key(provider, request))
+        if record is None:
+            return None
+        response = LLMResponse.from_dict(record)
+        response.cached = True
+        response.cost_usd = 0.0
+        response.latency_ms = (time.perf_counter() - start) * 1000
+        self.router.track_usage(provider, 0.0, response.latency_ms, request.task_type, request.user_role, cached=True)
+        return response
+
+    def _failover_provider(self, primary: LLMProvider, input_tokens: int) -> Optional[LLMProvider]:
+        try:
+            return self.router.available_llm(primary, input_tokens, exclude=(primary,))
+        except ValueError:
+            return None
+
+    async def _with_failover(self, provider: LLMProvider, request: LLMRequest, input_tokens: int) -> LLMResponse:
+        try:
+            return await self._call(provider, request, input_tokens)
+        except ProviderError as error:
+            return await self._fail_over(provider, error, request, input_tokens)
+
+    async def _fail_over(self, primary: LLMProvider, error: ProviderError,
+                         request: LLMRequest, input_tokens: int) -> LLMResponse:
+        """Retry a failed call once on the next available provider of the failover chain"""
+        fallback = self._failover_provider(primary, input_tokens) if error.retryable else None
+        if fallback is None:
+            raise error
+        response = await self._call(fallback, request, input_tokens)
+        response.failover_from = primary
+        return response
+
+    def hedge_delay_ms(self, provider: LLMProvider) -> float:
+        """Primary's p95 time to first token (smoothed p95 latency until enough TTFT samples)"""
+        histogram = self.ttft_tracker.histogram("provider", provider.value)
+        if histogram is not None and histogram.count >= self.hedge_min_samples:
+            return histogram.percentile(0.95)
+        return self.router.latency_model.estimate(provider).p95_ms
+
+    async def _hedged(self, primary: LLMProvider, request: LLMRequest, input_tokens: int) -> LLMResponse:
+        first_token = asyncio.Event()
+        primary_task = asyncio.ensure_future(self._call(primary, request, input_tokens, first_token))
+        first_token_wait = asyncio.ensure_future(first_token.wait())
+        tasks = {primary_task: primary}
+        try:
+            await asyncio.wait({primary_task, first_token_wait},
+                               timeout=self.hedge_delay_ms(primary) / 1000,
+                               return_when=asyncio.FIRST_COMPLETED)
+            secondary = None
+            if not first_token.is_set() and not primary_task.done():
+                secondary = self._failover_provider(primary, input_tokens)
+            if secondary is None:
+                try:
+                    return await primary_task
+                except ProviderError as error:
+                    return await self._fail_over(primary, error, request, input_tokens)
+            tasks[asyncio.ensure_future(self._call(secondary, request, input_tokens))] = secondary
+
+            failures = []
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        response = task.result()
+                        if tasks[task] != primary:
+                            response.failover_from = primary
+                        return response
+                    failures.append(task.exception())
+            raise failures[0]
+        finally:
+            first_token_wait.cancel()
+            for task in tasks:
+                task.cancel()  # Losers (and everything, if the caller was cancelled)
+
+    def _claim(self, provider: LLMProvider):
+        """Admission through the provider's breaker (claims the half-open probe slot)"""
+        if not self.router.circuit_breakers[provider].allow_request():
+            raise ProviderError(provider, "circuit open")
+
+    async def _call(self,
+                    provider: LLMProvider,
+                    request: LLMRequest,
+                    input_tokens: int,
+                    first_token: Optional[asyncio.Event] = None) -> LLMResponse:
+        """_execute plus circuit-breaker and time-to-first-token bookkeeping"""
+        self._claim(provider)
+        try:
+            response = await self._execute(provider, request, input_tokens, first_token)
+        except asyncio.CancelledError:
+            self.router.circuit_breakers[provider].release_probe()
+            raise
+        except Exception:
+            self.router.record_outcome(provider, success=False)
+            raise
+        self.router.record_outcome(provider, success=True)
+        if response.ttft_ms is not None:
+            self.ttft_tracker.record(response.ttft_ms, provider=provider.value)
+        return response
+
+    @asynccontextmanager
+    async def _connection(self, provider: LLMProvider, request: LLMRequest, input_tokens: int):
+        """Concurrency slot, RPM/TPM tokens and a pooled connection for one call"""
+        lane = self._lane(provider)
+        async with lane.semaphore:
+            if lane.requests is not None:
+                await lane.requests.acquire(1)
+            if lane.tokens is not None:
+                await lane.tokens.acquire(input_tokens + request.max_output_tokens)
+            connection = await lane.pool.acquire()
+            lane.in_flight += 1
+            try:
+                yield lane.client, connection
+            except BaseException:
+                # Connection state is unknown after a cancelled or failed call
+                await lane.pool.discard(connection)
+                raise
+            else:
+                lane.pool.release(connection)
+            finally:
+                lane.in_flight -= 1
+
+    async def _execute(self,
+                       provider: LLMProvider,
+                       request: LLMRequest,
+                       input_tokens: int,
+                       first_token: Optional[asyncio.Event] = None) -> LLMResponse:
+        async with self._connection(provider, request, input_tokens) as (client, connection):
+            return await client.complete(connection, request, input_tokens, first_token)
+
+    async def _stream_call(self,
+                           provider: LLMProvider,
+                           request: LLMRequest,
+                           input_tokens: int) -> AsyncIterator[StreamChunk]:
+        """Streaming counterpart of _call"""
+        self._claim(provider)
+        try:
+            async with self._connection(provider, request, input_tokens) as (client, connection):
+                async with aclosing(client.stream(connection, request, input_tokens)) as chunks:
+                    async for chunk in chunks:
+                        yield chunk
+        except (asyncio.CancelledError, GeneratorExit):
+            self.router.circuit_breakers[provider].release_probe()
+            raise
+        except Exception:
+            self.router.record_outcome(provider, success=False)
+            raise
+        self.router.record_outcome(provider, success=True)
+
+    async def dispatch_stream(self,
+                              request: LLMRequest,
+                              provider: Optional[LLMProvider] = None,
+                              session_id: Optional[str] = None,
+                              tenant_id: Optional[str] = None,
+                              failover: bool = True) -> AsyncIterator[StreamChunk]:
+        """
+        Route (unless provider is given) and stream one call: text deltas,
+        then a final StreamChunk carrying the LLMResponse (usage, cost,
+        finish_reason; its text is empty). Fails over like dispatch() only
+        before any text has been yielded; no hedging or response cache.
+        failover=False streams from exactly that provider and raises its error.
+        """
+        input_tokens = self.count_input_tokens(request)
+        reservation = None
+        if self.governor is not None:
+            reservation = self.governor.authorize(
+                request.task_type, request.user_role, input_tokens, request.max_output_tokens,
+                session_id=session_id, tenant_id=tenant_id, priority=request.priority, provider=provider,
+            )
+            provider = reservation.provider
+        elif provider is None:
+            provider = self.router.select_llm(request.task_type, request.user_role, input_tokens, request.priority)
+
+        primary = provider
+        response = None
+        try:
+            while response is None:
+                emitted = False
+                try:
+                    async with aclosing(self._stream_call(provider, request, input_tokens)) as chunks:
+                        async for chunk in chunks:
+                            if chunk.response is not None:
+                                response = chunk.response
+                            elif chunk.text:
+                                emitted = True
+                                yield chunk
+                except ProviderError as error:
+                    fallback = None
+                    if failover and not emitted and provider == primary and error.retryable:
+                        fallback = self._failover_provider(primary, input_tokens)
+                    if fallback is None:
+                        raise
+                    provider = fallback
+                else:
+                    if response is None:
+                        raise ProviderError(provider, "stream ended without a final response", retryable=False)
+        except BaseException:
+            if reservation is not None:
+                self.governor.release(reservation)
+            raise
+
+        if provider != primary:
+            response.failover_from = primary
+        response.cost_usd = self.router.estimate_cost(response.provider, response.input_tokens, response.output_tokens)
+        if reservation is not None:
+            self.governor.commit(reservation, response.cost_usd, response.provider)
+        self.router.track_usage(  # With a governor, commit() has already reported the cost
+            response.provider, 0.0 if reservation is not None else response.cost_usd, response.latency_ms,
+            request.task_type, request.user_role,
+        )
+        if response.ttft_ms is not None:
+            self.ttft_tracker.record(response.ttft_ms, provider=response.provider.value)
+        yield StreamChunk("", response)
+
+    def submit(self, request: LLMRequest, **kwargs) -> "asyncio.Task[LLMResponse]":
+        """Schedule dispatch() as a Task; task.cancel() aborts the call"""
+        return asyncio.get_running_loop().create_task(self.dispatch(request, **kwargs))
+
+    def in_flight(self) -> Dict[LLMProvider, int]:
+        """Calls currently executing per provider"""
+        return {provider: lane.in_flight for provider, lane in self._lanes.items()}
+
+    async def aclose(self):
+        """Close pooled connections"""
+        for lane in self._lanes.values():
+            await lane.pool.close()
+        self._lanes.clear()
+
+
+def mock_dispatcher(router: Optional[LLMRouter] = None,
+                    limits: Optional[Dict[LLMProvider, ProviderLimits]] = None,
+                    time_scale: float = 1.0,
+                    seed: Optional[int] = None,
+                    hedge_roles: Iterable[UserRole] = (),
+                    **mock_options) -> LLMDispatcher:
+    """
+    Dispatcher with a MockProvider for every routable provider (offline load
+    tests); providers deployed as "self_hosted_cpu" in the router's capability
+    registry get a SelfHostedCPUProvider (same mock_options, own decode speed).
+    """
+    router = router if router is not None else LLMRouter()
+    registry = router.capability_registry
+    latency_ms = mock_options.pop("latency_ms", None)
+    clients: Dict[LLMProvider, ProviderClient] = {}
+    for index, (provider, cap) in enumerate(router.llm_capabilities.items()):
+        provider_seed = None if seed is None else seed + index
+        if registry.deployment(provider) == "self_hosted_cpu":
+            clients[provider] = SelfHostedCPUProvider(provider, time_scale=time_scale, seed=provider_seed,
+                                                      **{k: v for k, v in mock_options.items() if k != "tokens_per_second"})
+        else:
+            clients[provider] = MockProvider(provider, latency_ms=cap.latency_ms if latency_ms is None else latency_ms,
+                                             time_scale=time_scale, seed=provider_seed, **mock_options)
+    return LLMDispatcher(clients, router=router, limits=limits, hedge_roles=hedge_roles)
@@ -0,0 +1,385 @@
+"""
+GRC AUDIT SYSTEM - MAP-REDUCE LONG-CONTEXT ENGINE
+======================================================================
+Long-document analysis (full SOC 2 reports, 100-page policies) beyond
+any single model's window: the document is split into overlapping,
+section-aligned chunks analysed in parallel on cheaper providers, then
+partial findings are merged by a hierarchical reduce
+"""
+
+from typing import Dict, List, Optional, Sequence, Set, Tuple, Union
+from dataclasses import dataclass, field
+import asyncio
+import re
+
+from grc_audit_orchestration_context import LLMProvider, TokenCounter, UserRole
+from grc_audit_prompt_rope import PromptRope
+from grc_audit_llm_dispatch import LLMDispatcher, LLMRequest, LLMResponse
+from grc_audit_ensemble import FindingRecord, StructuredAuditOutput, parse_audit_output
+
+
+# ============================================================================
+# CHUNKING
+# ============================================================================
+
+# Lines that start a section: markdown headings, "4.2 Title", "7. Title" (short line only, so
+# "2024 Annual results show ..." stays body text), "Section 7", "CC6.1 ...", "Annex A"
+_SECTION_HEADING = re.compile(
+    r"^(?:#{1,6}\s+\S"
+    r"|\d+(?:\.\d+)+\.?\s+[A-Z]"
+    r"|\d{1,2}\.?\s+[A-Z][^\n]{0,60}(?<![.,;:])$"
+    r"|(?:Section|Article|Clause|Annex|Appendix|Chapter|Part)\s+[A-Z0-9]"
+    r"|[A-Z]{1,4}\d+(?:\.\d+)+\s+\S)"
+)
+# Split points that keep the separator on the preceding part
+_SPLIT_AFTER = {"\n\n": re.compile(r"(?<=\n\n)"), "\n": re.compile(r"(?<=\n)")}
+
+
+@dataclass
+class DocumentChunk:
+    """One map unit: whole sections plus read-only overlap from the previous chunk"""
+    index: int
+    text: str
+    headings: List[str]                    # Section headings whose text is in this chunk
+    tokens: int
+    overlap_text: str = ""                 # Tail of the previous chunk, for continuity only
+
+
+def split_sections(document: str) -> List[Tuple[str, str]]:
+    """(heading, text) per section; text before the first heading gets heading ""."""
+    sections: List[Tuple[str, str]] = []
+    heading, lines = "", []
+    for line in document.splitlines(keepends=True):
+        if _SECTION_HEADING.match(line):
+            if any(l.strip() for l in lines):
+                sections.append((heading, "".join(lines)))
+                lines = []
+            heading = line.strip()
+        lines.append(line)
+    if any(l.strip() for l in lines):
+        sections.append((heading, "".join(lines)))
+    return sections
+
+
+def _split_oversized(text: str, limit: int, counter: TokenCounter) -> List[str]:
+    """Split text over limit tokens on paragraphs, then lines, then characters"""
+    if counter.count(text) <= limit:
+        return [text]
+    for separator in ("\n\n", "\n"):
+        # Every part is strictly shorter than text, so each level makes progress
+        parts = [p for p in _SPLIT_AFTER[separator].split(text) if p]
+        if len(parts) > 1:
+            pieces, current = [], ""
+            for part in parts:
+                if current and counter.count(current + part) > limit:
+                    pieces.append(current)
+                    current = ""
+                current += part
+            if current:
+                pieces.append(current)
+            return [piece for p in pieces for piece in _split_oversized(p, limit, counter)]
+    # One unbroken line: cut proportionally to the token overshoot
+    cut = max(1, len(text) * limit // counter.count(text))
+    return [text[:cut]] + _split_oversized(text[cut:], limit, counter)
+
+
+def _tail(text: str, max_tokens: int, counter: TokenCounter) -> str:
+    """
+    End of text within max_tokens: trailing whole paragraphs, else whole
+    lines, else trailing characters (whole units are used only when they
+    fill at least half of max_tokens)
+    """
+    text = text.rstrip("\n")
+    for separator in ("\n\n", "\n"):
+        tail = ""
+        for part in reversed(text.split(separator)):
+            candidate = part + separator + tail if tail else part
+            if counter.count(candidate) > max_tokens:
+                break
+            tail = candidate
+        if tail.strip() and counter.count(tail) * 2 >= max_tokens:
+            return tail
+    total = counter.count(text)
+    if not total or not max_tokens:
+        return ""
+    chars = len(text) * max_tokens // total
+    while chars and counter.count(text[-chars:]) > max_tokens:
+        chars = chars * 9 // 10
+    return text[-chars:] if chars else ""
+
+
+def chunk_document(document: str,
+                   chunk_tokens: int = 40000,
+                   overlap_tokens: int = 2000,
+                   counter: Optional[TokenCounter] = None) -> List[DocumentChunk]:
+    """
+    Pack whole sections into chunks of at most chunk_tokens (sections
+    larger than that are split on paragraph boundaries). Each chunk after
+    the first carries up to overlap_tokens of the previous chunk's tail.
+    """
+    if overlap_tokens >= chunk_tokens:
+        raise ValueError("overlap_tokens must be smaller than chunk_tokens")
+    counter = counter if counter is not None else TokenCounter(approximate=True)
+    body_limit = chunk_tokens - overlap_tokens
+    document = document.replace("\r\n", "\n").replace("\r", "\n")
+
+    units: List[Tuple[str, str, int]] = []  # (heading, text, tokens)
+    for heading, text in split_sections(document):
+        for piece in _split_oversized(text, body_limit, counter):
+            units.append((heading, piece, counter.count(piece)))
+
+    chunks: List[DocumentChunk] = []
+    texts: List[str] = []
+    headings: List[str] = []
+    tokens = 0
+
+    def close():
+        text = "".join(texts)
+        overlap = _tail(chunks[-1].text, overlap_tokens, counter) if chunks and overlap_tokens else ""
+        chunks.append(DocumentChunk(len(chunks), text, list(headings), tokens, overlap))
+
+    for heading, text, unit_tokens in units:
+        if texts and tokens + unit_tokens > body_limit:
+            close()
+            texts, headings, tokens = [], [], 0
+        texts.append(text)
+        if heading and heading not in headings:
+            headings.append(heading)
+        tokens += unit_tokens
+    if texts:
+        close()
+    return chunks
+
+
+# ============================================================================
+# MERGING
+# ============================================================================
+
+_RATING_ORDER = {"low": 0, "medium": 1, "high": 2, "critical": 3}
+
+
+def merge_structured(outputs: Sequence[StructuredAuditOutput]) -> StructuredAuditOutput:
+    """
+    Union of findings across partial outputs; a control seen in several
+    chunks keeps its most severe rating and lowest score
+    """
+    merged = StructuredAuditOutput()
+    for output in outputs:
+        merged.citations |= output.citations
+        for control_id, record in output.findings.items():
+            current = merged.findings.get(control_id)
+            if current is None:
+                merged.findings[control_id] = FindingRecord(control_id, record.score, record.rating)
+                continue
+            if record.score is not None and (current.score is None or record.score < current.score):
+                current.score = record.score
+            if record.rating is not None and (
+                    current.rating is None or _RATING_ORDER[record.rating] > _RATING_ORDER[current.rating]):
+                current.rating = record.rating
+    return merged
+
+
+MAP_INSTRUCTION = """You are analysing part {part} of {parts} of one document ({headings}).
+{task}
+Report only findings supported by the DOCUMENT PART below; other parts are analysed separately.
+Respond with JSON: {{"findings": [{{"control_id": ..., "score": 0-3, "risk_rating": "critical|high|medium|low", "summary": ..., "citations": [...], "section": ...}}], "citations": [...]}}
+"""
+
+REDUCE_INSTRUCTION = """Merge the partial analyses below, each covering consecutive parts of one document, into one analysis.
+{task}
+Deduplicate findings by control_id, keep the most severe risk_rating and lowest score for a control, and keep every citation and section reference.
+{missing}Respond with the same JSON format.
+"""
+
+
+# ============================================================================
+# ENGINE
+# ============================================================================
+
+@dataclass
+class LongContextResult:
+    """Outcome of a map-reduce run"""
+    chunks: List[DocumentChunk]
+    map_responses: Dict[int, LLMResponse] = field(default_factory=dict)
+    reduce_responses: List[List[LLMResponse]] = field(default_factory=list)  # One list per reduce level
+    failures: Dict[int, BaseException] = field(default_factory=dict)       # Chunk index -> error
+    final: Optional[LLMResponse] = None
+    findings: StructuredAuditOutput = field(default_factory=StructuredAuditOutput)  # Merged map findings
+    dropped_controls: Set[str] = field(default_factory=set)  # In map findings but missing from the final output
+    reduce_error: Optional[BaseException] = None  # A reduce call failed: final is None, map results are kept
+
+    @property
+    def complete(self) -> bool:
+        return not self.failures and self.reduce_error is None
+
+    @property
+    def total_cost_usd(self) -> float:
+        responses = list(self.map_responses.values()) + [r for level in self.reduce_responses for r in level]
+        return sum(response.cost_usd for response in responses)
+
+
+class LongContextEngine:
+    """
+    Map: every chunk is dispatched concurrently, round-robin over
+    map_providers (or routed by the dispatcher with priority "cost").
+    Reduce: partial outputs are grouped up to reduce_input_tokens / fan_in
+    per call and merged level by level until one output remains.
+    A failed chunk does not abort the run: the reduce is told which
+    sections are missing and the result is marked incomplete. A failed
+    reduce call keeps every map result and merged findings, with final
+    None and the error in reduce_error. Reduce groups are also sized so the
+    prompt, instruction and output fit the reduce provider's context window.
+    """
+
+    def __init__(self,
+                 dispatcher: LLMDispatcher,
+                 map_providers: Optional[Sequence[LLMProvider]] = None,
+                 reduce_provider: Optional[LLMProvider] = None,
+                 chunk_tokens: int = 40000,
+                 overlap_tokens: int = 2000,
+                 map_output_tokens: int = 2000,
+                 reduce_input_tokens: int = 40000,
+                 reduce_output_tokens: int = 4000,
+                 fan_in: int = 8):
+        if fan_in < 2:
+            raise ValueError("fan_in must be at least 2")
+        self.dispatcher = dispatcher
+        self.map_providers = list(map_providers or [])
+        self.reduce_provider = reduce_provider
+        self.chunk_tokens = chunk_tokens
+        self.overlap_tokens = overlap_tokens
+        self.map_output_tokens = map_output_tokens
+        self.reduce_input_tokens = reduce_input_tokens
+        self.reduce_output_tokens = reduce_output_tokens
+        self.fan_in = fan_in
+        router = dispatcher.router
+        for provider in self.map_providers:
+            window = router.llm_capabilities[provider].context_window
+            if window < chunk_tokens + overlap_tokens + map_output_tokens:
+                raise ValueError(f"{provider.value} context window {window} too small for chunk_tokens {chunk_tokens}")
+
+    def _request(self, prompt, message: str, max_output_tokens: int, task_type: str, user_role: UserRole,
+                 stage: str, part: int) -> LLMRequest:
+        return LLMRequest(
+            prompt=prompt, user_message=message, max_output_tokens=max_output_tokens,
+            task_type=task_type, user_role=user_role, priority="cost",
+            metadata={"long_context_stage": stage, "part": part},
+        )
+
+    def _reduce_budget(self, overhead_request: LLMRequest) -> int:
+        """Partial-text tokens per reduce call: reduce_input_tokens, capped by what the window leaves"""
+        capabilities = self.dispatcher.router.llm_capabilities
+        if self.reduce_provider is not None:
+            window = capabilities[self.reduce_provider].context_window
+        else:
+            window = max(cap.context_window for cap in capabilities.values())  # Routing falls back to a larger window
+        overhead = self.dispatcher.count_input_tokens(overhead_request) + self.reduce_output_tokens
+        return min(self.reduce_input_tokens, window - overhead)
+
+    def _reduce_groups(self, texts: List[str], budget: int) -> List[List[str]]:
+        counter = self.dispatcher.token_counter
+        groups: List[List[str]] = []
+        current: List[str] = []
+        tokens = 0
+        for text in texts:
+            text_tokens = counter.count(text) + 8  # + "PARTIAL ANALYSIS n:" label
+            # At least two per group, so every level shrinks
+            full = len(current) >= self.fan_in or (len(current) >= 2 and tokens + text_tokens > budget)
+            if full:
+                groups.append(current)
+                current, tokens = [], 0
+            current.append(text)
+            tokens += text_tokens
+        if current:
+            groups.append(current)
+        return groups
+
+    async def run(self,
+                  document: str,
+                  task: str,
+                  prompt: Union[str, PromptRope] = "",
+                  task_type: str = "long_document_analysis",
+                  user_role: UserRole = UserRole.DEFAULT) -> LongContextResult:
+        """
+        Analyse document with task (e.g. "Assess SOC 2 CC6 logical access
+        controls"); prompt is the shared system prompt for every call.
+        Raises the first error if every chunk fails.
+        """
+        chunks = chunk_document(document, self.chunk_tokens, self.overlap_tokens, self.dispatcher.token_counter)
+        result = LongContextResult(chunks)
+        if not chunks:
+            raise ValueError("Document is empty")
+
+        async def map_chunk(chunk: DocumentChunk) -> LLMResponse:
+            message = MAP_INSTRUCTION.format(
+                part=chunk.index + 1, parts=len(chunks),
+                headings=", ".join(chunk.headings[:3]) + (" ..." if len(chunk.headings) > 3 else "") or "untitled",
+                task=task,
+            )
+            if chunk.overlap_text:
+                message += f"\nPRECEDING CONTEXT (from part {chunk.index}, already analysed):\n{chunk.overlap_text}\n"
+            message += f"\nDOCUMENT PART:\n{chunk.text}"
+            provider = self.map_providers[chunk.index % len(self.map_providers)] if self.map_providers else None
+            request = self._request(prompt, message, self.map_output_tokens, task_type, user_role, "map", chunk.index)
+            return await self.dispatcher.dispatch(request, provider=provider)
+
+        mapped = await asyncio.gather(*(map_chunk(chunk) for chunk in chunks), return_exceptions=True)
+        for chunk, outcome in zip(chunks, mapped):
+            if isinstance(outcome, BaseException):
+                if not isinstance(outcome, Exception):
+                    raise outcome  # Cancellation
+                result.failures[chunk.index] = outcome
+            else:
+                result.map_responses[chunk.index] = outcome
+        if not result.map_responses:
+            raise next(iter(result.failures.values()))
+
+        ordered = [result.map_responses[index] for index in sorted(result.map_responses)]
+        result.findings = merge_structured([parse_audit_output(response.text) for response in ordered])
+        if len(chunks) == 1:
+            result.final = ordered[0]
+            return result
+
+        missing = ""
+        if result.failures:
+            lost = [h for index in sorted(result.failures) for h in chunks[index].headings] or ["unknown"]
+            missing = f"Sections not analysed (state this as a scope limitation): {', '.join(lost)}.\n"
+
+        instruction = REDUCE_INSTRUCTION.format(task=task, missing=missing)
+        budget = self._reduce_budget(
+            self._request(prompt, instruction, self.reduce_output_tokens, task_type, user_role, "reduce", 0)
+        )
+        texts = [response.text for response in ordered]
+        level = 0
+        while True:
+            groups = self._reduce_groups(texts, budget)
+            requests = [
+                self._request(
+                    prompt,
+                    instruction + "".join(f"\nPARTIAL ANALYSIS {i + 1}:\n{text}\n" for i, text in enumerate(group)),
+                    self.reduce_output_tokens, task_type, user_role, f"reduce_{level}", index,
+                )
+                for index, group in enumerate(groups)
+            ]
+            outcomes = await asyncio.gather(
+                *(self.dispatcher.dispatch(request, provider=self.reduce_provider) for request in requests),
+                return_exceptions=True,
+            )
+            responses = [outcome for outcome in outcomes if not isinstance(outcome, BaseException)]
+            result.reduce_responses.append(responses)  # Paid calls stay in total_cost_usd
+            errors = [outcome for outcome in outcomes if isinstance(outcome, BaseException)]
+            for error in errors:
+                if not isinstance(error, Exception):
+                    raise error  # Cancellation
+            if errors:
+                result.reduce_error = errors[0]
+                return result
+            if len(responses) == 1:
+                break
+            texts = [response.text for response in responses]
+            level += 1
+
+        result.final = result.reduce_responses[-1][0]
+        result.dropped_controls = set(result.findings.findings) - set(parse_audit_output(result.final.text).findings)
+        return result
+
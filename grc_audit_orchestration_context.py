@@ -4,10 +4,29 @@ GRC AUDIT SYSTEM - MULTI-LLM ORCHESTRATION & CONTEXT MANAGEMENT (Part 6)
 Dynamic Prompt Assembly, Token Management, LLM Routing for ChatGPT-5, Gemini-3, Claude-4.5, DeepSeek
 """
 
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterator, List, Optional, Any, Tuple, Union
+from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from enum import Enum
+from collections import OrderedDict
+import hashlib
+import importlib
 import json
+import re
+import sys
+import threading
+import time
+
+try:
+    import tiktoken  # Optional: exact BPE counts for OpenAI-family encodings
+except ImportError:
+    tiktoken = None
+
+from grc_audit_system_prompt import CORE_SYSTEM_IDENTITY, VIBE_DIRECTIVES, DO_NOT_TOUCH_CONSTRAINTS
+from grc_audit_framework_sections import FrameworkSections, normalize_control_id, parse_framework_sections
+from grc_audit_prompt_compression import CompressionReport, deduplicate_modules, format_glossary, normalize_whitespace
+from grc_audit_prompt_rope import PromptRope
+from grc_audit_latency_metrics import LatencyHistogram, LatencyRecorder
 
 
 # ============================================================================
@@ -49,57 +68,14 @@ class LLMCapabilities:
     strengths: List[str]              # What this LLM is best at
 
 
-# LLM Capability Matrix
-LLM_CAPABILITIES = {
-    LLMProvider.CHATGPT_5: LLMCapabilities(
-        provider=LLMProvider.CHATGPT_5,
-        context_window=200000,  # 200K tokens (example)
-        supports_structured_output=True,
-        supports_function_calling=True,
-        supports_vision=True,
-        supports_code_execution=True,
-        latency_ms=800,
-        cost_per_1k_tokens_input=0.03,
-        cost_per_1k_tokens_output=0.06,
-        strengths=["Complex reasoning", "Multi-step tasks", "Code generation", "Structured output"]
-    ),
-    LLMProvider.GEMINI_3: LLMCapabilities(
-        provider=LLMProvider.GEMINI_3,
-        context_window=1000000,  # 1M tokens (example)
-        supports_structured_output=True,
-        supports_function_calling=True,
-        supports_vision=True,
-        supports_code_execution=True,
-        latency_ms=600,
-        cost_per_1k_tokens_input=0.02,
-        cost_per_1k_tokens_output=0.04,
-        strengths=["Long context", "Fast inference", "Multimodal", "Low cost"]
-    ),
-    LLMProvider.CLAUDE_4_5: LLMCapabilities(
-        provider=LLMProvider.CLAUDE_4_5,
-        context_window=200000,
-        supports_structured_output=True,
-        supports_function_calling=True,
-        supports_vision=True,
-        supports_code_execution=False,
-        latency_ms=700,
-        cost_per_1k_tokens_input=0.025,
-        cost_per_1k_tokens_output=0.05,
-        strengths=["Safety", "Instruction following", "Long-form writing", "Analysis"]
-    ),
-    LLMProvider.DEEPSEEK_V3: LLMCapabilities(
-        provider=LLMProvider.DEEPSEEK_V3,
-        context_window=64000,
-        supports_structured_output=True,
-        supports_function_calling=True,
-        supports_vision=False,
-        supports_code_execution=True,
-        latency_ms=500,
-        cost_per_1k_tokens_input=0.001,  # Extremely low cost
-        cost_per_1k_tokens_output=0.002,
-        strengths=["Cost-effective", "Code reasoning", "Math/Logic", "Fast"]
-    ),
-}
+# LLM Capability Matrix: configured in grc_audit_providers.json and loaded by
+# grc_audit_provider_registry (the single source); LLM_CAPABILITIES is the
+# shared default registry's current config
+def __getattr__(name: str):
+    if name == "LLM_CAPABILITIES":
+        from grc_audit_provider_registry import default_registry  # Imports this module
+        return default_registry().capabilities
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 MULTI_LLM_ORCHESTRATION_MODULE = """
@@ -237,41 +213,338 @@ Failover Pairs:
 """
 
 
+# ============================================================================
+# ADAPTIVE LATENCY MODEL
+# ============================================================================
+
+@dataclass
+class LatencyEstimate:
+    """Smoothed latency percentiles for one provider"""
+    p50_ms: float
+    p95_ms: float
+    samples: int                   # Observations behind the estimate (0 = static prior only)
+    weight: float                  # Share of the estimate coming from observations (decays to 0)
+
+
+class AdaptiveLatencyModel:
+    """
+    Per-provider p50/p95 latency from observed calls.
+    
+    - Percentiles are taken over the last `window` to 2×`window` samples (two
+      rotating LatencyHistograms, fixed memory) and smoothed with an EWMA
+      (alpha) so one outlier does not flip routing.
+    - Observations decay toward the static prior (LLMCapabilities.latency_ms)
+      with `half_life_s`: a provider that was slow stops receiving latency
+      traffic, so without decay it would never be re-evaluated.
+    """
+    
+    def __init__(self,
+                 priors: Dict[LLMProvider, float],
+                 alpha: float = 0.2,
+                 half_life_s: float = 300.0,
+                 window: int = 100,
+                 clock=time.monotonic):
+        self.priors = dict(priors)
+        self.alpha = alpha
+        self.half_life_s = half_life_s
+        self.window = window
+        self._clock = clock
+        self._windows: Dict[LLMProvider, Tuple[Optional[LatencyHistogram], LatencyHistogram]] = {}  # (previous, current)
+        self._smoothed: Dict[LLMProvider, Tuple[float, float]] = {}  # (p50, p95)
+        self._samples: Dict[LLMProvider, int] = {}
+        self._updated_at: Dict[LLMProvider, float] = {}
+        self._lock = threading.Lock()
+    
+    def observe(self, provider: LLMProvider, latency_ms: float):
+        """Record one call latency and update the smoothed percentiles"""
+        with self._lock:
+            previous, current = self._windows.get(provider, (None, LatencyHistogram()))
+            if current.count >= self.window:
+                previous, current = current, LatencyHistogram()
+            current.record(latency_ms)
+            self._windows[provider] = (previous, current)
+            recent = LatencyHistogram(*current.config)
+            if previous is not None:
+                recent.merge(previous)
+            recent.merge(current)
+            p50, p95 = recent.percentile(0.50), recent.percentile(0.95)
+            if provider in self._smoothed:
+                # Start from the decayed value so a stale estimate does not dominate
+                previous = self._decayed(provider, self._clock())
+                p50 = self.alpha * p50 + (1 - self.alpha) * previous[0]
+                p95 = self.alpha * p95 + (1 - self.alpha) * previous[1]
+            self._smoothed[provider] = (p50, p95)
+            self._samples[provider] = self._samples.get(provider, 0) + 1
+            self._updated_at[provider] = self._clock()
+    
+    def set_priors(self, priors: Dict[LLMProvider, float]):
+        """Update static priors (e.g. after a capability config reload)"""
+        with self._lock:
+            self.priors = {**self.priors, **priors}
+    
+    def _weight(self, provider: LLMProvider, now: float) -> float:
+        if provider not in self._updated_at:
+            return 0.0
+        return 0.5 ** ((now - self._updated_at[provider]) / self.half_life_s)
+    
+    def _decayed(self, provider: LLMProvider, now: float) -> Tuple[float, float]:
+        weight = self._weight(provider, now)
+        prior = self.priors.get(provider, 0.0)
+        p50, p95 = self._smoothed[provider]
+        return (weight * p50 + (1 - weight) * prior, weight * p95 + (1 - weight) * prior)
+    
+    def estimate(self, provider: LLMProvider) -> LatencyEstimate:
+        """Current estimate (the static prior until the provider has been observed)"""
+        with self._lock:
+            if provider not in self._smoothed:
+                prior = self.priors.get(provider, 0.0)
+                return LatencyEstimate(prior, prior, 0, 0.0)
+            now = self._clock()
+            p50, p95 = self._decayed(provider, now)
+            return LatencyEstimate(p50, p95, self._samples[provider], self._weight(provider, now))
+    
+    def fastest(self, providers: List[LLMProvider], percentile: str = "p95") -> LLMProvider:
+        """Provider with the lowest estimated p50/p95 (first listed wins ties)"""
+        attribute = f"{percentile}_ms"
+        return min(providers, key=lambda provider: getattr(self.estimate(provider), attribute))
+
+
+# ============================================================================
+# CIRCUIT BREAKERS / FAILOVER
+# ============================================================================
+
+# Failover pairs from MULTI_LLM_ORCHESTRATION_MODULE
+FAILOVER_PAIRS: Dict[LLMProvider, LLMProvider] = {
+    LLMProvider.CHATGPT_5: LLMProvider.CLAUDE_4_5,
+    LLMProvider.GEMINI_3: LLMProvider.CHATGPT_5,
+    LLMProvider.DEEPSEEK_V3: LLMProvider.GEMINI_3,
+}
+
+# Role-based routing overrides; CostGovernor never downgrades these roles
+ROLE_PINNED_PROVIDERS: Dict[UserRole, LLMProvider] = {
+    UserRole.BOARD_CEO_CFO: LLMProvider.CLAUDE_4_5,  # Safety, clarity
+    UserRole.AUDITOR: LLMProvider.CLAUDE_4_5,        # Injection-resistant
+}
+
+# Providers named by select_llm routing rules and failover pairs; these must
+# always have capabilities (see ProviderCapabilityRegistry validation)
+ROUTED_PROVIDERS = (LLMProvider.CHATGPT_5, LLMProvider.GEMINI_3, LLMProvider.CLAUDE_4_5, LLMProvider.DEEPSEEK_V3)
+
+
+class CircuitState(Enum):
+    CLOSED = "closed"              # Normal operation
+    OPEN = "open"                  # Failing; calls go to the failover provider
+    HALF_OPEN = "half_open"        # Recovery probe allowed
+
+
+class CircuitBreaker:
+    """
+    Per-provider breaker: opens after failure_threshold consecutive failures,
+    moves to half-open after recovery_timeout_s and lets a single probe call
+    through; the probe's outcome closes or re-opens the circuit.
+    """
+    
+    def __init__(self,
+                 failure_threshold: int = 5,
+                 recovery_timeout_s: float = 30.0,
+                 clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout_s = recovery_timeout_s
+        self._clock = clock
+        self._state = CircuitState.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_started: Optional[float] = None
+        self._lock = threading.Lock()
+    
+    @property
+    def state(self) -> CircuitState:
+        with self._lock:
+            self._advance()
+            return self._state
+    
+    def _advance(self):
+        if self._state == CircuitState.OPEN and self._clock() - self._opened_at >= self.recovery_timeout_s:
+            self._state = CircuitState.HALF_OPEN
+            self._probe_started = None
+    
+    def _probe_free(self, now: float) -> bool:
+        # Half-open: one probe at a time; an abandoned probe expires after recovery_timeout_s
+        return self._probe_started is None or now - self._probe_started >= self.recovery_timeout_s
+    
+    def is_available(self) -> bool:
+        """True if allow_request() would admit a call now; claims nothing (for routing decisions)"""
+        with self._lock:
+            self._advance()
+            if self._state == CircuitState.HALF_OPEN:
+                return self._probe_free(self._clock())
+            return self._state == CircuitState.CLOSED
+    
+    def allow_request(self) -> bool:
+        """True if a call may be sent now (claims the probe slot when half-open); call only when sending"""
+        with self._lock:
+            self._advance()
+            if self._state == CircuitState.CLOSED:
+                return True
+            if self._state == CircuitState.OPEN:
+                return False
+            now = self._clock()
+            if self._probe_free(now):
+                self._probe_started = now
+                return True
+            return False
+    
+    def record_success(self):
+        with self._lock:
+            self._state = CircuitState.CLOSED
+            self._failures = 0
+            self._probe_started = None
+    
+    def record_failure(self):
+        with self._lock:
+            self._advance()
+            self._failures += 1
+            if self._state == CircuitState.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = CircuitState.OPEN
+                self._opened_at = self._clock()
+                self._probe_started = None
+    
+    def release_probe(self):
+        """Give back a half-open probe slot whose call never completed (cancelled)"""
+        with self._lock:
+            self._probe_started = None
+
+
+# Context size for routing: one count, or per-provider counts in each provider's
+# encoding (TokenCounter.count_by_provider, PromptAssembler.estimate_tokens_by_provider)
+ContextSize = Union[int, Dict[LLMProvider, int]]
+
+
+def _context_tokens(context_size_tokens: ContextSize, provider: Optional[LLMProvider] = None) -> int:
+    """Tokens for provider (the largest count when provider is None or not counted)"""
+    if isinstance(context_size_tokens, dict):
+        if provider in context_size_tokens:
+            return context_size_tokens[provider]
+        return max(context_size_tokens.values())
+    return context_size_tokens
+
+
 class LLMRouter:
     """Routes audit tasks to optimal LLM"""
     
-    def __init__(self):
-        self.llm_capabilities = LLM_CAPABILITIES
+    def __init__(self,
+                 latency_model: Optional[AdaptiveLatencyModel] = None,
+                 capability_registry=None):
+        # grc_audit_provider_registry.ProviderCapabilityRegistry (hot-reloaded config); default: the shared one
+        if capability_registry is None:
+            from grc_audit_provider_registry import default_registry  # Imports this module
+            capability_registry = default_registry()
+        self.capability_registry = capability_registry
+        self._capabilities: Dict[LLMProvider, LLMCapabilities] = {}
+        self._capabilities_version = None
+        self._capabilities_lock = threading.Lock()
         self.cost_tracker: Dict[LLMProvider, float] = {}
-        self.latency_tracker: Dict[LLMProvider, List[int]] = {}
+        self.cache_hits: Dict[LLMProvider, int] = {}
+        self.latency_tracker = LatencyRecorder()  # Bounded histograms per provider / task type / role
+        self.latency_model = latency_model if latency_model is not None else AdaptiveLatencyModel(
+            {provider: cap.latency_ms for provider, cap in self.llm_capabilities.items()}
+        )
+        self.circuit_breakers: Dict[LLMProvider, CircuitBreaker] = {
+            provider: CircuitBreaker() for provider in LLMProvider
+        }
+    
+    @property
+    def llm_capabilities(self) -> Dict[LLMProvider, LLMCapabilities]:
+        """Routable providers: the capability registry's current config"""
+        registry = self.capability_registry
+        registry.refresh()  # Throttled change check
+        if registry.version != self._capabilities_version:
+            with self._capabilities_lock:
+                if registry.version != self._capabilities_version:
+                    capabilities = registry.capabilities
+                    if hasattr(self, "latency_model"):
+                        self.latency_model.set_priors({provider: cap.latency_ms for provider, cap in capabilities.items()})
+                    self._capabilities = capabilities
+                    self._capabilities_version = registry.version
+        return self._capabilities
     
     def select_llm(self, 
                    task_type: str,
                    user_role: UserRole,
-                   context_size_tokens: int,
-                   priority: str = "balanced") -> LLMProvider:
+                   context_size_tokens: ContextSize,
+                   priority: str = "balanced",
+                   ignore_circuits: bool = False) -> LLMProvider:
         """
         Select optimal LLM for task.
         priority: "cost" | "latency" | "quality" | "balanced"
+        context_size_tokens: one count, or per-provider counts so each context
+        window is checked in that provider's own encoding.
+        Providers with an open circuit are replaced along FAILOVER_PAIRS
+        (unless ignore_circuits, e.g. for offline replays).
+        """
+        preferred = self._preferred_llm(task_type, user_role, context_size_tokens, priority)
+        return self.available_llm(preferred, context_size_tokens, ignore_circuits=ignore_circuits)
+    
+    def failover_chain(self, provider: LLMProvider) -> List[LLMProvider]:
+        """provider, its failover pair, that pair's failover, ... then every other provider"""
+        chain = [provider]
+        while FAILOVER_PAIRS.get(chain[-1]) is not None and FAILOVER_PAIRS[chain[-1]] not in chain:
+            chain.append(FAILOVER_PAIRS[chain[-1]])
+        return chain + [p for p in self.llm_capabilities if p not in chain]
+    
+    def available_llm(self,
+                      preferred: LLMProvider,
+                      context_size_tokens: ContextSize,
+                      exclude: Tuple[LLMProvider, ...] = (),
+                      ignore_circuits: bool = False) -> LLMProvider:
         """
+        First provider on preferred's failover chain whose circuit admits a call
+        (any circuit if ignore_circuits) and context fits. Read-only: the
+        dispatcher claims a half-open probe slot only when it actually sends the call.
+        """
+        for candidate in self.failover_chain(preferred):
+            if candidate in exclude or candidate not in self.llm_capabilities:
+                continue
+            if self.llm_capabilities[candidate].context_window < _context_tokens(context_size_tokens, candidate):
+                continue
+            if ignore_circuits or self.circuit_breakers[candidate].is_available():
+                return candidate
+        raise ValueError(
+            f"No available LLM for context size {_context_tokens(context_size_tokens)} (circuits open or excluded)"
+        )
+    
+    def record_outcome(self, provider: LLMProvider, success: bool):
+        """Feed a call result to the provider's circuit breaker"""
+        breaker = self.circuit_breakers.get(provider)
+        if breaker is None:
+            return
+        if success:
+            breaker.record_success()
+        else:
+            breaker.record_failure()
+    
+    def _preferred_llm(self,
+                       task_type: str,
+                       user_role: UserRole,
+                       context_size_tokens: ContextSize,
+                       priority: str) -> LLMProvider:
+        """Routing rules, ignoring provider health"""
         
         # Filter by context window requirement
         compatible_llms = [
             provider for provider, cap in self.llm_capabilities.items()
-            if cap.context_window >= context_size_tokens
+            if cap.context_window >= _context_tokens(context_size_tokens, provider)
         ]
         
         if not compatible_llms:
-            raise ValueError(f"No LLM supports context size {context_size_tokens}")
+            raise ValueError(f"No LLM supports context size {_context_tokens(context_size_tokens)}")
         
         # Role-based routing overrides
-        if user_role == UserRole.BOARD_CEO_CFO:
-            return LLMProvider.CLAUDE_4_5  # Safety, clarity
-        elif user_role == UserRole.AUDITOR:
-            return LLMProvider.CLAUDE_4_5  # Injection-resistant
+        if user_role in ROLE_PINNED_PROVIDERS:
+            return ROLE_PINNED_PROVIDERS[user_role]
         
         # Task-type routing
-        if task_type == "long_document_analysis" and context_size_tokens > 200000:
+        if task_type == "long_document_analysis" and _context_tokens(context_size_tokens) > 200000:
             return LLMProvider.GEMINI_3  # Only one with 1M context
         elif task_type == "code_analysis":
             return LLMProvider.DEEPSEEK_V3  # Best for code
@@ -282,7 +555,9 @@ class LLMRouter:
         if priority == "cost":
             return LLMProvider.DEEPSEEK_V3  # Cheapest
         elif priority == "latency":
-            return LLMProvider.DEEPSEEK_V3  # Fastest
+            # Lowest observed p95 (static latency_ms until calls are tracked); cheaper first on ties
+            by_cost = sorted(compatible_llms, key=lambda p: self.llm_capabilities[p].cost_per_1k_tokens_input)
+            return self.latency_model.fastest(by_cost)
         elif priority == "quality":
             return LLMProvider.CHATGPT_5    # Highest quality
         
@@ -299,14 +574,186 @@ class LLMRouter:
                 output_tokens / 1000 * cap.cost_per_1k_tokens_output)
         return cost
     
-    def track_usage(self, provider: LLMProvider, cost: float, latency_ms: int):
-        """Track LLM usage for monitoring and optimization"""
+    def track_usage(self,
+                    provider: LLMProvider,
+                    cost: float,
+                    latency_ms: Optional[int],
+                    task_type: Optional[str] = None,
+                    user_role: Optional[UserRole] = None,
+                    cached: bool = False):
+        """
+        Track LLM usage for monitoring and optimization.
+        latency_ms=None records cost only; cached=True counts a response-cache
+        hit (its latency says nothing about the provider and is not recorded).
+        """
         if provider not in self.cost_tracker:
             self.cost_tracker[provider] = 0.0
-            self.latency_tracker[provider] = []
         
         self.cost_tracker[provider] += cost
-        self.latency_tracker[provider].append(latency_ms)
+        if cached:
+            self.cache_hits[provider] = self.cache_hits.get(provider, 0) + 1
+            return
+        if latency_ms is None:
+            return
+        self.latency_tracker.record(
+            latency_ms, provider.value, task_type, user_role.value if user_role is not None else None
+        )
+        self.latency_model.observe(provider, latency_ms)
+    
+    def latency_percentiles(self, provider: LLMProvider) -> Dict[str, float]:
+        """Observed p50/p90/p99 for a provider ({} before any tracked call)"""
+        return self.latency_tracker.percentiles("provider", provider.value)
+
+
+# ============================================================================
+# TOKEN ACCOUNTING
+# ============================================================================
+
+class Tokenizer(ABC):
+    """Counts tokens for one encoding"""
+    name = "base"
+    
+    @abstractmethod
+    def count(self, text: str) -> int:
+        """Tokens in text under this encoding"""
+
+
+class ApproximateTokenizer(Tokenizer):
+    """
+    Fast estimate for hot paths: 4 ASCII chars per token, one token per
+    non-ASCII character (₹, §, ×, box-drawing). Single C-level pass, no regex.
+    """
+    name = "approx"
+    
+    def count(self, text: str) -> int:
+        ascii_chars = len(text.encode("ascii", "ignore"))
+        return ascii_chars // 4 + (len(text) - ascii_chars)
+
+
+# GPT-style pre-tokenization: contractions, words, 1-3 digit groups,
+# punctuation runs, whitespace runs
+_PRETOKEN_PATTERN = re.compile(r"'(?:[sdmt]|ll|ve|re)| ?[A-Za-z]+| ?[0-9]{1,3}| ?[^\sA-Za-z0-9]+|\s+(?!\S)|\s+")
+
+
+class PretokenizerEstimator(Tokenizer):
+    """
+    Offline BPE-shaped estimate used when no real vocabulary is available.
+    Splits text the way BPE encoders pre-tokenize, then costs each piece:
+    long words by length, non-ASCII symbols per character.
+    """
+    
+    def __init__(self, name: str = "pretokenizer_estimate", chars_per_word_token: int = 6):
+        self.name = name
+        self.chars_per_word_token = chars_per_word_token
+    
+    def count(self, text: str) -> int:
+        tokens = 0
+        for piece in _PRETOKEN_PATTERN.findall(text):
+            word = piece.lstrip(" ")
+            if not word or word.isspace():
+                tokens += 1
+            elif word.isascii() and word.isalpha():
+                tokens += 1 + (len(word) - 1) // self.chars_per_word_token
+            elif word.isascii():
+                tokens += 1 + (len(word) - 1) // 3  # Digit groups, punctuation runs
+            else:
+                ascii_part = len(word.encode("ascii", "ignore"))
+                tokens += (len(word) - ascii_part) + (ascii_part + 2) // 3
+        return tokens
+
+
+class TiktokenTokenizer(Tokenizer):
+    """Exact counts from a tiktoken encoding (requires tiktoken and its cached encoding files)"""
+    
+    def __init__(self, encoding_name: str):
+        self.name = encoding_name
+        self._encoding = tiktoken.get_encoding(encoding_name)
+    
+    def count(self, text: str) -> int:
+        return len(self._encoding.encode(text, disallowed_special=()))
+
+
+# Closest offline encoding per provider. Only OpenAI publishes its encodings;
+# cl100k_base is the nearest public proxy for the others.
+PROVIDER_ENCODINGS: Dict[LLMProvider, str] = {
+    LLMProvider.CHATGPT_5: "o200k_base",
+    LLMProvider.GEMINI_3: "cl100k_base",
+    LLMProvider.CLAUDE_4_5: "cl100k_base",
+    LLMProvider.DEEPSEEK_V3: "cl100k_base",
+    LLMProvider.LLAMA_4: "cl100k_base",
+    LLMProvider.MISTRAL_LARGE_2: "cl100k_base",
+}
+DEFAULT_ENCODING = "cl100k_base"
+
+
+class TokenCounter:
+    """
+    Per-provider token counting with memoized counts for immutable content.
+    approximate=True uses ApproximateTokenizer everywhere (hot paths).
+    """
+    
+    def __init__(self, approximate: bool = False, encodings: Optional[Dict[LLMProvider, str]] = None):
+        self.approximate = approximate
+        self.encodings = dict(PROVIDER_ENCODINGS if encodings is None else encodings)
+        self._tokenizers: Dict[str, Tokenizer] = {}
+        self._counts: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+    
+    def tokenizer_for(self, provider: Optional[LLMProvider] = None) -> Tokenizer:
+        """Tokenizer for a provider (DEFAULT_ENCODING when provider is None)"""
+        if self.approximate:
+            encoding = "approx"
+        else:
+            encoding = self.encodings.get(provider, DEFAULT_ENCODING) if provider else DEFAULT_ENCODING
+        
+        tokenizer = self._tokenizers.get(encoding)
+        if tokenizer is None:
+            with self._lock:
+                tokenizer = self._tokenizers.get(encoding)
+                if tokenizer is None:
+                    tokenizer = self._build_tokenizer(encoding)
+                    self._tokenizers[encoding] = tokenizer
+        return tokenizer
+    
+    def _build_tokenizer(self, encoding: str) -> Tokenizer:
+        if encoding == "approx":
+            return ApproximateTokenizer()
+        if tiktoken is not None:
+            try:
+                return TiktokenTokenizer(encoding)
+            except Exception:
+                pass  # Encoding file not cached and no network; fall back to estimate
+        return PretokenizerEstimator(name=f"{encoding}~estimate")
+    
+    def count(self, text: str, provider: Optional[LLMProvider] = None, content_key: Optional[str] = None) -> int:
+        """
+        Count tokens in text. Pass content_key (e.g. a content_hash) for
+        immutable module text so the count is computed once per encoding.
+        """
+        tokenizer = self.tokenizer_for(provider)
+        if content_key is None:
+            return tokenizer.count(text)
+        
+        memo_key = (tokenizer.name, content_key)
+        count = self._counts.get(memo_key)
+        if count is None:
+            count = tokenizer.count(text)
+            self._counts[memo_key] = count
+        return count
+    
+    def count_by_provider(self,
+                          text: str,
+                          providers: Optional[List[LLMProvider]] = None,
+                          content_key: Optional[str] = None) -> Dict[LLMProvider, int]:
+        """Count in every provider's encoding (each encoding counted once), for LLMRouter.select_llm"""
+        by_encoding: Dict[str, int] = {}
+        counts: Dict[LLMProvider, int] = {}
+        for provider in (providers if providers is not None else list(LLMProvider)):
+            encoding = self.tokenizer_for(provider).name
+            if encoding not in by_encoding:
+                by_encoding[encoding] = self.count(text, provider, content_key)
+            counts[provider] = by_encoding[encoding]
+        return counts
 
 
 # ============================================================================
@@ -536,50 +983,327 @@ BEST PRACTICES:
 """
 
 
+# ============================================================================
+# ASSEMBLED PROMPT CACHE
+# ============================================================================
+
+def content_hash(content: str) -> str:
+    """Stable content hash used to key cached prompts"""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()[:16]
+
+
+@dataclass
+class PromptCacheStats:
+    """Point-in-time counters for a PromptCache"""
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    size_bytes: int
+
+
+class PromptCache:
+    """
+    Thread-safe LRU cache of assembled prompts.
+    Bounded by entry count and by total UTF-8 size of cached prompts.
+    """
+    
+    def __init__(self, max_entries: int = 64, max_bytes: int = 32 * 1024 * 1024):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        if max_bytes < 1:
+            raise ValueError("max_bytes must be at least 1")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple, Tuple[str, int]]" = OrderedDict()
+        self._size_bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+    
+    def get(self, key: Tuple) -> Optional[str]:
+        """Return cached prompt for key (marking it most recently used), or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[0]
+    
+    def put(self, key: Tuple, prompt: str):
+        """Store prompt under key, evicting least recently used entries to stay in bounds"""
+        size = len(prompt.encode("utf-8"))
+        if size > self.max_bytes:
+            return  # Larger than the whole cache; never worth holding
+        
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size_bytes -= previous[1]
+            
+            self._entries[key] = (prompt, size)
+            self._size_bytes += size
+            
+            while len(self._entries) > self.max_entries or self._size_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._size_bytes -= evicted_size
+                self._evictions += 1
+    
+    def clear(self):
+        """Drop all cached prompts (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+            self._size_bytes = 0
+    
+    def stats(self) -> PromptCacheStats:
+        """Snapshot of cache counters"""
+        with self._lock:
+            return PromptCacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                entries=len(self._entries),
+                size_bytes=self._size_bytes,
+            )
+
+
+# ============================================================================
+# FRAMEWORK MODULE REGISTRY (LAZY LOADING)
+# ============================================================================
+
+@dataclass(frozen=True)
+class FrameworkSource:
+    """Where a framework module's text comes from"""
+    name: str
+    module_paths: Tuple[str, ...]  # Candidate Python modules, tried in order
+    getter: str                    # Name of the get_*_module function
+
+
+class FrameworkRegistry:
+    """
+    Registry of framework modules, loaded by name on first use.
+    Text is cached after the first load. A missing provider module only
+    disables the frameworks it provides; the failure is kept in load_errors.
+    """
+    
+    def __init__(self, sources: Optional[List[FrameworkSource]] = None):
+        self._sources: Dict[str, FrameworkSource] = {}
+        self._content: Dict[str, str] = {}
+        self.load_errors: Dict[str, str] = {}
+        self._lock = threading.RLock()
+        for source in sources or []:
+            self._sources[source.name] = source
+    
+    def register(self, name: str, module_paths: Tuple[str, ...], getter: str):
+        """Register (or replace) a framework source"""
+        with self._lock:
+            self._sources[name] = FrameworkSource(name=name, module_paths=tuple(module_paths), getter=getter)
+            self._content.pop(name, None)
+            self.load_errors.pop(name, None)
+    
+    def names(self) -> List[str]:
+        """All registered framework names, in registration order"""
+        return list(self._sources)
+    
+    def sources(self) -> List[FrameworkSource]:
+        """Registered sources, in registration order"""
+        return list(self._sources.values())
+    
+    def is_loaded(self, name: str) -> bool:
+        """True once a framework's text has been loaded and cached"""
+        return name in self._content
+    
+    def get(self, name: str) -> Optional[str]:
+        """
+        Return framework text, importing its provider on first use.
+        Returns None for unknown or unavailable frameworks.
+        """
+        content = self._content.get(name)
+        if content is not None:
+            return content
+        
+        with self._lock:
+            if name in self._content:
+                return self._content[name]
+            if name in self.load_errors:
+                return None  # Already failed; don't retry the import on every call
+            
+            source = self._sources.get(name)
+            if source is None:
+                return None
+            
+            content = self._load(source)
+            if content is not None:
+                self._content[name] = content
+            return content
+    
+    def _load(self, source: FrameworkSource) -> Optional[str]:
+        """Call the first importable getter for a source"""
+        errors = []
+        for module_path in source.module_paths:
+            try:
+                module = importlib.import_module(module_path)
+            except ImportError as e:
+                errors.append(f"{module_path}: {e}")
+                continue
+            getter = getattr(module, source.getter, None)
+            if getter is None:
+                errors.append(f"{module_path}: no {source.getter}()")
+                continue
+            return getter()
+        
+        self.load_errors[source.name] = "; ".join(errors)
+        return None
+    
+    def reload(self, name: Optional[str] = None, reimport: bool = False):
+        """
+        Forget cached text (and past failures) for one framework, or all.
+        reimport=True also re-executes already imported provider modules,
+        picking up framework text edited on disk.
+        """
+        with self._lock:
+            names = [name] if name is not None else list(self._sources)
+            if reimport:
+                module_paths = {path for n in names if n in self._sources for path in self._sources[n].module_paths}
+                for module_path in sorted(module_paths):
+                    module = sys.modules.get(module_path)
+                    if module is not None:
+                        importlib.reload(module)
+            for n in names:
+                self._content.pop(n, None)
+                self.load_errors.pop(n, None)
+
+
+# SEBI/RBI/DPDP getters are documented under the extended module but currently
+# ship in grc_audit_system_prompt, so both locations are tried.
+FRAMEWORK_REGISTRY = FrameworkRegistry([
+    FrameworkSource("sebi_cscrf", ("grc_audit_frameworks_extended", "grc_audit_system_prompt"), "get_sebi_cscrf_module"),
+    FrameworkSource("rbi_csite", ("grc_audit_frameworks_extended", "grc_audit_system_prompt"), "get_rbi_csite_module"),
+    FrameworkSource("dpdp_act", ("grc_audit_frameworks_extended", "grc_audit_system_prompt"), "get_dpdp_act_module"),
+    FrameworkSource("gdpr", ("grc_audit_frameworks_extended",), "get_gdpr_module"),
+    FrameworkSource("iso_27001", ("grc_audit_frameworks_extended",), "get_iso27001_module"),
+    FrameworkSource("iso_42001", ("grc_audit_frameworks_advanced",), "get_iso42001_module"),
+    FrameworkSource("soc2", ("grc_audit_frameworks_advanced",), "get_soc2_module"),
+    FrameworkSource("sox_itgc", ("grc_audit_frameworks_final",), "get_sox_itgc_module"),
+    FrameworkSource("pci_dss_v4", ("grc_audit_frameworks_final",), "get_pci_dss_v4_module"),
+    FrameworkSource("hipaa", ("grc_audit_frameworks_final",), "get_hipaa_module"),
+])
+
+
+@dataclass
+class PromptLayout:
+    """
+    Prompt assembled in cache-friendly order (most shared part first).
+    cache_breakpoints are character offsets where a shared prefix ends:
+    prompt[:offset] is byte-identical for every request sharing that tier.
+    """
+    prompt: str
+    sections: List[Tuple[str, int, int]]  # (name, start, end) offsets into prompt
+    cache_breakpoints: List[int]
+    
+    def blocks(self) -> List[str]:
+        """Prompt split at the cache breakpoints (e.g. one cache_control block each)"""
+        bounds = [0] + self.cache_breakpoints + [len(self.prompt)]
+        return [self.prompt[start:end] for start, end in zip(bounds, bounds[1:]) if end > start]
+
+
+@dataclass
+class PackedPrompt:
+    """Result of budget-constrained assembly"""
+    prompt: str
+    token_count: int               # Estimated tokens of prompt
+    token_budget: int
+    included: List[str]            # Section IDs kept, in prompt order
+    dropped: List[str]             # Section IDs that did not fit or had relevance <= 0
+    dropped_tokens: int
+    relevance_kept: float          # Sum of relevance × tokens over included sections
+
+
+@dataclass
+class CompressedPrompt:
+    """Prompt after the multi-framework compression pass"""
+    prompt: str
+    report: CompressionReport
+
+
+@dataclass
+class _PackingUnit:
+    section_id: str
+    framework: Optional[str]       # None for template sections
+    text: str
+    tokens: int
+    value: float
+
+
 class PromptAssembler:
     """Dynamically assembles prompts from modules"""
     
-    def __init__(self):
+    def __init__(self,
+                 prompt_cache: Optional[PromptCache] = None,
+                 registry: Optional["FrameworkRegistry"] = None,
+                 token_counter: Optional[TokenCounter] = None):
         self.core_prompt = CORE_SYSTEM_IDENTITY + VIBE_DIRECTIVES + DO_NOT_TOUCH_CONSTRAINTS
+        self.core_hash = content_hash(self.core_prompt)
         self.framework_modules: Dict[str, str] = {}
         self.module_sizes: Dict[str, int] = {}
+        self.module_hashes: Dict[str, str] = {}
+        self.section_trees: Dict[str, FrameworkSections] = {}  # Parsed on first control-level request
         self.loaded_modules: List[str] = ["core"]
+        # Pass one cache to several assemblers (or threads) to share prebuilt prompts
+        self.prompt_cache = prompt_cache if prompt_cache is not None else PromptCache()
+        self.registry = registry if registry is not None else FRAMEWORK_REGISTRY
+        self.token_counter = token_counter if token_counter is not None else TokenCounter()
+        self._load_lock = threading.Lock()
     
-    def load_framework_modules(self):
-        """Load all framework modules from files"""
-        # Import framework getter functions
-        from grc_audit_frameworks_extended import (
-            get_sebi_cscrf_module, get_rbi_csite_module, get_dpdp_act_module, get_gdpr_module, get_iso27001_module
-        )
-        from grc_audit_frameworks_advanced import (
-            get_iso42001_module, get_soc2_module
-        )
-        from grc_audit_frameworks_final import (
-            get_sox_itgc_module, get_pci_dss_v4_module, get_hipaa_module
-        )
-        
-        self.framework_modules = {
-            "sebi_cscrf": get_sebi_cscrf_module(),
-            "rbi_csite": get_rbi_csite_module(),
-            "dpdp_act": get_dpdp_act_module(),
-            "gdpr": get_gdpr_module(),
-            "iso_27001": get_iso27001_module(),
-            "iso_42001": get_iso42001_module(),
-            "soc2": get_soc2_module(),
-            "sox_itgc": get_sox_itgc_module(),
-            "pci_dss_v4": get_pci_dss_v4_module(),
-            "hipaa": get_hipaa_module(),
-        }
+    def load_framework_modules(self, frameworks: Optional[List[str]] = None):
+        """
+        Load framework modules through the registry.
+        Loads every registered framework when frameworks is None; modules whose
+        provider file is missing are skipped (see registry.load_errors).
+        """
+        names = frameworks if frameworks is not None else self.registry.names()
+        for name in names:
+            self._ensure_loaded(name)
+    
+    def _ensure_loaded(self, framework: str) -> bool:
+        """
+        Pull a framework's text from the registry on first use.
+        framework_modules is set last: a framework visible there always has
+        its hash and size, so lock-free readers never see a partial load.
+        """
+        if framework in self.framework_modules:
+            return True
         
-        # Calculate token sizes (rough estimate: 4 chars = 1 token)
-        for name, content in self.framework_modules.items():
-            self.module_sizes[name] = len(content) // 4
+        with self._load_lock:
+            if framework in self.framework_modules:
+                return True
+            content = self.registry.get(framework)
+            if content is None:
+                return False
+            
+            module_hash = content_hash(content)
+            self.module_hashes[framework] = module_hash
+            # Precompute default-encoding token count once per module
+            self.module_sizes[framework] = self.token_counter.count(content, content_key=module_hash)
+            self.framework_modules[framework] = content
+        return True
     
     def assemble_prompt(self, frameworks: List[str], user_role: UserRole = UserRole.DEFAULT) -> str:
         """
-        Assemble prompt from core + specified frameworks.
-        Returns assembled prompt string.
+        Assemble prompt from core + specified frameworks (in registry order,
+        so equivalent requests share one cache entry).
+        Returns assembled prompt string (served from prompt_cache when already built).
         """
+        selected = self._canonical_frameworks(frameworks)
+        cache_key = self._cache_key(selected, user_role)
+        
+        cached = self.prompt_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         parts = [self.core_prompt]
         
         # Add role-specific instructions
@@ -587,11 +1311,323 @@ class PromptAssembler:
         parts.append(role_instructions)
         
         # Add framework modules
-        for framework in frameworks:
-            if framework in self.framework_modules:
-                parts.append(self.framework_modules[framework])
+        for framework in selected:
+            parts.append(self.framework_modules[framework])
+        
+        prompt = "\n\n".join(parts)
+        self.prompt_cache.put(cache_key, prompt)
+        return prompt
+    
+    def assemble_rope(self, frameworks: List[str], user_role: UserRole = UserRole.DEFAULT) -> PromptRope:
+        """
+        Same prompt as assemble_prompt, as a rope over the shared module strings.
+        Nothing is concatenated; call str() only where a flat string is required.
+        """
+        segments = [(self.core_hash, self.core_prompt), (f"role:{user_role.value}", self._get_role_instructions(user_role))]
+        for framework in self._canonical_frameworks(frameworks):
+            segments.append((self.module_hashes[framework], self.framework_modules[framework]))
+        return PromptRope(segments)
+    
+    def assemble_layout(self,
+                        frameworks: List[str],
+                        user_role: UserRole = UserRole.DEFAULT,
+                        include_templates: bool = True) -> PromptLayout:
+        """
+        Assemble prompt in canonical, prefix-cache-friendly order:
+        core → templates → frameworks (registry order) → role instructions.
+        Framework order in the request does not change the output, so
+        provider-side prompt caches hit across equivalent requests.
+        """
+        names: List[str] = ["core"]
+        parts: List[str] = [self.core_prompt]
+        tiers_end: List[int] = [0]  # Index of the last part in each shared tier
+        
+        if include_templates:
+            for name, text in self._template_parts():
+                names.append(name)
+                parts.append(text)
+            tiers_end.append(len(parts) - 1)
+        
+        selected = self._canonical_frameworks(frameworks)
+        for framework in selected:
+            names.append(framework)
+            parts.append(self.framework_modules[framework])
+        if selected:
+            tiers_end.append(len(parts) - 1)
+        
+        names.append("role")
+        parts.append(self._get_role_instructions(user_role))
+        
+        cache_key = ("layout", include_templates) + self._cache_key(selected, user_role)
+        prompt = self.prompt_cache.get(cache_key)
+        if prompt is None:
+            prompt = "\n\n".join(parts)
+            self.prompt_cache.put(cache_key, prompt)
+        
+        sections: List[Tuple[str, int, int]] = []
+        offset = 0
+        for name, text in zip(names, parts):
+            sections.append((name, offset, offset + len(text)))
+            offset += len(text) + 2  # "\n\n" separator
+        
+        # Breakpoint = start of the part following each tier (separator included in prefix)
+        cache_breakpoints = [sections[i + 1][1] for i in tiers_end]
+        
+        return PromptLayout(prompt=prompt, sections=sections, cache_breakpoints=cache_breakpoints)
+    
+    def section_tree(self, framework: str) -> FrameworkSections:
+        """Domain → control → evidence tree for a framework (parsed once, on first use)"""
+        if not self._ensure_loaded(framework):
+            raise ValueError(f"Framework module '{framework}' is not available")
+        
+        tree = self.section_trees.get(framework)
+        if tree is None:
+            tree = parse_framework_sections(framework, self.framework_modules[framework])
+            self.section_trees[framework] = tree
+        return tree
+    
+    def assemble_control_prompt(self,
+                                framework: str,
+                                control_ids: List[str],
+                                user_role: UserRole = UserRole.DEFAULT) -> str:
+        """
+        Level 3 hierarchical chunking: Core + role + only the named controls
+        (e.g. "W1", "Requirement 8.4.2") instead of the full framework module.
+        """
+        tree = self.section_tree(framework)
+        contexts = [tree.control_context(control_id) for control_id in control_ids]
+        
+        cache_key = (
+            "control", framework, self.module_hashes[framework],
+            tuple(normalize_control_id(cid) for cid in control_ids),
+            self.core_hash, user_role.value,
+        )
+        cached = self.prompt_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        prompt = "\n\n".join([self.core_prompt, self._get_role_instructions(user_role)] + contexts)
+        self.prompt_cache.put(cache_key, prompt)
+        return prompt
+    
+    def assemble_within_budget(self,
+                               frameworks: List[str],
+                               token_budget: int,
+                               relevance: Optional[Dict[str, float]] = None,
+                               user_role: UserRole = UserRole.DEFAULT,
+                               include_templates: bool = True,
+                               provider: Optional[LLMProvider] = None) -> PackedPrompt:
+        """
+        Pack the most valuable sections into token_budget (0/1 knapsack).
+        
+        Core prompt and role instructions are always kept. Candidates are each
+        framework's preamble and domains (from section_tree) plus the template
+        modules. Section value = relevance × tokens; relevance is looked up by
+        section ID ("pci_dss_v4:REQUIREMENT 8: ...", "report_templates"), then
+        by framework name, defaulting to 1.0.
+        """
+        relevance = relevance or {}
+        counter = self.token_counter
+        role_text = self._get_role_instructions(user_role)
+        
+        mandatory = (counter.count(self.core_prompt, provider, content_key=self.core_hash)
+                     + counter.count(role_text, provider) + 1)
+        if mandatory > token_budget:
+            raise ValueError(f"Core prompt needs {mandatory} tokens; budget is {token_budget}")
+        
+        units = self._packing_units(frameworks, include_templates, relevance, provider)
+        # Reserve room for module titles re-emitted when a preamble is dropped
+        title_reserve = sum(
+            counter.count(self.section_tree(fw).title, provider) + 1
+            for fw in {unit.framework for unit in units if unit.framework is not None and unit.value > 0}
+        )
+        chosen = self._knapsack(units, token_budget - mandatory - title_reserve)
+        
+        # Keep canonical layout order: core → templates → frameworks → role
+        parts = [self.core_prompt]
+        included: List[str] = []
+        current_framework = None
+        for index, unit in enumerate(units):
+            if index not in chosen:
+                continue
+            if unit.framework is not None and unit.framework != current_framework:
+                current_framework = unit.framework
+                title = self.section_tree(unit.framework).title
+                if title and not unit.section_id.endswith(":preamble"):
+                    parts.append(title)
+            parts.append(unit.text)
+            included.append(unit.section_id)
+        parts.append(role_text)
+        
+        dropped = [unit for index, unit in enumerate(units) if index not in chosen]
+        prompt = "\n\n".join(parts)
+        return PackedPrompt(
+            prompt=prompt,
+            token_count=counter.count(prompt, provider),
+            token_budget=token_budget,
+            included=included,
+            dropped=[unit.section_id for unit in dropped],
+            dropped_tokens=sum(unit.tokens for unit in dropped),
+            relevance_kept=sum(units[index].value for index in chosen),
+        )
+    
+    def _packing_units(self,
+                       frameworks: List[str],
+                       include_templates: bool,
+                       relevance: Dict[str, float],
+                       provider: Optional[LLMProvider]) -> List[_PackingUnit]:
+        """Candidate sections for packing, in canonical layout order (relevance <= 0 valued at 0)"""
+        units: List[_PackingUnit] = []
+        
+        def add(section_id: str, framework: Optional[str], text: str, content_key: Optional[str]):
+            tokens = self.token_counter.count(text, provider, content_key=content_key) + 1  # + separator
+            score = relevance.get(section_id, relevance.get(framework, 1.0) if framework else 1.0)
+            units.append(_PackingUnit(section_id, framework, text, tokens, max(score, 0.0) * tokens))
+        
+        if include_templates:
+            for name, text in self._template_parts():
+                add(name, None, text, content_hash(text))
+        
+        for framework in self._canonical_frameworks(frameworks):
+            tree = self.section_tree(framework)
+            module_hash = self.module_hashes[framework]
+            if not tree.domains:
+                add(framework, framework, self.framework_modules[framework], module_hash)
+                continue
+            preamble = "\n\n".join(part for part in (tree.title, tree.preamble) if part)
+            if preamble:
+                add(f"{framework}:preamble", framework, preamble, f"{module_hash}:preamble")
+            for index, domain in enumerate(tree.domains):
+                add(f"{framework}:{domain.title}", framework, domain.text, f"{module_hash}:{index}")
+        
+        return units
+    
+    @staticmethod
+    def _knapsack(units: List[_PackingUnit], capacity: int, resolution: int = 2000) -> set:
+        """
+        0/1 knapsack over token weights, quantized to at most `resolution`
+        buckets (weights rounded up, so the chosen set always fits).
+        Returns indices of chosen units; units worth nothing are never chosen.
+        """
+        if capacity <= 0 or not units:
+            return set()
+        
+        bucket = max(1, -(-capacity // resolution))
+        slots = capacity // bucket
+        weights = [-(-unit.tokens // bucket) for unit in units]
         
-        return "\n\n".join(parts)
+        best = [0.0] * (slots + 1)
+        keep = []
+        for unit, weight in zip(units, weights):
+            taken = bytearray(slots + 1)
+            if unit.value <= 0:
+                keep.append(taken)
+                continue
+            for slot in range(slots, weight - 1, -1):
+                candidate = best[slot - weight] + unit.value
+                if candidate > best[slot]:
+                    best[slot] = candidate
+                    taken[slot] = 1
+            keep.append(taken)
+        
+        chosen = set()
+        slot = slots
+        for index in range(len(units) - 1, -1, -1):
+            if keep[index][slot]:
+                chosen.add(index)
+                slot -= weights[index]
+        return chosen
+    
+    def assemble_compressed(self,
+                            frameworks: List[str],
+                            user_role: UserRole = UserRole.DEFAULT,
+                            provider: Optional[LLMProvider] = None,
+                            min_paragraph_chars: int = 80) -> CompressedPrompt:
+        """
+        Assemble prompt with the compression pass applied to framework modules:
+        whitespace/table normalization, paragraphs already in the core dropped,
+        paragraphs and lines repeated across modules moved to one shared glossary
+        placed before the frameworks. Deduplication is kept only when it lowers
+        the token count (the glossary header costs more than a few short lines).
+        The report compares against assemble_prompt.
+        """
+        selected = self._canonical_frameworks(frameworks)
+        original = self.assemble_prompt(selected, user_role)
+        role_text = self._get_role_instructions(user_role)
+        
+        def build(modules: List[Tuple[str, str]], glossary: List[str]) -> str:
+            parts = [self.core_prompt, role_text]
+            if glossary:
+                parts.append(format_glossary(glossary))
+            parts.extend(text for _, text in modules)
+            return "\n\n".join(parts)
+        
+        normalized = [(fw, normalize_whitespace(self.framework_modules[fw])) for fw in selected]
+        modules, glossary, duplicates = deduplicate_modules(normalized, self.core_prompt, min_paragraph_chars)
+        prompt = build(modules, glossary)
+        tokens_after = self.token_counter.count(prompt, provider)
+        if duplicates or glossary:
+            plain = build(normalized, [])
+            plain_tokens = self.token_counter.count(plain, provider)
+            if plain_tokens <= tokens_after:
+                prompt, tokens_after, duplicates, glossary = plain, plain_tokens, 0, []
+        
+        report = CompressionReport(
+            chars_before=len(original),
+            chars_after=len(prompt),
+            tokens_before=self.token_counter.count(original, provider),
+            tokens_after=tokens_after,
+            duplicate_paragraphs=duplicates,
+            glossary_entries=len(glossary),
+        )
+        return CompressedPrompt(prompt=prompt, report=report)
+    
+    def compression_savings(self,
+                            combinations: List[Tuple[List[str], UserRole]],
+                            provider: Optional[LLMProvider] = None) -> Dict[Tuple[Tuple[str, ...], str], CompressionReport]:
+        """Compression report per (frameworks, role) combination"""
+        return {
+            (tuple(self._canonical_frameworks(frameworks)), user_role.value):
+                self.assemble_compressed(frameworks, user_role, provider).report
+            for frameworks, user_role in combinations
+        }
+    
+    def _template_parts(self) -> List[Tuple[str, str]]:
+        """Static report templates, security hardening and usage guide"""
+        from grc_audit_output_templates_security import REPORT_TEMPLATES_MODULE, SECURITY_HARDENING_MODULE, USAGE_GUIDE
+        return [
+            ("report_templates", REPORT_TEMPLATES_MODULE),
+            ("security_hardening", SECURITY_HARDENING_MODULE),
+            ("usage_guide", USAGE_GUIDE),
+        ]
+    
+    def _canonical_order(self, frameworks: List[str]) -> List[str]:
+        """Sort frameworks by registry order (unregistered names last, by name)"""
+        registered = self.registry.names()
+        return sorted(
+            frameworks,
+            key=lambda fw: (registered.index(fw), "") if fw in registered else (len(registered), fw)
+        )
+    
+    def _canonical_frameworks(self, frameworks: List[str]) -> List[str]:
+        """Canonical framework set: known frameworks, without duplicates, in registry order"""
+        selected: List[str] = []
+        for framework in frameworks:
+            if framework not in selected and self._ensure_loaded(framework):
+                selected.append(framework)
+        return self._canonical_order(selected)
+    
+    def _cache_key(self, frameworks: List[str], user_role: UserRole) -> Tuple:
+        """
+        Cache key for an assembled prompt.
+        Module content hashes are part of the key, so reloading changed module
+        text never serves a stale prompt; old entries simply age out of the LRU.
+        """
+        return (
+            self.core_hash,
+            user_role.value,
+            tuple((fw, self.module_hashes[fw]) for fw in frameworks),
+        )
     
     def _get_role_instructions(self, role: UserRole) -> str:
         """Get role-specific instructions"""
@@ -637,11 +1673,158 @@ class PromptAssembler:
         else:
             return "[ROLE MODE: STANDARD AUDIT]"
     
-    def estimate_tokens(self, frameworks: List[str]) -> int:
-        """Estimate total token count for prompt"""
-        core_size = len(self.core_prompt) // 4
-        framework_size = sum(self.module_sizes.get(fw, 0) for fw in frameworks)
-        return core_size + framework_size + 1000  # +1000 for role instructions
+    def estimate_tokens(self,
+                        frameworks: List[str],
+                        user_role: UserRole = UserRole.DEFAULT,
+                        provider: Optional[LLMProvider] = None) -> int:
+        """
+        Estimate total token count for the prompt assemble_prompt would build.
+        Pass provider to count with that provider's encoding.
+        """
+        selected = self._canonical_frameworks(frameworks)
+        counter = self.token_counter
+        
+        total = counter.count(self.core_prompt, provider, content_key=self.core_hash)
+        total += counter.count(self._get_role_instructions(user_role), provider)
+        for fw in selected:
+            if provider is None:
+                total += self.module_sizes[fw]
+            else:
+                total += counter.count(self.framework_modules[fw], provider, content_key=self.module_hashes[fw])
+        
+        # One "\n\n" separator between each part
+        return total + len(selected) + 1
+    
+    def estimate_tokens_by_provider(self,
+                                    frameworks: List[str],
+                                    user_role: UserRole = UserRole.DEFAULT,
+                                    providers: Optional[List[LLMProvider]] = None) -> Dict[LLMProvider, int]:
+        """estimate_tokens in each provider's encoding, for LLMRouter.select_llm"""
+        return {provider: self.estimate_tokens(frameworks, user_role, provider)
+                for provider in (providers if providers is not None else list(LLMProvider))}
+
+
+# ============================================================================
+# INCREMENTAL SESSION CONTEXT
+# ============================================================================
+
+@dataclass(frozen=True)
+class PromptSegment:
+    """Immutable piece of a session prompt with its precomputed token count"""
+    name: str
+    text: str
+    tokens: int
+    key: Optional[str] = None      # Shared-buffer key (content hash) for PromptRope
+
+
+class AuditSessionContext:
+    """
+    Turn-by-turn session context (the AuditSession pattern in
+    CONTEXT_MANAGEMENT_MODULE) kept as an ordered set of immutable segments.
+    Load/unload are O(1) dict operations, the token total is maintained
+    incrementally, and the prompt can be streamed chunk by chunk without
+    ever building the full string.
+    Layout matches assemble_prompt: core, role, then segments in load order.
+    """
+    
+    SEPARATOR = "\n\n"
+    
+    def __init__(self,
+                 assembler: PromptAssembler,
+                 user_role: UserRole = UserRole.DEFAULT,
+                 context_budget: Optional[int] = None):
+        self.assembler = assembler
+        self.context_budget = context_budget
+        self._core = PromptSegment(
+            "core", assembler.core_prompt,
+            assembler.token_counter.count(assembler.core_prompt, content_key=assembler.core_hash),
+            assembler.core_hash,
+        )
+        self._role = self._role_segment(user_role)
+        self.user_role = user_role
+        self._segments: Dict[str, PromptSegment] = {}  # Insertion-ordered
+        self._segment_tokens = 0
+    
+    def _role_segment(self, user_role: UserRole) -> PromptSegment:
+        text = self.assembler._get_role_instructions(user_role)
+        return PromptSegment("role", text, self.assembler.token_counter.count(text), f"role:{user_role.value}")
+    
+    @property
+    def token_count(self) -> int:
+        """Running token total, including one token per separator"""
+        return self._core.tokens + self._role.tokens + self._segment_tokens + len(self._segments) + 1
+    
+    @property
+    def loaded_modules(self) -> List[str]:
+        """Loaded segment names, core first"""
+        return ["core"] + list(self._segments)
+    
+    def _add(self, segment: PromptSegment) -> bool:
+        if segment.name in self._segments:
+            return True
+        if self.context_budget is not None and self.token_count + segment.tokens + 1 > self.context_budget:
+            return False  # Cannot fit
+        self._segments[segment.name] = segment
+        self._segment_tokens += segment.tokens
+        return True
+    
+    def load_framework_module(self, framework: str) -> bool:
+        """Add a framework module; False if unavailable or over context_budget"""
+        if not self.assembler._ensure_loaded(framework):
+            return False
+        return self._add(PromptSegment(
+            framework, self.assembler.framework_modules[framework], self.assembler.module_sizes[framework],
+            self.assembler.module_hashes[framework],
+        ))
+    
+    def load_controls(self, framework: str, control_ids: List[str]) -> bool:
+        """Add control-level context only (Level 3 chunking) as one segment"""
+        tree = self.assembler.section_tree(framework)
+        text = "\n\n".join(tree.control_context(control_id) for control_id in control_ids)
+        name = f"{framework}:{','.join(normalize_control_id(cid) for cid in control_ids)}"
+        return self._add(PromptSegment(name, text, self.assembler.token_counter.count(text)))
+    
+    def unload(self, name: str) -> bool:
+        """Remove a loaded segment by name (framework or control segment)"""
+        segment = self._segments.pop(name, None)
+        if segment is None:
+            return False
+        self._segment_tokens -= segment.tokens
+        return True
+    
+    def unload_framework_module(self, framework: str) -> bool:
+        """Remove a framework module loaded with load_framework_module"""
+        return self.unload(framework)
+    
+    def set_role(self, user_role: UserRole):
+        """Switch role instructions for subsequent turns"""
+        if user_role != self.user_role:
+            self._role = self._role_segment(user_role)
+            self.user_role = user_role
+    
+    def segments(self) -> List[PromptSegment]:
+        """Current segments in prompt order"""
+        return [self._core, self._role] + list(self._segments.values())
+    
+    def iter_chunks(self) -> Iterator[str]:
+        """Stream the prompt as segment texts and separators (no concatenation)"""
+        for index, segment in enumerate(self.segments()):
+            if index:
+                yield self.SEPARATOR
+            yield segment.text
+    
+    def iter_bytes(self, encoding: str = "utf-8") -> Iterator[bytes]:
+        """iter_chunks encoded for writing straight to an HTTP response body"""
+        for chunk in self.iter_chunks():
+            yield chunk.encode(encoding)
+    
+    def rope(self) -> PromptRope:
+        """Current prompt as a rope over shared module buffers (e.g. for PromptRope.write_to)"""
+        return PromptRope([(segment.key, segment.text) for segment in self.segments()])
+    
+    def get_active_prompt(self) -> str:
+        """Flat prompt string, for SDKs that require one"""
+        return "".join(self.iter_chunks())
 
 
 # Continue with output templates and security hardening in final file...
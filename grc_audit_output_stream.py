@@ -0,0 +1,264 @@
+"""
+GRC AUDIT SYSTEM - PAGINATED OUTPUT STREAM
+======================================================================
+Streams long responses past the per-role output budgets of
+CONTEXT_MANAGEMENT_MODULE (Board 4K, CISO 16K, Analyst 32K, Auditor 16K)
+without "Type 'continue'": when a page nears its budget or max_tokens,
+a continuation call with a minimal resume context is issued
+automatically and the pages are stitched into one incremental stream.
+Memory is bounded by one page's tail, not by the response length
+"""
+
+from typing import AsyncIterator, Dict, List, Optional
+from contextlib import aclosing
+from dataclasses import dataclass, replace
+import re
+
+from grc_audit_orchestration_context import LLMProvider, UserRole
+from grc_audit_llm_dispatch import LLMDispatcher, LLMRequest, LLMResponse, ProviderError
+from grc_audit_cost_governor import BudgetExceededError
+
+
+# TOKEN BUDGET MANAGEMENT: Per-Role Token Budgets (CONTEXT_MANAGEMENT_MODULE)
+ROLE_OUTPUT_BUDGETS: Dict[UserRole, int] = {
+    UserRole.BOARD_CEO_CFO: 4000,
+    UserRole.CISO_HEAD_IT: 16000,
+    UserRole.GRC_ANALYST: 32000,
+    UserRole.AUDITOR: 16000,
+}
+DEFAULT_OUTPUT_BUDGET = 16000
+
+END_MARKER = "<<END OF RESPONSE>>"
+
+END_INSTRUCTION = f"\n\nWhen the whole response is complete, end it with {END_MARKER}"
+
+CONTINUATION_INSTRUCTION = """
+
+[CONTINUATION - PAGE {page}]
+Your previous output was cut off at the length limit. Continue exactly where it stopped: no preamble, no summary of earlier pages, do not repeat text.
+{structure}The previous output ended with:
+<<<
+{tail}
+>>>
+When the whole response is complete, end it with {end_marker}"""
+
+_TABLE_ROW = re.compile(r"^\s*\|.*\|\s*$")
+_TABLE_RULE = re.compile(r"^\s*\|(?:\s*:?-{3,}:?\s*\|)+\s*$")
+
+
+def page_token_budget(request: LLMRequest) -> int:
+    """Output tokens per page: the role budget, capped by request.max_output_tokens"""
+    return min(request.max_output_tokens, ROLE_OUTPUT_BUDGETS.get(request.user_role, DEFAULT_OUTPUT_BUDGET))
+
+
+@dataclass
+class PageStats:
+    """One provider call of a paginated response"""
+    index: int
+    provider: LLMProvider
+    output_tokens: int
+    finish_reason: str
+    cost_usd: float
+    repeated_chars_dropped: int = 0        # Overlap with the previous page removed while stitching
+
+
+class _ResumeState:
+    """
+    What a continuation needs to know about the output so far, in bounded
+    memory: the last tail_chars characters, the current markdown heading
+    and the header of the table being written (if any)
+    """
+
+    def __init__(self, tail_chars: int):
+        self.tail_chars = tail_chars
+        self.tail = ""
+        self.heading: Optional[str] = None
+        self.table_header: Optional[List[str]] = None
+        self._line = ""
+        self._previous_line = ""
+
+    def feed(self, text: str):
+        self.tail = (self.tail + text)[-self.tail_chars:]
+        lines = (self._line + text).split("\n")
+        self._line = lines.pop()[-self.tail_chars:]  # Unterminated line so far
+        for line in lines:
+            self._end_line(line)
+
+    def _end_line(self, line: str):
+        if line.lstrip().startswith("#"):
+            self.heading = line.strip()
+            self.table_header = None
+        elif _TABLE_RULE.match(line) and _TABLE_ROW.match(self._previous_line):
+            self.table_header = [self._previous_line, line]
+        elif line.strip() and not _TABLE_ROW.match(line):
+            self.table_header = None
+        self._previous_line = line[-self.tail_chars:]
+
+    def continuation(self, page: int) -> str:
+        structure = ""
+        if self.heading:
+            structure += f"Current section: {self.heading}\n"
+        if self.table_header:
+            structure += ("You are inside a table with this header; continue with the next row "
+                          "and do not repeat the header:\n" + "\n".join(self.table_header) + "\n")
+        return CONTINUATION_INSTRUCTION.format(page=page, structure=structure, tail=self.tail, end_marker=END_MARKER)
+
+
+def _overlap(tail: str, text: str) -> int:
+    """Length of the longest prefix of text that repeats the end of tail"""
+    for length in range(min(len(tail), len(text)), 0, -1):
+        if tail.endswith(text[:length]):
+            return length
+    return 0
+
+
+class PaginatedOutputStream:
+    """
+    Async iterator of text deltas for one logical response.
+    Each page is a dispatch_stream() call limited to page_token_budget();
+    a page that ends by length (or within near_budget of its budget)
+    without END_MARKER triggers a continuation on the same provider,
+    carrying only the original request plus the resume state. At the
+    start of each continuation, text repeating the previous tail (and a
+    re-emitted table header) is dropped; END_MARKER is never emitted.
+    Continuations never fail over to another model and are budgeted like
+    the first page: if one fails or is refused by the governor, the
+    stream ends with complete=False and the exception in error.
+
+        stream = PaginatedOutputStream(dispatcher, request)
+        async for text in stream:
+            send(text)
+        stream.complete, stream.error, stream.pages, stream.total_cost_usd
+    """
+
+    def __init__(self,
+                 dispatcher: LLMDispatcher,
+                 request: LLMRequest,
+                 provider: Optional[LLMProvider] = None,
+                 page_tokens: Optional[int] = None,
+                 max_pages: int = 8,
+                 near_budget: float = 0.05,
+                 tail_chars: int = 600,
+                 min_overlap_chars: int = 12,
+                 session_id: Optional[str] = None,
+                 tenant_id: Optional[str] = None):
+        self.dispatcher = dispatcher
+        self.request = request
+        self.provider = provider
+        self.page_tokens = page_tokens if page_tokens is not None else page_token_budget(request)
+        self.max_pages = max_pages
+        self.near_budget = near_budget
+        self.min_overlap_chars = min_overlap_chars
+        self.session_id = session_id
+        self.tenant_id = tenant_id
+        self.pages: List[PageStats] = []
+        self.complete = False              # Ended with END_MARKER or stopped naturally (not cut at max_pages)
+        self.error: Optional[Exception] = None  # Why a continuation page ended the stream early
+        self._state = _ResumeState(tail_chars)
+        self._started = False
+
+    @property
+    def total_cost_usd(self) -> float:
+        return sum(page.cost_usd for page in self.pages)
+
+    @property
+    def output_tokens(self) -> int:
+        return sum(page.output_tokens for page in self.pages)
+
+    def _page_request(self, page: int) -> LLMRequest:
+        suffix = END_INSTRUCTION if page == 0 else self._state.continuation(page + 1)
+        return replace(
+            self.request,
+            user_message=self.request.user_message + suffix,
+            max_output_tokens=self.page_tokens,
+            cacheable=False,
+            metadata={**self.request.metadata, "page": page},
+        )
+
+    def _needs_continuation(self, response: LLMResponse, ended: bool) -> bool:
+        if ended:
+            return False
+        return (response.finish_reason == "length"
+                or response.output_tokens >= self.page_tokens * (1 - self.near_budget))
+
+    async def __aiter__(self) -> AsyncIterator[str]:
+        if self._started:
+            raise RuntimeError("PaginatedOutputStream can only be iterated once")
+        self._started = True
+        provider = self.provider
+
+        for page in range(self.max_pages):
+            pending = ""                   # Held back: possible END_MARKER prefix, or unchecked page-start overlap
+            checking_overlap = page > 0
+            dropped = 0
+            ended = False
+            response: Optional[LLMResponse] = None
+
+            stream = self.dispatcher.dispatch_stream(
+                self._page_request(page), provider=provider, session_id=self.session_id, tenant_id=self.tenant_id,
+                failover=page == 0,
+            )
+            try:
+                async with aclosing(stream) as chunks:
+                    async for chunk in chunks:
+                        if chunk.response is not None:
+                            response = chunk.response
+                            continue
+                        if ended:
+                            continue       # Anything after END_MARKER is discarded
+                        pending += chunk.text
+                        marker = pending.find(END_MARKER)
+                        if marker >= 0:
+                            pending, ended = pending[:marker], True
+                        if checking_overlap:
+                            if len(pending) < len(self._state.tail) and not ended:
+                                continue
+                            pending, dropped = self._stitch(pending)
+                            checking_overlap = False
+                        emit = pending if ended else pending[:len(pending) - self._marker_prefix(pending)]
+                        pending = pending[len(emit):]
+                        if emit:
+                            self._state.feed(emit)
+                            yield emit
+            except (ProviderError, BudgetExceededError) as error:
+                if page == 0:
+                    raise
+                self.error = error         # Text already yielded stays; the response is incomplete
+                return
+
+            if checking_overlap:
+                pending, dropped = self._stitch(pending)
+            if pending:
+                self._state.feed(pending)
+                yield pending
+            provider = response.provider
+            self.pages.append(PageStats(page, response.provider, response.output_tokens,
+                                        response.finish_reason, response.cost_usd, dropped))
+            if not self._needs_continuation(response, ended):
+                self.complete = True
+                return
+
+    @staticmethod
+    def _marker_prefix(text: str) -> int:
+        """Length of the longest suffix of text that could be the start of END_MARKER"""
+        for length in range(min(len(text), len(END_MARKER) - 1), 0, -1):
+            if END_MARKER.startswith(text[-length:]):
+                return length
+        return 0
+
+    def _stitch(self, text: str):
+        """Drop the start of a continuation that repeats the previous page; returns (text, chars dropped)"""
+        original = len(text)
+        if self._state.table_header:
+            stripped = text.lstrip("\n")
+            for header_line in self._state.table_header:
+                first, _, rest = stripped.partition("\n")
+                if first.strip() != header_line.strip():
+                    break
+                stripped = rest
+            else:
+                text = stripped
+        length = _overlap(self._state.tail, text)
+        if length >= self.min_overlap_chars:
+            text = text[length:]
+        return text, original - len(text)
@@ -4,9 +4,14 @@ GRC AUDIT SYSTEM - OUTPUT TEMPLATES & SECURITY HARDENING (Part 7 - FINAL)
 Report Templates, Prompt Injection Defense, Usage Guide
 """
 
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 import json
+import threading
+
+from grc_audit_orchestration_context import (
+    FRAMEWORK_REGISTRY, FrameworkRegistry, PromptAssembler, PromptCache, PromptCacheStats, UserRole
+)
 
 
 # ============================================================================
@@ -824,25 +829,95 @@ For technical support, framework updates, or custom integrations:
 # MASTER INTEGRATION FILE
 # ============================================================================
 
-def generate_full_system_prompt(frameworks: List[str], user_role: UserRole = UserRole.DEFAULT) -> str:
+class PromptEngine:
     """
-    Generate complete system prompt with selected frameworks.
-    This is the main entry point for LLM integration.
+    Long-lived, thread-safe prompt engine shared by every caller in the process.
+    Framework modules are loaded once; full system prompts are built once per
+    (frameworks, role, content) combination and then served from the cache.
     """
-    from grc_audit_system_prompt import CORE_SYSTEM_IDENTITY, VIBE_DIRECTIVES, DO_NOT_TOUCH_CONSTRAINTS, PRIMARY_FUNCTION, REGULATORY_TRIAGE_MODULE
-    from grc_audit_orchestration_context import PromptAssembler
     
-    assembler = PromptAssembler()
-    assembler.load_framework_modules()
+    def __init__(self,
+                 prompt_cache: Optional[PromptCache] = None,
+                 registry: Optional[FrameworkRegistry] = None):
+        self.prompt_cache = prompt_cache if prompt_cache is not None else PromptCache()
+        self.registry = registry if registry is not None else FRAMEWORK_REGISTRY
+        self._lock = threading.Lock()
+        self._assembler = PromptAssembler(prompt_cache=self.prompt_cache, registry=self.registry)
     
-    full_prompt = assembler.assemble_prompt(frameworks, user_role)
+    @property
+    def assembler(self) -> PromptAssembler:
+        """Current assembler (replaced atomically by reload)"""
+        return self._assembler
     
-    # Append report templates and security hardening
-    full_prompt += "\n\n" + REPORT_TEMPLATES_MODULE
-    full_prompt += "\n\n" + SECURITY_HARDENING_MODULE
-    full_prompt += "\n\n" + USAGE_GUIDE
+    def full_system_prompt(self, frameworks: List[str], user_role: UserRole = UserRole.DEFAULT) -> str:
+        """Core + role + frameworks + report templates, security hardening and usage guide"""
+        assembler = self._assembler
+        selected = assembler._canonical_frameworks(frameworks)
+        cache_key = ("full_system",) + assembler._cache_key(selected, user_role)
+        
+        cached = self.prompt_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        full_prompt = "\n\n".join([
+            assembler.assemble_prompt(selected, user_role),
+            # Append report templates and security hardening
+            REPORT_TEMPLATES_MODULE,
+            SECURITY_HARDENING_MODULE,
+            USAGE_GUIDE,
+        ])
+        self.prompt_cache.put(cache_key, full_prompt)
+        return full_prompt
     
-    return full_prompt
+    def warm_up(self, combinations: Optional[List[Tuple[List[str], UserRole]]] = None) -> List[str]:
+        """
+        Load every available framework module and prebuild the given
+        (frameworks, role) combinations. Returns the frameworks that loaded.
+        Call once at worker startup.
+        """
+        assembler = self._assembler
+        assembler.load_framework_modules()
+        for frameworks, user_role in combinations or []:
+            self.full_system_prompt(frameworks, user_role)
+        return list(assembler.framework_modules)
+    
+    def reload(self, reimport: bool = True):
+        """
+        Pick up changed framework text: re-import provider modules, drop cached
+        prompts and swap in a fresh assembler. In-flight calls finish on the old one.
+        """
+        with self._lock:
+            self.registry.reload(reimport=reimport)
+            self.prompt_cache.clear()
+            self._assembler = PromptAssembler(prompt_cache=self.prompt_cache, registry=self.registry)
+    
+    def stats(self) -> PromptCacheStats:
+        """Prompt cache counters"""
+        return self.prompt_cache.stats()
+
+
+_prompt_engine: Optional[PromptEngine] = None
+_prompt_engine_lock = threading.Lock()
+
+
+def get_prompt_engine() -> PromptEngine:
+    """Process-wide PromptEngine, created on first use"""
+    global _prompt_engine
+    if _prompt_engine is None:
+        with _prompt_engine_lock:
+            if _prompt_engine is None:
+                _prompt_engine = PromptEngine()
+    return _prompt_engine
+
+
+def generate_full_system_prompt(frameworks: List[str], user_role: UserRole = UserRole.DEFAULT) -> str:
+    """
+    Generate complete system prompt with selected frameworks.
+    This is the main entry point for LLM integration.
+    Served by the process-wide PromptEngine; call get_prompt_engine().warm_up()
+    at startup and .reload() after framework modules change.
+    """
+    return get_prompt_engine().full_system_prompt(frameworks, user_role)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,286 @@
+"""
+GRC AUDIT SYSTEM - AUDIT PLAN SCHEDULER
+======================================================================
+Plans a whole multi-framework audit (framework, control and report tasks
+with dependencies) across providers at once: minimizes makespan or cost
+under a budget while respecting context windows, per-provider
+concurrency and RPM/TPM limits, then executes the plan with maximum
+parallelism through LLMDispatcher
+"""
+
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from dataclasses import dataclass, field
+import asyncio
+
+from grc_audit_orchestration_context import ROLE_PINNED_PROVIDERS, CircuitState, LLMProvider, LLMRouter, UserRole
+from grc_audit_llm_dispatch import LLMDispatcher, LLMRequest, LLMResponse, ProviderLimits
+
+
+@dataclass
+class PlanTask:
+    """One node of the audit task graph"""
+    task_id: str
+    task_type: str
+    input_tokens: int
+    output_tokens: int
+    user_role: UserRole = UserRole.DEFAULT
+    depends_on: Tuple[str, ...] = ()
+    request: Optional[LLMRequest] = None            # Or built at run time by a request_factory
+    providers: Optional[Tuple[LLMProvider, ...]] = None  # Restrict eligible providers
+
+
+@dataclass
+class Assignment:
+    """Planned placement of one task"""
+    task_id: str
+    provider: LLMProvider
+    start_s: float
+    finish_s: float
+    cost_usd: float
+
+
+@dataclass
+class Schedule:
+    """Planner output"""
+    objective: str
+    assignments: Dict[str, Assignment]
+    order: List[str]                                # Task IDs in planning order (dependencies first)
+    makespan_s: float
+    total_cost_usd: float
+    budget_usd: Optional[float] = None
+
+
+@dataclass
+class PlanResult:
+    """Execution outcome of a Schedule"""
+    responses: Dict[str, LLMResponse] = field(default_factory=dict)
+    failures: Dict[str, BaseException] = field(default_factory=dict)
+    skipped: List[str] = field(default_factory=list)  # Not run because a dependency failed
+    wall_time_s: float = 0.0
+
+
+class _ProviderTimeline:
+    """Planner-side model of one provider: concurrency slots plus RPM/TPM pacing"""
+
+    def __init__(self, limits: ProviderLimits):
+        self.slots = [0.0] * max(1, limits.max_concurrency)  # Time each slot becomes free
+        self.request_interval = 60.0 / limits.requests_per_minute if limits.requests_per_minute else 0.0
+        self.token_rate = limits.tokens_per_minute / 60.0 if limits.tokens_per_minute else None
+        self.request_cursor = 0.0
+        self.token_cursor = 0.0
+
+    def earliest_start(self, ready_s: float, tokens: int) -> Tuple[float, int]:
+        slot = min(range(len(self.slots)), key=self.slots.__getitem__)
+        start = max(ready_s, self.slots[slot], self.request_cursor)
+        if self.token_rate:
+            # Tokens drain at the TPM rate: a call can start once earlier calls' tokens are paid for
+            start = max(start, self.token_cursor - tokens / self.token_rate)
+        return start, slot
+
+    def book(self, slot: int, start_s: float, finish_s: float, tokens: int):
+        self.slots[slot] = finish_s
+        self.request_cursor = max(self.request_cursor, start_s) + self.request_interval
+        if self.token_rate:
+            self.token_cursor = max(self.token_cursor, start_s) + tokens / self.token_rate
+
+
+class AuditPlanScheduler:
+    """
+    List scheduler (HEFT-style) over the task DAG.
+    Tasks are placed in order of upward rank (longest remaining path),
+    each on the eligible provider that finishes it earliest ("makespan")
+    or most cheaply ("cost"). With a budget, a provider is only eligible if
+    the remaining tasks can still be completed at their cheapest prices.
+    Durations come from the router's latency model (p50) plus output
+    tokens at tokens_per_second.
+    """
+
+    def __init__(self,
+                 router: Optional[LLMRouter] = None,
+                 limits: Optional[Dict[LLMProvider, ProviderLimits]] = None,
+                 tokens_per_second: Optional[Dict[LLMProvider, float]] = None,
+                 default_tokens_per_second: float = 60.0):
+        self.router = router if router is not None else LLMRouter()
+        self.limits = limits or {}
+        self.tokens_per_second = tokens_per_second or {}
+        self.default_tokens_per_second = default_tokens_per_second
+
+    # ------------------------------------------------------------------
+    # Estimates
+    # ------------------------------------------------------------------
+
+    def duration_s(self, task: PlanTask, provider: LLMProvider) -> float:
+        latency_ms = self.router.latency_model.estimate(provider).p50_ms
+        rate = self.tokens_per_second.get(provider, self.default_tokens_per_second)
+        return latency_ms / 1000 + task.output_tokens / rate
+
+    def cost_usd(self, task: PlanTask, provider: LLMProvider) -> float:
+        return self.router.estimate_cost(provider, task.input_tokens, task.output_tokens)
+
+    def eligible_providers(self, task: PlanTask) -> List[LLMProvider]:
+        """Providers whose context window fits and whose circuit is not open"""
+        if task.providers is not None:
+            candidates = list(task.providers)
+        elif task.user_role in ROLE_PINNED_PROVIDERS:
+            candidates = [ROLE_PINNED_PROVIDERS[task.user_role]]
+        else:
+            candidates = list(self.router.llm_capabilities)
+        eligible = [
+            provider for provider in candidates
+            if provider in self.router.llm_capabilities
+            and self.router.llm_capabilities[provider].context_window >= task.input_tokens + task.output_tokens
+            and self.router.circuit_breakers[provider].state != CircuitState.OPEN
+        ]
+        if not eligible:
+            raise ValueError(f"No eligible provider for task '{task.task_id}' ({task.input_tokens} input tokens)")
+        return eligible
+
+    # ------------------------------------------------------------------
+    # Planning
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _dependents(tasks: Dict[str, PlanTask]) -> Dict[str, List[str]]:
+        """Task ID -> IDs of the tasks that depend on it"""
+        dependents: Dict[str, List[str]] = {task_id: [] for task_id in tasks}
+        for task in tasks.values():
+            for dependency in task.depends_on:
+                if dependency not in tasks:
+                    raise ValueError(f"Task '{task.task_id}' depends on unknown task '{dependency}'")
+                dependents[dependency].append(task.task_id)
+        return dependents
+
+    @staticmethod
+    def _topological_order(tasks: Dict[str, PlanTask], dependents: Dict[str, List[str]]) -> List[str]:
+        indegree = {task_id: len(task.depends_on) for task_id, task in tasks.items()}
+        order = [task_id for task_id, degree in indegree.items() if degree == 0]
+        for task_id in order:  # order grows while iterating
+            for dependent in dependents[task_id]:
+                indegree[dependent] -= 1
+                if indegree[dependent] == 0:
+                    order.append(dependent)
+        if len(order) != len(tasks):
+            raise ValueError("Audit plan has a dependency cycle")
+        return order
+
+    def plan(self,
+             tasks: Sequence[PlanTask],
+             objective: str = "makespan",
+             budget_usd: Optional[float] = None) -> Schedule:
+        """
+        objective: "makespan" (finish earliest) | "cost" (cheapest).
+        Raises ValueError if a task fits no provider or the budget cannot cover
+        every task even at the cheapest eligible prices.
+        """
+        if objective not in ("makespan", "cost"):
+            raise ValueError(f"Unknown objective '{objective}'")
+        by_id = {task.task_id: task for task in tasks}
+        dependents = self._dependents(by_id)
+        topological = self._topological_order(by_id, dependents)
+        eligible = {task_id: self.eligible_providers(by_id[task_id]) for task_id in topological}
+        min_cost = {task_id: min(self.cost_usd(by_id[task_id], p) for p in eligible[task_id]) for task_id in topological}
+        if budget_usd is not None and sum(min_cost.values()) > budget_usd:
+            raise ValueError(f"Budget ${budget_usd:.2f} below minimum plan cost ${sum(min_cost.values()):.2f}")
+
+        # Upward rank: mean duration plus the longest path through dependents
+        mean_duration = {
+            task_id: sum(self.duration_s(by_id[task_id], p) for p in eligible[task_id]) / len(eligible[task_id])
+            for task_id in topological
+        }
+        rank: Dict[str, float] = {}
+        for task_id in reversed(topological):
+            rank[task_id] = mean_duration[task_id] + max((rank[s] for s in dependents[task_id]), default=0.0)
+        position = {task_id: index for index, task_id in enumerate(topological)}
+        # Rank order respects dependencies (a dependency always outranks its dependents)
+        order = sorted(topological, key=lambda task_id: (-rank[task_id], position[task_id]))
+
+        timelines = {
+            provider: _ProviderTimeline(self.limits.get(provider, ProviderLimits()))
+            for provider in self.router.llm_capabilities
+        }
+        assignments: Dict[str, Assignment] = {}
+        remaining_min_cost = sum(min_cost.values())
+        spent = 0.0
+        for task_id in order:
+            task = by_id[task_id]
+            remaining_min_cost -= min_cost[task_id]
+            ready = max((assignments[d].finish_s for d in task.depends_on), default=0.0)
+            tokens = task.input_tokens + task.output_tokens
+
+            best = None
+            for provider in eligible[task_id]:
+                cost = self.cost_usd(task, provider)
+                if budget_usd is not None and spent + cost + remaining_min_cost > budget_usd + 1e-9:
+                    continue  # Would leave too little budget for the remaining tasks
+                start, slot = timelines[provider].earliest_start(ready, tokens)
+                finish = start + self.duration_s(task, provider)
+                score = (finish, cost) if objective == "makespan" else (cost, finish)
+                if best is None or score < best[0]:
+                    best = (score, provider, slot, start, finish, cost)
+
+            _, provider, slot, start, finish, cost = best
+            timelines[provider].book(slot, start, finish, tokens)
+            assignments[task_id] = Assignment(task_id, provider, start, finish, cost)
+            spent += cost
+
+        return Schedule(
+            objective=objective,
+            assignments=assignments,
+            order=order,
+            makespan_s=max((a.finish_s for a in assignments.values()), default=0.0),
+            total_cost_usd=spent,
+            budget_usd=budget_usd,
+        )
+
+    # ------------------------------------------------------------------
+    # Execution
+    # ------------------------------------------------------------------
+
+    async def execute(self,
+                      tasks: Sequence[PlanTask],
+                      schedule: Schedule,
+                      dispatcher: LLMDispatcher,
+                      request_factory: Optional[Callable[[PlanTask, Dict[str, LLMResponse]], LLMRequest]] = None
+                      ) -> PlanResult:
+        """
+        Run every task on its planned provider as soon as its dependencies
+        have completed (planned start times are estimates, not waits);
+        the dispatcher's per-provider semaphores and buckets enforce limits.
+        request_factory(task, dependency responses) builds requests that need
+        upstream output (e.g. an executive summary over framework findings).
+        Tasks never fail over to a provider the plan did not cost; a failed
+        task skips everything that depends on it.
+        """
+        by_id = {task.task_id: task for task in tasks}
+        result = PlanResult()
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        finished: Dict[str, asyncio.Future] = {task_id: loop.create_future() for task_id in by_id}
+
+        async def run(task: PlanTask):
+            for dependency in task.depends_on:
+                if not await finished[dependency]:
+                    result.skipped.append(task.task_id)
+                    finished[task.task_id].set_result(False)
+                    return
+            try:
+                upstream = {d: result.responses[d] for d in task.depends_on}
+                request = request_factory(task, upstream) if request_factory is not None else task.request
+                if request is None:
+                    raise ValueError(f"Task '{task.task_id}' has no request and no request_factory")
+                result.responses[task.task_id] = await dispatcher.dispatch(
+                    request, provider=schedule.assignments[task.task_id].provider, failover=False
+                )
+                finished[task.task_id].set_result(True)
+            except Exception as error:
+                result.failures[task.task_id] = error
+                finished[task.task_id].set_result(False)
+
+        runners = [loop.create_task(run(by_id[task_id])) for task_id in schedule.order]
+        try:
+            await asyncio.gather(*runners)
+        finally:
+            for runner in runners:
+                runner.cancel()
+        result.wall_time_s = loop.time() - started
+        return result
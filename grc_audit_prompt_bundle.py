@@ -0,0 +1,180 @@
+"""
+GRC AUDIT SYSTEM - PRECOMPILED PROMPT BUNDLE
+======================================================================
+Memory-mapped reader that assembles prompts from slices of a bundle
+written by grc_audit_prompt_bundle_build. Standard library only: worker
+processes never import the prompt modules, so their text is held once
+in the shared page cache instead of once per process. Providers and
+roles are plain string keys (LLMProvider / UserRole values; enum
+members are accepted too).
+
+Bundle layout:
+    MAGIC (8 bytes) | manifest length (uint32, big-endian) | manifest (UTF-8 JSON) | payload
+Manifest offsets are byte offsets into the payload.
+"""
+
+from typing import Dict, List, Optional, Union
+from dataclasses import dataclass
+from enum import Enum
+import hashlib
+import json
+import mmap
+import struct
+
+from grc_audit_prompt_rope import PromptRope
+
+
+BUNDLE_MAGIC = b"GRCPBND1"
+BUNDLE_FORMAT_VERSION = 2
+HEADER_LENGTH = struct.Struct(">I")
+DEFAULT_TOKEN_KEY = "default"              # PromptAssembler's count (DEFAULT_ENCODING, no provider)
+
+Key = Union[str, Enum]                     # "gemini_3" or LLMProvider.GEMINI_3, "auditor" or UserRole.AUDITOR
+
+
+def _key(value: Key) -> str:
+    return value.value if isinstance(value, Enum) else value
+
+
+def _content_hash(content: str) -> str:
+    """Same digest as grc_audit_orchestration_context.content_hash"""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()[:16]
+
+
+@dataclass
+class BundlePart:
+    """Location and metadata of one prompt part inside the bundle payload"""
+    name: str
+    kind: str                      # "core" | "role" | "framework" | "template"
+    offset: int
+    length: int
+    content_hash: str
+    tokens: Dict[str, int]         # Provider key (or DEFAULT_TOKEN_KEY) -> token count
+
+
+# ============================================================================
+# MEMORY-MAPPED RUNTIME
+# ============================================================================
+
+class PromptBundle:
+    """
+    Read-only, memory-mapped prompt bundle.
+    Worker processes that open the same file share one page-cache copy;
+    prompts are assembled from byte slices without importing prompt modules.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        # The mapping keeps its own file descriptor, so the file is closed right away
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._map[:len(BUNDLE_MAGIC)] != BUNDLE_MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a prompt bundle")
+        header_start = len(BUNDLE_MAGIC) + HEADER_LENGTH.size
+        (header_length,) = HEADER_LENGTH.unpack(self._map[len(BUNDLE_MAGIC):header_start])
+        self.manifest = json.loads(self._map[header_start:header_start + header_length].decode("utf-8"))
+        if self.manifest.get("format_version") != BUNDLE_FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"Unsupported bundle format {self.manifest.get('format_version')}")
+
+        self._payload_start = header_start + header_length
+        self.parts: Dict[str, BundlePart] = {
+            name: BundlePart(name=name, **meta) for name, meta in self.manifest["parts"].items()
+        }
+
+    def __enter__(self) -> "PromptBundle":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """
+        Release the mapping. If part_bytes() views or ropes are still alive,
+        the bundle drops its reference instead and the pages are unmapped
+        when the last view is released.
+        """
+        if self._map is None:
+            return
+        try:
+            self._map.close()
+        except BufferError:
+            pass  # Exported memoryviews keep the mapping alive until they are gone
+        self._map = None
+
+    @property
+    def version(self) -> str:
+        return self.manifest["bundle_version"]
+
+    def _slice(self, offset: int, length: int) -> memoryview:
+        if self._map is None:
+            raise ValueError("Prompt bundle is closed")
+        start = self._payload_start + offset
+        return memoryview(self._map)[start:start + length]
+
+    def part_bytes(self, name: str) -> memoryview:
+        """Zero-copy view of a part's UTF-8 bytes"""
+        part = self.parts[name]
+        return self._slice(part.offset, part.length)
+
+    def part_text(self, name: str) -> str:
+        """Decoded text of a part"""
+        return str(self.part_bytes(name), "utf-8")
+
+    def token_count(self, name: str, provider: Optional[Key] = None) -> int:
+        """Precomputed token count of a part (PromptAssembler's default encoding when provider is None)"""
+        return self.parts[name].tokens[_key(provider) if provider is not None else DEFAULT_TOKEN_KEY]
+
+    def verify(self) -> List[str]:
+        """Names of parts whose content no longer matches the recorded hash"""
+        return [name for name, part in self.parts.items() if _content_hash(self.part_text(name)) != part.content_hash]
+
+    def _canonical_frameworks(self, frameworks: List[str]) -> List[str]:
+        """Bundled frameworks among frameworks, in registry order (as PromptAssembler)"""
+        requested = set(frameworks)
+        return [framework for framework in self.manifest["frameworks"] if framework in requested]
+
+    def prompt_part_names(self, frameworks: List[str], user_role: Key = "default") -> List[str]:
+        """Part names in PromptAssembler.assemble_prompt order"""
+        return ["core", f"role:{_key(user_role)}"] + self._canonical_frameworks(frameworks)
+
+    def assemble_bytes(self, part_names: List[str]) -> bytes:
+        """Join parts straight from the mapping (one copy, no str round-trip)"""
+        return b"\n\n".join(self.part_bytes(name) for name in part_names)
+
+    def assemble_prompt(self, frameworks: List[str], user_role: Key = "default") -> str:
+        """Same output as PromptAssembler.assemble_prompt, built from bundle slices"""
+        return self.assemble_bytes(self.prompt_part_names(frameworks, user_role)).decode("utf-8")
+
+    def assemble_rope(self, frameworks: List[str], user_role: Key = "default") -> PromptRope:
+        """assemble_prompt as a rope of zero-copy mapping slices (for socket writes)"""
+        return PromptRope([(None, self.part_bytes(name)) for name in self.prompt_part_names(frameworks, user_role)])
+    
+    def full_system_prompt(self, frameworks: List[str], user_role: Key = "default") -> str:
+        """Same output as generate_full_system_prompt, built from bundle slices"""
+        names = self.prompt_part_names(frameworks, user_role) + ["report_templates", "security_hardening", "usage_guide"]
+        return self.assemble_bytes(names).decode("utf-8")
+
+    def estimate_tokens(self,
+                        frameworks: List[str],
+                        user_role: Key = "default",
+                        provider: Optional[Key] = None) -> int:
+        """Token estimate from precomputed per-part counts (plus one per separator)"""
+        names = self.prompt_part_names(frameworks, user_role)
+        return sum(self.token_count(name, provider) for name in names) + len(names) - 1
+
+    def control_context(self, framework: str, control_id: str) -> str:
+        """Control-level context (see FrameworkSections.control_context) from bundle slices"""
+        from grc_audit_framework_sections import normalize_control_id
+
+        index = self.manifest["sections"].get(framework)
+        entry = index["controls"].get(normalize_control_id(control_id)) if index else None
+        if entry is None:
+            raise ValueError(f"Unknown control '{control_id}' for framework '{framework}'")
+
+        lines = [index["title"], "", entry["domain"], str(self._slice(entry["offset"], entry["length"]), "utf-8")]
+        if entry["evidence"]:
+            lines += ["", "Evidence Required:"] + [f"- {item}" for item in entry["evidence"]]
+        return "\n".join(lines)
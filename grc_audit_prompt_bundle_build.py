@@ -0,0 +1,121 @@
+"""
+GRC AUDIT SYSTEM - PROMPT BUNDLE BUILD STEP
+======================================================================
+Serializes every prompt part (core, role instructions, framework and
+template modules) into one versioned bundle file for PromptBundle.
+Imports the prompt modules; run at build/deploy time, not in workers.
+
+    python grc_audit_prompt_bundle_build.py <output path> [bundle version]
+"""
+
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime, timezone
+import json
+import os
+import sys
+
+from grc_audit_orchestration_context import (
+    LLMProvider, PromptAssembler, TokenCounter, UserRole, content_hash
+)
+from grc_audit_prompt_bundle import BUNDLE_FORMAT_VERSION, BUNDLE_MAGIC, DEFAULT_TOKEN_KEY, HEADER_LENGTH
+
+
+def build_prompt_bundle(path: str,
+                        bundle_version: Optional[str] = None,
+                        assembler: Optional[PromptAssembler] = None,
+                        token_counter: Optional[TokenCounter] = None) -> Dict:
+    """
+    Serialize core prompt, role instructions, every available framework
+    module and the template modules into a single bundle file.
+    Includes per-provider token counts, content hashes and the control index.
+    Returns the manifest that was written.
+    """
+    from grc_audit_output_templates_security import REPORT_TEMPLATES_MODULE, SECURITY_HARDENING_MODULE, USAGE_GUIDE
+
+    assembler = assembler if assembler is not None else PromptAssembler()
+    counter = token_counter if token_counter is not None else TokenCounter()
+    assembler.load_framework_modules()
+
+    parts: List[Tuple[str, str, str]] = [("core", "core", assembler.core_prompt)]
+    for role in UserRole:
+        parts.append((f"role:{role.value}", "role", assembler._get_role_instructions(role)))
+    for name, text in (("report_templates", REPORT_TEMPLATES_MODULE),
+                       ("security_hardening", SECURITY_HARDENING_MODULE),
+                       ("usage_guide", USAGE_GUIDE)):
+        parts.append((name, "template", text))
+    framework_names = [fw for fw in assembler.registry.names() if fw in assembler.framework_modules]
+    for framework in framework_names:
+        parts.append((framework, "framework", assembler.framework_modules[framework]))
+
+    payload = bytearray()
+    manifest_parts: Dict[str, Dict] = {}
+    part_offsets: Dict[str, int] = {}
+    for name, kind, text in parts:
+        data = text.encode("utf-8")
+        digest = content_hash(text)
+        part_offsets[name] = len(payload)
+        manifest_parts[name] = {
+            "kind": kind,
+            "offset": len(payload),
+            "length": len(data),
+            "content_hash": digest,
+            "tokens": {
+                DEFAULT_TOKEN_KEY: counter.count(text, content_key=digest),
+                **{provider.value: counter.count(text, provider, content_key=digest) for provider in LLMProvider},
+            },
+        }
+        payload += data
+
+    manifest = {
+        "format_version": BUNDLE_FORMAT_VERSION,
+        "bundle_version": bundle_version or datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S"),
+        "created": datetime.now(timezone.utc).isoformat(),
+        "parts": manifest_parts,
+        "frameworks": framework_names,
+        "registry_order": assembler.registry.names(),
+        "unavailable": dict(assembler.registry.load_errors),
+        "sections": {fw: _section_index(assembler, fw, part_offsets[fw]) for fw in framework_names},
+    }
+
+    header = json.dumps(manifest, ensure_ascii=False, sort_keys=True).encode("utf-8")
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(BUNDLE_MAGIC)
+        f.write(HEADER_LENGTH.pack(len(header)))
+        f.write(header)
+        f.write(payload)
+    os.replace(tmp_path, path)  # Readers never see a half-written bundle
+    return manifest
+
+
+def _section_index(assembler: PromptAssembler, framework: str, module_offset: int) -> Dict:
+    """Control index for one framework: byte slices of each control's text plus its evidence"""
+    tree = assembler.section_tree(framework)
+    module_text = assembler.framework_modules[framework]
+    controls: Dict[str, Dict] = {}
+    for control_id in tree.control_ids():
+        control = tree.control(control_id)
+        domain = tree.domain_of(control_id)
+        start = module_text.find(control.text)
+        if start < 0:
+            continue  # Not a verbatim slice; fall back to full-module loading for this control
+        byte_start = module_offset + len(module_text[:start].encode("utf-8"))
+        controls[control_id] = {
+            "offset": byte_start,
+            "length": len(control.text.encode("utf-8")),
+            "domain": domain.title,
+            "evidence": tree.control_evidence(control_id),
+        }
+    return {"title": tree.title, "controls": controls}
+
+
+if __name__ == "__main__":
+    # Build step: python grc_audit_prompt_bundle_build.py <output path> [bundle version]
+    if len(sys.argv) < 2:
+        print("Usage: python grc_audit_prompt_bundle_build.py <output path> [bundle version]")
+        sys.exit(2)
+    manifest = build_prompt_bundle(sys.argv[1], bundle_version=sys.argv[2] if len(sys.argv) > 2 else None)
+    print(f"Prompt bundle {manifest['bundle_version']} written to {sys.argv[1]}")
+    print(f"Parts: {len(manifest['parts'])} | Frameworks: {', '.join(manifest['frameworks'])}")
+    if manifest["unavailable"]:
+        print(f"Unavailable frameworks: {', '.join(manifest['unavailable'])}")
@@ -0,0 +1,171 @@
+"""
+GRC AUDIT SYSTEM - MULTI-FRAMEWORK PROMPT COMPRESSION
+======================================================================
+Optional pass for multi-framework prompts: whitespace and table-padding
+normalization, cross-module paragraph and line deduplication, shared glossary
+"""
+
+from typing import Dict, List, Tuple
+from dataclasses import dataclass
+import re
+
+
+GLOSSARY_HEADER = "[SHARED AUDIT GUIDANCE — referenced by framework modules below]"
+
+_TRAILING_SPACE = re.compile(r"[ \t]+$", re.MULTILINE)
+_BLANK_RUNS = re.compile(r"\n{3,}")
+_INNER_SPACE_RUNS = re.compile(r"(?<=\S) {2,}(?=\S)")
+_TABLE_CELL_PADDING = re.compile(r" *\| *")
+_EMPTY_TABLE_CELL = re.compile(r"\| +(?=\|)")  # "|  |" -> "| |"
+_TABLE_RULE = re.compile(r"^\|(?:\s*:?-{3,}:?\s*\|)+$")
+_PARAGRAPH_SPLIT = re.compile(r"\n[ \t]*\n")
+# "- ", "* ", "• ", "3. ", "2) ", "a) " at the start of a line
+_LIST_MARKER = re.compile(r"^[ \t]*(?:[-*•]|\d+[.)]|[a-z]\))[ \t]+")
+
+
+@dataclass
+class CompressionReport:
+    """Savings from one compression pass"""
+    chars_before: int
+    chars_after: int
+    tokens_before: int
+    tokens_after: int
+    duplicate_paragraphs: int      # Paragraph and line occurrences replaced by a glossary reference or dropped
+    glossary_entries: int
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+    @property
+    def ratio(self) -> float:
+        """tokens_after / tokens_before"""
+        return self.tokens_after / self.tokens_before if self.tokens_before else 1.0
+
+
+def normalize_whitespace(text: str) -> str:
+    """
+    Drop trailing whitespace, collapse blank-line runs and runs of inner
+    spaces, and strip Markdown table padding. Leading indentation is kept
+    because it carries the module structure.
+    """
+    lines = []
+    for line in _TRAILING_SPACE.sub("", text).split("\n"):
+        stripped = line.lstrip(" ")
+        indent = line[:len(line) - len(stripped)]
+        if stripped.startswith("|"):
+            if _TABLE_RULE.match(stripped.replace(" ", "")):
+                cells = stripped.strip("|").split("|")
+                stripped = "|" + "|".join("---" for _ in cells) + "|"
+            else:
+                stripped = _TABLE_CELL_PADDING.sub(" | ", stripped).strip()
+                stripped = _EMPTY_TABLE_CELL.sub("| ", stripped)
+        else:
+            stripped = _INNER_SPACE_RUNS.sub(" ", stripped)
+        lines.append(indent + stripped)
+    return _BLANK_RUNS.sub("\n\n", "\n".join(lines))
+
+
+def _paragraph_key(paragraph: str) -> str:
+    """Comparison key ignoring case, whitespace and list markers / numbering"""
+    return " ".join(" ".join(_LIST_MARKER.sub("", line) for line in paragraph.split("\n")).split()).lower()
+
+
+def deduplicate_modules(modules: List[Tuple[str, str]],
+                        shared_context: str = "",
+                        min_paragraph_chars: int = 80,
+                        min_line_chars: int = 60) -> Tuple[List[Tuple[str, str]], List[str], int]:
+    """
+    Deduplicate paragraphs, then single lines, across modules (name, text).
+    Text is compared ignoring case, whitespace and list markers ("- ", "3. ").
+
+    - Paragraphs and lines already present in shared_context (e.g. the core prompt) are dropped.
+    - Paragraphs appearing more than once across the modules move to a glossary;
+      every occurrence becomes a one-line reference to the glossary entry.
+    - Lines appearing in two or more modules move to the glossary too; each
+      occurrence keeps its indentation and list marker and becomes "[G<n>]".
+    Short paragraphs and lines (headings, "Audit Evidence:") are never touched.
+    Returns (modules, glossary entries, duplicate occurrences removed).
+    """
+    context_keys = {
+        _paragraph_key(p) for p in _PARAGRAPH_SPLIT.split(shared_context)
+        if len(p.strip()) >= min_paragraph_chars
+    }
+
+    counts: Dict[str, int] = {}
+    for _, text in modules:
+        for paragraph in _PARAGRAPH_SPLIT.split(text):
+            if len(paragraph.strip()) >= min_paragraph_chars:
+                key = _paragraph_key(paragraph)
+                counts[key] = counts.get(key, 0) + 1
+
+    glossary_ids: Dict[str, str] = {}
+    glossary: List[str] = []
+    removed = 0
+    result: List[Tuple[str, str]] = []
+    for name, text in modules:
+        paragraphs = []
+        for paragraph in _PARAGRAPH_SPLIT.split(text):
+            key = _paragraph_key(paragraph) if len(paragraph.strip()) >= min_paragraph_chars else None
+            if key is not None and key in context_keys:
+                removed += 1
+                continue
+            if key is not None and counts[key] > 1:
+                if key not in glossary_ids:
+                    glossary_ids[key] = f"G{len(glossary_ids) + 1}"
+                    glossary.append(f"[{glossary_ids[key]}]\n{paragraph.strip()}")
+                indent = paragraph[:len(paragraph) - len(paragraph.lstrip())].lstrip("\n")
+                paragraphs.append(f"{indent}[See shared guidance {glossary_ids[key]}]")
+                removed += 1
+                continue
+            paragraphs.append(paragraph)
+        result.append((name, "\n\n".join(paragraphs)))
+
+    result, removed = _deduplicate_lines(result, shared_context, min_line_chars, glossary_ids, glossary, removed)
+    # Each glossary entry stands in for its first occurrence
+    return result, glossary, removed - len(glossary)
+
+
+def _deduplicate_lines(modules: List[Tuple[str, str]],
+                       shared_context: str,
+                       min_line_chars: int,
+                       glossary_ids: Dict[str, str],
+                       glossary: List[str],
+                       removed: int) -> Tuple[List[Tuple[str, str]], int]:
+    """Line pass of deduplicate_modules; extends glossary_ids / glossary in place"""
+    context_keys = {
+        _paragraph_key(line) for line in shared_context.split("\n")
+        if len(line.strip()) >= min_line_chars
+    }
+
+    owners: Dict[str, set] = {}
+    for name, text in modules:
+        for line in text.split("\n"):
+            if len(line.strip()) >= min_line_chars:
+                owners.setdefault(_paragraph_key(line), set()).add(name)
+
+    result: List[Tuple[str, str]] = []
+    for name, text in modules:
+        lines = []
+        for line in text.split("\n"):
+            key = _paragraph_key(line) if len(line.strip()) >= min_line_chars else None
+            if key is not None and key in context_keys:
+                removed += 1
+                continue
+            if key is not None and len(owners[key]) > 1:
+                marker = _LIST_MARKER.match(line)
+                prefix = marker.group(0) if marker else line[:len(line) - len(line.lstrip())]
+                if key not in glossary_ids:
+                    glossary_ids[key] = f"G{len(glossary_ids) + 1}"
+                    glossary.append(f"[{glossary_ids[key]}]\n{line[len(prefix):].strip()}")
+                lines.append(f"{prefix}[{glossary_ids[key]}]")
+                removed += 1
+                continue
+            lines.append(line)
+        result.append((name, "\n".join(lines)))
+    return result, removed
+
+
+def format_glossary(entries: List[str]) -> str:
+    """Glossary section text ("" when there are no shared paragraphs)"""
+    return "\n\n".join([GLOSSARY_HEADER] + entries) if entries else ""
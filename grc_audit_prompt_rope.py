@@ -0,0 +1,146 @@
+"""
+GRC AUDIT SYSTEM - ROPE-BACKED PROMPTS
+======================================================================
+Prompt as an ordered list of references to shared, immutable module
+buffers. Written to sockets with scatter/gather I/O; flattened to a
+single str only when a provider SDK requires one
+"""
+
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+import socket
+import threading
+
+
+Segment = Union[str, bytes, memoryview]
+SEPARATOR = "\n\n"
+_SEPARATOR_BYTES = SEPARATOR.encode("utf-8")
+# Buffers per sendmsg call (POSIX IOV_MAX is at least 16; Linux allows 1024)
+_MAX_IOV = 64
+
+
+class SegmentPool:
+    """
+    Process-wide intern table of UTF-8 encoded segments, keyed by content key
+    (e.g. content_hash). Each module is encoded once and shared by every rope.
+    """
+
+    def __init__(self):
+        self._buffers: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    def encoded(self, key: str, text: str) -> bytes:
+        """UTF-8 bytes for text, encoded on first request for this key"""
+        data = self._buffers.get(key)
+        if data is None:
+            with self._lock:
+                data = self._buffers.get(key)
+                if data is None:
+                    data = text.encode("utf-8")
+                    self._buffers[key] = data
+        return data
+
+    def discard(self, key: str):
+        """Drop a buffer (e.g. after its module was reloaded with new text)"""
+        with self._lock:
+            self._buffers.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._buffers)
+
+    @property
+    def size_bytes(self) -> int:
+        return sum(len(data) for data in self._buffers.values())
+
+
+SEGMENT_POOL = SegmentPool()
+
+
+class PromptRope:
+    """
+    Immutable prompt made of shared segments joined by "\\n\\n".
+    Segments are str (with an optional pool key) or bytes-like slices
+    (e.g. PromptBundle memoryviews); no segment text is copied.
+    """
+
+    __slots__ = ("_segments", "_pool")
+
+    def __init__(self,
+                 segments: List[Tuple[Optional[str], Segment]],
+                 pool: Optional[SegmentPool] = None):
+        self._segments: Tuple[Tuple[Optional[str], Segment], ...] = tuple(segments)
+        self._pool = pool if pool is not None else SEGMENT_POOL
+
+    def __len__(self) -> int:
+        """Number of segments"""
+        return len(self._segments)
+
+    def __str__(self) -> str:
+        return self.to_str()
+
+    def to_str(self) -> str:
+        """Flatten to one str (allocates a full copy; use only for SDKs that need it)"""
+        return SEPARATOR.join(self._text(segment) for _, segment in self._segments)
+
+    def concat(self, *segments: Tuple[Optional[str], Segment]) -> "PromptRope":
+        """New rope with segments appended (shares all existing segments)"""
+        return PromptRope(list(self._segments) + list(segments), self._pool)
+
+    @staticmethod
+    def _text(segment: Segment) -> str:
+        return segment if isinstance(segment, str) else str(segment, "utf-8")
+
+    def buffers(self) -> List[Union[bytes, memoryview]]:
+        """Bytes-like buffers (segments and separators) for scatter/gather writes"""
+        buffers: List[Union[bytes, memoryview]] = []
+        for index, (key, segment) in enumerate(self._segments):
+            if index:
+                buffers.append(_SEPARATOR_BYTES)
+            if isinstance(segment, str):
+                # Unkeyed text (small, per-call parts) is encoded on the fly
+                buffers.append(self._pool.encoded(key, segment) if key is not None else segment.encode("utf-8"))
+            else:
+                buffers.append(segment)
+        return buffers
+
+    def byte_length(self) -> int:
+        """Encoded size in bytes (e.g. for Content-Length)"""
+        return sum(len(buffer) for buffer in self.buffers())
+
+    def iter_chunks(self) -> Iterator[str]:
+        """Segment texts and separators, for streaming text APIs"""
+        for index, (_, segment) in enumerate(self._segments):
+            if index:
+                yield SEPARATOR
+            yield self._text(segment)
+
+    def write_to(self, sock: socket.socket) -> int:
+        """
+        Write the prompt to a connected socket with sendmsg (writev-style
+        scatter/gather), falling back to sendall per buffer where sendmsg is
+        unavailable. Returns bytes written.
+        """
+        # Empty segments give b"": sendmsg would return 0 for them forever
+        buffers = [memoryview(buffer) for buffer in self.buffers() if buffer]
+        total = sum(len(buffer) for buffer in buffers)
+        if not hasattr(sock, "sendmsg"):
+            for buffer in buffers:
+                sock.sendall(buffer)
+            return total
+
+        while buffers:
+            sent = sock.sendmsg(buffers[:_MAX_IOV])
+            # Drop fully sent buffers, trim a partially sent one
+            while sent and buffers:
+                if sent >= len(buffers[0]):
+                    sent -= len(buffers[0])
+                    buffers.pop(0)
+                else:
+                    buffers[0] = buffers[0][sent:]
+                    sent = 0
+        return total
+
+    def write_to_stream(self, stream) -> int:
+        """Write to a file-like or asyncio StreamWriter via writelines()"""
+        buffers = self.buffers()
+        stream.writelines(buffers)
+        return sum(len(buffer) for buffer in buffers)
@@ -0,0 +1,175 @@
+"""
+GRC AUDIT SYSTEM - PROVIDER CAPABILITY REGISTRY
+======================================================================
+LLM capabilities (context windows, prices, latency, features) loaded
+from grc_audit_providers.json, with per-deployment override files and
+hot reload, so routing can be retuned without a code deploy
+
+Override files hold partial entries merged over the base config:
+    {"providers": {"gemini_3": {"cost_per_1k_tokens_input": 0.0125},
+                   "llama_4": {"enabled": false}}}
+Set GRC_AUDIT_PROVIDER_OVERRIDES to one or more override paths (os.pathsep separated).
+"""
+
+from typing import Callable, Dict, List, Optional, Sequence
+from dataclasses import fields
+import json
+import os
+import threading
+import time
+
+from grc_audit_orchestration_context import LLMCapabilities, LLMProvider, ROUTED_PROVIDERS
+
+
+DEFAULT_CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "grc_audit_providers.json")
+OVERRIDES_ENV_VAR = "GRC_AUDIT_PROVIDER_OVERRIDES"
+CONFIG_FORMAT_VERSION = 1
+DEPLOYMENTS = ("api", "self_hosted_gpu", "self_hosted_cpu")
+
+_CAPABILITY_TYPES = {f.name: f.type for f in fields(LLMCapabilities) if f.name != "provider"}
+
+
+def validate_provider_config(config: Dict) -> List[str]:
+    """
+    Problems with a merged config ([] when valid):
+    every LLMProvider needs an entry with every capability field of the
+    right type, and every provider named by routing rules must be enabled.
+    """
+    errors: List[str] = []
+    if config.get("format_version") != CONFIG_FORMAT_VERSION:
+        errors.append(f"format_version must be {CONFIG_FORMAT_VERSION}")
+    providers = config.get("providers", {})
+    known = {provider.value for provider in LLMProvider}
+    for name in providers:
+        if name not in known:
+            errors.append(f"Unknown provider '{name}'")
+
+    for provider in LLMProvider:
+        entry = providers.get(provider.value)
+        if entry is None:
+            errors.append(f"{provider.value}: missing")
+            continue
+        for name, expected in _CAPABILITY_TYPES.items():
+            if name not in entry:
+                errors.append(f"{provider.value}: missing '{name}'")
+                continue
+            value = entry[name]
+            if expected is bool:
+                valid = isinstance(value, bool)
+            elif expected is int:
+                valid = isinstance(value, int) and not isinstance(value, bool) and value > 0
+            elif expected is float:
+                valid = isinstance(value, (int, float)) and not isinstance(value, bool) and value >= 0
+            else:  # List[str]
+                valid = isinstance(value, list) and all(isinstance(item, str) for item in value)
+            if not valid:
+                errors.append(f"{provider.value}: invalid '{name}' = {value!r}")
+        if entry.get("deployment", "api") not in DEPLOYMENTS:
+            errors.append(f"{provider.value}: deployment must be one of {DEPLOYMENTS}")
+        if provider in ROUTED_PROVIDERS and not entry.get("enabled", True):
+            errors.append(f"{provider.value}: used by routing rules and cannot be disabled")
+    return errors
+
+
+def _merge(base: Dict, override: Dict) -> Dict:
+    merged = dict(base)
+    merged["providers"] = {name: dict(entry) for name, entry in base.get("providers", {}).items()}
+    for name, entry in override.get("providers", {}).items():
+        merged["providers"].setdefault(name, {}).update(entry)
+    return merged
+
+
+class ProviderCapabilityRegistry:
+    """
+    Capabilities from a base config plus override files.
+    refresh() (called by LLMRouter on every routing decision, throttled to
+    check_interval_s) reloads when any file's mtime changes; an invalid
+    edit is rejected and the last good config stays active (see last_error).
+    """
+
+    def __init__(self,
+                 path: str = DEFAULT_CONFIG_PATH,
+                 overrides: Optional[Sequence[str]] = None,
+                 check_interval_s: float = 5.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.path = path
+        if overrides is None:
+            env = os.environ.get(OVERRIDES_ENV_VAR, "")
+            overrides = [p for p in env.split(os.pathsep) if p]
+        self.overrides = list(overrides)
+        self.check_interval_s = check_interval_s
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._checked_at = clock()
+        self.version = 0
+        self.last_error: Optional[str] = None
+        self.config: Dict = {}
+        self.capabilities: Dict[LLMProvider, LLMCapabilities] = {}
+        self._mtimes = self._file_mtimes()
+        self._apply(self._read())  # Invalid initial config raises
+
+    def _file_mtimes(self) -> Dict[str, float]:
+        return {path: os.stat(path).st_mtime_ns for path in [self.path] + self.overrides if os.path.exists(path)}
+
+    def _read(self) -> Dict:
+        with open(self.path, encoding="utf-8") as f:
+            config = json.load(f)
+        for override_path in self.overrides:
+            with open(override_path, encoding="utf-8") as f:
+                config = _merge(config, json.load(f))
+        errors = validate_provider_config(config)
+        if errors:
+            raise ValueError("Invalid provider config: " + "; ".join(errors))
+        return config
+
+    def _apply(self, config: Dict):
+        capabilities = {}
+        for provider in LLMProvider:
+            entry = config["providers"][provider.value]
+            if entry.get("enabled", True):
+                capabilities[provider] = LLMCapabilities(
+                    provider=provider, **{name: entry[name] for name in _CAPABILITY_TYPES}
+                )
+        self.config = config
+        self.capabilities = capabilities
+        self.version += 1
+        self.last_error = None
+
+    def refresh(self, force: bool = False) -> bool:
+        """Reload if a config file changed; True when a new config was applied"""
+        now = self._clock()
+        if not force and now - self._checked_at < self.check_interval_s:
+            return False
+        with self._lock:
+            self._checked_at = now
+            mtimes = self._file_mtimes()
+            if not force and mtimes == self._mtimes:
+                return False
+            self._mtimes = mtimes
+            try:
+                self._apply(self._read())
+            except (OSError, ValueError) as error:
+                self.last_error = str(error)
+                return False
+            return True
+
+    def deployment(self, provider: LLMProvider) -> str:
+        """Deployment kind of a provider (see DEPLOYMENTS)"""
+        return self.config["providers"][provider.value].get("deployment", "api")
+
+    def entry(self, provider: LLMProvider) -> Dict:
+        """Raw merged config entry (includes deployment-specific keys)"""
+        return dict(self.config["providers"][provider.value])
+
+
+_default_registry: Optional[ProviderCapabilityRegistry] = None
+_default_registry_lock = threading.Lock()
+
+
+def default_registry() -> ProviderCapabilityRegistry:
+    """Shared registry over DEFAULT_CONFIG_PATH (and env overrides), used by LLMRouter()"""
+    global _default_registry
+    with _default_registry_lock:
+        if _default_registry is None:
+            _default_registry = ProviderCapabilityRegistry()
+        return _default_registry
@@ -0,0 +1,195 @@
+"""
+GRC AUDIT SYSTEM - PERSISTENT RESPONSE CACHE
+======================================================================
+On-disk, content-addressed cache of LLM responses for repeat audits.
+Keyed by hash(provider, model version, assembled prompt, parameters);
+per-task-type TTLs, size cap with LRU eviction, and invalidation by
+framework module when module text changes
+"""
+
+from typing import Callable, Dict, Optional, Union
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+from grc_audit_orchestration_context import LLMProvider
+from grc_audit_prompt_rope import PromptRope
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    cache_key TEXT PRIMARY KEY,
+    provider TEXT NOT NULL,
+    task_type TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    last_access REAL NOT NULL,
+    size_bytes INTEGER NOT NULL,
+    response TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_lru ON responses(last_access);
+CREATE TABLE IF NOT EXISTS response_modules (
+    cache_key TEXT NOT NULL REFERENCES responses(cache_key) ON DELETE CASCADE,
+    framework TEXT NOT NULL,
+    module_hash TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS response_modules_framework ON response_modules(framework);
+"""
+
+# Regulatory monitoring goes stale quickly; control assessments of unchanged evidence do not
+DEFAULT_TTL_BY_TASK_TYPE: Dict[str, float] = {
+    "regulatory_change_monitoring": 24 * 3600,
+    "threat_intelligence": 24 * 3600,
+    "policy_review": 30 * 24 * 3600,
+    "control_assessment": 90 * 24 * 3600,
+}
+
+
+def response_cache_key(provider: LLMProvider,
+                       model_version: str,
+                       prompt: Union[str, PromptRope],
+                       params: Dict) -> str:
+    """
+    sha256 over provider, model version, prompt and call parameters.
+    Ropes are hashed segment by segment, so the prompt is never flattened.
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps([provider.value, model_version], separators=(",", ":")).encode("utf-8"))
+    digest.update(b"\0")
+    chunks = prompt.iter_chunks() if isinstance(prompt, PromptRope) else (prompt,)
+    for chunk in chunks:
+        digest.update(chunk.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(json.dumps(params, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ResponseCache:
+    """
+    SQLite-backed response store.
+    Values are JSON dicts (e.g. LLMResponse.to_dict()); the
+    cache does not interpret them.
+    """
+
+    def __init__(self,
+                 path: str,
+                 max_bytes: int = 512 * 1024 * 1024,
+                 default_ttl_s: float = 7 * 24 * 3600,
+                 ttl_by_task_type: Optional[Dict[str, float]] = None,
+                 clock: Callable[[], float] = time.time):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.default_ttl_s = default_ttl_s
+        self.ttl_by_task_type = dict(DEFAULT_TTL_BY_TASK_TYPE if ttl_by_task_type is None else ttl_by_task_type)
+        self._clock = clock
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA foreign_keys=ON")
+        self._db.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def close(self):
+        self._db.close()
+
+    def ttl_for(self, task_type: str) -> float:
+        return self.ttl_by_task_type.get(task_type, self.default_ttl_s)
+
+    def get(self, cache_key: str) -> Optional[Dict]:
+        """Cached value, or None if absent or expired (expired entries are removed)"""
+        now = self._clock()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT response, expires_at FROM responses WHERE cache_key = ?", (cache_key,)
+            ).fetchone()
+            if row is None or row[1] <= now:
+                if row is not None:
+                    self._db.execute("DELETE FROM responses WHERE cache_key = ?", (cache_key,))
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE responses SET last_access = ? WHERE cache_key = ?", (now, cache_key))
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self,
+            cache_key: str,
+            provider: LLMProvider,
+            task_type: str,
+            value: Dict,
+            module_hashes: Optional[Dict[str, str]] = None):
+        """
+        Store a value with the task type's TTL.
+        module_hashes (framework -> content hash of the module text in the
+        prompt) tag the entry for invalidate_framework / invalidate_stale.
+        """
+        payload = json.dumps(value, default=str)
+        size = len(payload.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        now = self._clock()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.execute("DELETE FROM responses WHERE cache_key = ?", (cache_key,))
+                self._db.execute(
+                    "INSERT INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (cache_key, provider.value, task_type, now, now + self.ttl_for(task_type), now, size, payload),
+                )
+                self._db.executemany(
+                    "INSERT INTO response_modules VALUES (?, ?, ?)",
+                    [(cache_key, framework, module_hash) for framework, module_hash in (module_hashes or {}).items()],
+                )
+                self._evict(now)
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def _evict(self, now: float):
+        """Drop expired entries, then least recently used until under max_bytes"""
+        self.evictions += self._db.execute("DELETE FROM responses WHERE expires_at <= ?", (now,)).rowcount
+        total = self._db.execute("SELECT COALESCE(SUM(size_bytes), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for cache_key, size in self._db.execute(
+                "SELECT cache_key, size_bytes FROM responses ORDER BY last_access").fetchall():
+            self._db.execute("DELETE FROM responses WHERE cache_key = ?", (cache_key,))
+            self.evictions += 1
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def invalidate_framework(self, framework: str) -> int:
+        """Remove every entry whose prompt included framework; returns entries removed"""
+        with self._lock:
+            return self._db.execute(
+                "DELETE FROM responses WHERE cache_key IN "
+                "(SELECT cache_key FROM response_modules WHERE framework = ?)", (framework,)
+            ).rowcount
+
+    def invalidate_stale(self, current_module_hashes: Dict[str, str]) -> int:
+        """Remove entries built from module text that no longer matches current_module_hashes"""
+        removed = 0
+        with self._lock:
+            for framework, module_hash in current_module_hashes.items():
+                removed += self._db.execute(
+                    "DELETE FROM responses WHERE cache_key IN (SELECT cache_key FROM response_modules "
+                    "WHERE framework = ? AND module_hash != ?)", (framework, module_hash)
+                ).rowcount
+        return removed
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+
+    def stats(self) -> Dict[str, float]:
+        entries, size = self._db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM responses"
+        ).fetchone()
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "entries": entries, "size_bytes": size}
+
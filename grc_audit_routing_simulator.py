@@ -0,0 +1,255 @@
+"""
+GRC AUDIT SYSTEM - ROUTING SIMULATOR
+======================================================================
+Trace-driven discrete-event simulation of routing policies: replays
+recorded tasks (arrival time, task type, role, context size) against
+provider latency/cost models built from the capability config and observed
+LatencyRecorder histograms, and reports cost, latency, queueing delay
+and context overflows per policy before select_llm rules are changed
+"""
+
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+from dataclasses import dataclass, field
+from statistics import NormalDist
+import heapq
+import json
+import math
+import random
+
+from grc_audit_orchestration_context import LLMCapabilities, LLMProvider, LLMRouter, UserRole
+from grc_audit_latency_metrics import LatencyHistogram, LatencyRecorder
+from grc_audit_llm_dispatch import ProviderLimits
+
+
+# ============================================================================
+# TRACES
+# ============================================================================
+
+@dataclass
+class TraceEvent:
+    """One recorded task"""
+    arrival_s: float
+    task_type: str
+    user_role: UserRole
+    input_tokens: int
+    output_tokens: int = 2000
+    priority: str = "balanced"
+
+    @property
+    def context_tokens(self) -> int:
+        return self.input_tokens + self.output_tokens
+
+
+def load_trace(path: str) -> List[TraceEvent]:
+    """
+    JSONL trace, one task per line:
+    {"arrival_s": 12.5, "task_type": "policy_review", "user_role": "grc_analyst",
+     "input_tokens": 48000, "output_tokens": 3000, "priority": "balanced"}
+    """
+    events = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            events.append(TraceEvent(
+                arrival_s=float(record["arrival_s"]),
+                task_type=record.get("task_type", "general"),
+                user_role=UserRole(record.get("user_role", UserRole.DEFAULT.value)),
+                input_tokens=int(record["input_tokens"]),
+                output_tokens=int(record.get("output_tokens", 2000)),
+                priority=record.get("priority", "balanced"),
+            ))
+    return sorted(events, key=lambda event: event.arrival_s)
+
+
+# ============================================================================
+# POLICIES
+# ============================================================================
+
+class SimulationState:
+    """What a policy may inspect at an arrival: capabilities and provider load"""
+
+    def __init__(self, capabilities: Dict[LLMProvider, LLMCapabilities], slots: Dict[LLMProvider, List[float]]):
+        self.capabilities = capabilities
+        self._slots = slots
+        self.now_s = 0.0
+
+    def busy(self, provider: LLMProvider) -> int:
+        """Calls in service on provider at now_s"""
+        return sum(1 for free_at in self._slots[provider] if free_at > self.now_s)
+
+    def wait_s(self, provider: LLMProvider) -> float:
+        """Queueing delay a call arriving now would see on provider"""
+        return max(0.0, self._slots[provider][0] - self.now_s)
+
+
+# policy(event, state) -> provider; raising ValueError means no provider fits
+RoutingPolicy = Callable[[TraceEvent, SimulationState], LLMProvider]
+
+
+def router_policy(router: Optional[LLMRouter] = None) -> RoutingPolicy:
+    """The production select_llm path incl. context-window fallback (provider health ignored, as in an offline replay)"""
+    router = router if router is not None else LLMRouter()
+
+    def policy(event: TraceEvent, state: SimulationState) -> LLMProvider:
+        return router.select_llm(event.task_type, event.user_role, event.context_tokens, event.priority,
+                                 ignore_circuits=True)
+    return policy
+
+
+def fixed_policy(provider: LLMProvider) -> RoutingPolicy:
+    """Every task on one provider"""
+    return lambda event, state: provider
+
+
+def cheapest_policy(event: TraceEvent, state: SimulationState) -> LLMProvider:
+    """Cheapest provider whose context window fits"""
+    fitting = [cap for cap in state.capabilities.values() if cap.context_window >= event.context_tokens]
+    if not fitting:
+        raise ValueError(f"No LLM supports context size {event.context_tokens}")
+    cost = lambda cap: (event.input_tokens * cap.cost_per_1k_tokens_input
+                        + event.output_tokens * cap.cost_per_1k_tokens_output)
+    return min(fitting, key=cost).provider
+
+
+def least_wait_policy(event: TraceEvent, state: SimulationState) -> LLMProvider:
+    """Fitting provider with the shortest queue plus static latency"""
+    fitting = [cap for cap in state.capabilities.values() if cap.context_window >= event.context_tokens]
+    if not fitting:
+        raise ValueError(f"No LLM supports context size {event.context_tokens}")
+    return min(fitting, key=lambda cap: state.wait_s(cap.provider) * 1000 + cap.latency_ms).provider
+
+
+# ============================================================================
+# SIMULATION
+# ============================================================================
+
+@dataclass
+class PolicyReport:
+    """Outcome of replaying a trace under one policy"""
+    policy: str
+    tasks: int = 0
+    served: int = 0
+    context_overflows: int = 0               # Routed to a provider whose window is too small, or none fits
+    total_cost_usd: float = 0.0
+    latency_p50_ms: float = 0.0              # Arrival to completion (queueing + service)
+    latency_p95_ms: float = 0.0
+    queue_delay_mean_ms: float = 0.0
+    queue_delay_p95_ms: float = 0.0
+    makespan_s: float = 0.0
+    by_provider: Dict[str, int] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict:
+        return dict(self.__dict__)
+
+
+class RoutingSimulator:
+    """
+    Each provider is a FCFS queue with max_concurrency servers (from
+    ProviderLimits). Service time per call is sampled from the observed
+    provider histogram in recorder when it has at least min_samples calls,
+    otherwise from a lognormal around LLMCapabilities.latency_ms plus
+    output tokens at tokens_per_second. Every policy sees the same random
+    draws per task (common random numbers), so differences between
+    reports come from routing, not noise.
+    """
+
+    def __init__(self,
+                 capabilities: Optional[Dict[LLMProvider, LLMCapabilities]] = None,
+                 recorder: Optional[LatencyRecorder] = None,
+                 limits: Optional[Dict[LLMProvider, ProviderLimits]] = None,
+                 tokens_per_second: Optional[Dict[LLMProvider, float]] = None,
+                 default_tokens_per_second: float = 60.0,
+                 jitter: float = 0.3,
+                 min_samples: int = 20,
+                 seed: int = 0):
+        self.capabilities = dict(capabilities if capabilities is not None else LLMRouter().llm_capabilities)
+        self.recorder = recorder
+        self.limits = limits or {}
+        self.tokens_per_second = tokens_per_second or {}
+        self.default_tokens_per_second = default_tokens_per_second
+        self.jitter = jitter
+        self.min_samples = min_samples
+        self.seed = seed
+
+    def service_ms(self, event: TraceEvent, provider: LLMProvider, draw: float) -> float:
+        """Service time of event on provider at quantile draw (0..1)"""
+        histogram = self.recorder.histogram("provider", provider.value) if self.recorder is not None else None
+        if histogram is not None and histogram.count >= self.min_samples:
+            return histogram.percentile(draw)
+        cap = self.capabilities[provider]
+        latency = cap.latency_ms * math.exp(self.jitter * NormalDist().inv_cdf(draw))
+        rate = self.tokens_per_second.get(provider, self.default_tokens_per_second)
+        return latency + event.output_tokens / rate * 1000
+
+    def cost_usd(self, event: TraceEvent, provider: LLMProvider) -> float:
+        cap = self.capabilities[provider]
+        return (event.input_tokens / 1000 * cap.cost_per_1k_tokens_input
+                + event.output_tokens / 1000 * cap.cost_per_1k_tokens_output)
+
+    def run(self, trace: Sequence[TraceEvent], policy: RoutingPolicy, name: str = "policy") -> PolicyReport:
+        """Replay trace (in arrival order) under policy"""
+        events = sorted(trace, key=lambda event: event.arrival_s)
+        draws = random.Random(self.seed)
+        # Min-heap of times each concurrency slot becomes free, per provider
+        slots = {
+            provider: [0.0] * max(1, self.limits.get(provider, ProviderLimits()).max_concurrency)
+            for provider in self.capabilities
+        }
+        state = SimulationState(self.capabilities, slots)
+        report = PolicyReport(policy=name, tasks=len(events))
+        latency = LatencyHistogram()
+        queueing = LatencyHistogram()
+        queue_total_ms = 0.0
+
+        for event in events:
+            draw = min(max(draws.random(), 1e-9), 1 - 1e-9)  # Drawn before routing: same per task for every policy
+            state.now_s = event.arrival_s
+            try:
+                provider = policy(event, state)
+            except ValueError:
+                report.context_overflows += 1
+                continue
+            if provider not in self.capabilities or self.capabilities[provider].context_window < event.context_tokens:
+                report.context_overflows += 1
+                continue
+
+            free_at = heapq.heappop(slots[provider])
+            start_s = max(event.arrival_s, free_at)
+            finish_s = start_s + self.service_ms(event, provider, draw) / 1000
+            heapq.heappush(slots[provider], finish_s)
+
+            wait_ms = (start_s - event.arrival_s) * 1000
+            queue_total_ms += wait_ms
+            queueing.record(wait_ms)
+            latency.record((finish_s - event.arrival_s) * 1000)
+            report.served += 1
+            report.total_cost_usd += self.cost_usd(event, provider)
+            report.makespan_s = max(report.makespan_s, finish_s)
+            report.by_provider[provider.value] = report.by_provider.get(provider.value, 0) + 1
+
+        if report.served:
+            report.latency_p50_ms = latency.percentile(0.50)
+            report.latency_p95_ms = latency.percentile(0.95)
+            report.queue_delay_mean_ms = queue_total_ms / report.served
+            report.queue_delay_p95_ms = queueing.percentile(0.95)
+        return report
+
+    def compare(self, trace: Sequence[TraceEvent], policies: Dict[str, RoutingPolicy]) -> Dict[str, PolicyReport]:
+        """Reports for every named policy over the same trace"""
+        return {name: self.run(trace, policy, name) for name, policy in policies.items()}
+
+
+def format_comparison(reports: Iterable[PolicyReport]) -> str:
+    """Markdown table of policy reports"""
+    lines = [
+        "| Policy | Served | Overflows | Cost (USD) | p50 (ms) | p95 (ms) | Queue mean (ms) | Queue p95 (ms) |",
+        "|--------|--------|-----------|------------|----------|----------|-----------------|----------------|",
+    ]
+    for r in reports:
+        lines.append(
+            f"| {r.policy} | {r.served}/{r.tasks} | {r.context_overflows} | {r.total_cost_usd:.2f} | "
+            f"{r.latency_p50_ms:.0f} | {r.latency_p95_ms:.0f} | {r.queue_delay_mean_ms:.0f} | {r.queue_delay_p95_ms:.0f} |"
+        )
+    return "\n".join(lines)